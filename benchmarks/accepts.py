@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+# Measures the per call overhead of the @accepts argument checks: the
+# previous decorator, which introspected the function on every call, the
+# current one with checks on and off, and an undecorated function, i.e. a
+# process started with LGSVL__TYPE_CHECKS=0.
+
+import argparse
+import inspect
+import timeit
+
+import lgsvl
+import lgsvl.utils
+
+
+def legacy_accepts(*types):
+    # The decorator before argument names were looked up once
+    def check_accepts(f):
+        assert len(types) + 1 == f.__code__.co_argcount
+
+        def new_f(*args, **kwargs):
+            names = inspect.getfullargspec(f)[0]
+            it = zip(args[1:], types, names[1:])
+            for (a, t, n) in it:
+                if not isinstance(a, t):
+                    raise TypeError("Argument '{}' should have '{}' type".format(n, t))
+            return f(*args, **kwargs)
+        new_f.__name__ = f.__name__
+        return new_f
+    return check_accepts
+
+
+class Target:
+    def add_agent(self, name, agent_type, state=None, color=None):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200000)
+    args = parser.parse_args()
+
+    types = (str, lgsvl.AgentType, (lgsvl.AgentState, type(None)), (lgsvl.Vector, type(None)))
+    target = Target()
+    legacy = legacy_accepts(*types)(Target.add_agent)
+    current = lgsvl.utils.accepts(*types)(Target.add_agent)
+    call_args = (target, "Sedan", lgsvl.AgentType.NPC, lgsvl.AgentState(), lgsvl.Vector())
+
+    def measure(name, fn):
+        elapsed = min(timeit.repeat(lambda: fn(*call_args), number=args.calls, repeat=3))
+        print("{:24} {:>8.3f} us/call".format(name, elapsed / args.calls * 1e6))
+
+    measure("undecorated", Target.add_agent)
+    measure("legacy @accepts", legacy)
+    lgsvl.utils.set_type_checks(True)
+    measure("@accepts", current)
+    lgsvl.utils.set_type_checks(False)
+    measure("@accepts, checks off", current)
+    lgsvl.utils.set_type_checks(True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+# Measures the encode and decode cost of representative commands for every
+# codec available in this Python environment.
+
+import timeit
+
+import lgsvl
+from lgsvl.codec import JsonCodec, OrjsonCodec, MsgpackCodec, orjson, msgpack
+
+
+def state(i):
+    s = lgsvl.AgentState()
+    s.transform = lgsvl.Transform(lgsvl.Vector(i, 0.5, -i), lgsvl.Vector(0, i % 360, 0))
+    s.velocity = lgsvl.Vector(1.25, 0, 3.5)
+    return s.to_json()
+
+
+hit = {"distance": 12.5, "point": {"x": 1.0, "y": 2.0, "z": 3.0}, "normal": {"x": 0.0, "y": 1.0, "z": 0.0}}
+ray = {"origin": {"x": 0.0, "y": 1.0, "z": 0.0}, "direction": {"x": 0.0, "y": -1.0, "z": 0.0}, "layer_mask": -1, "max_distance": 100.0}
+
+# (command, request arguments, response result)
+COMMANDS = [
+    ("agent/state/get", {"uid": "a1b2c3"}, state(1)),
+    ("agent/state/set", {"uid": "a1b2c3", "state": state(1)}, None),
+    ("vehicle/apply_control", {"uid": "a1b2c3", "sticky": False, "control": {
+        "steering": 0.1, "throttle": 0.5, "braking": 0.0, "reverse": False, "handbrake": False}}, None),
+    ("simulator/continue", {}, {"events": [
+        {"type": "collision", "agent": "a{}".format(i), "other": "b{}".format(i), "contact": {"x": 1.0, "y": 0.0, "z": 2.0}}
+        for i in range(100)]}),
+    ("simulator/raycast", [ray] * 1000, [hit] * 1000),
+    ("map/spawn/get", {}, [dict(state(i)["transform"], destinations=[state(i)["transform"]] * 3) for i in range(10)]),
+]
+
+
+def main():
+    codecs = [JsonCodec()]
+    if orjson is not None:
+        codecs.append(OrjsonCodec())
+    if msgpack is not None:
+        codecs.append(MsgpackCodec())
+
+    print("{:24} {:12} {:>10} {:>12} {:>12}".format("command", "codec", "bytes", "encode [us]", "decode [us]"))
+    for name, args, result in COMMANDS:
+        request = {"id": 1, "command": name, "arguments": args}
+        response = {"result": result}
+        for codec in codecs:
+            number = max(10, 20000 // max(1, len(JsonCodec().encode(request)) // 100))
+            encoded = codec.encode(response)
+            t_enc = timeit.timeit(lambda: codec.encode(request), number=number) / number
+            t_dec = timeit.timeit(lambda: codec.decode(encoded), number=number) / number
+            print("{:24} {:12} {:>10} {:>12.2f} {:>12.2f}".format(
+                name, type(codec).__name__, len(codec.encode(request)) + len(encoded), t_enc * 1e6, t_dec * 1e6))
+
+
+if __name__ == "__main__":
+    main()
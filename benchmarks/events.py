@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+# Measures client side event dispatch on a synthetic stream of replies like
+# the ones random traffic produces: the compiled dispatch table of
+# Simulator._process_events against the previous per event if/elif chain.
+
+import argparse
+import random
+import time
+
+import lgsvl
+from lgsvl.mock import MockSimulator
+
+
+def legacy_process_events(sim, callbacks, events):
+    # Dispatch as done before the table, kept here for comparison
+    for ev in events:
+        if "agent" in ev:
+            agent = sim.agents.get(ev["agent"])
+            if agent in callbacks:
+                agent_callbacks = callbacks[agent]
+                event_type = ev["type"]
+                if event_type in agent_callbacks:
+                    for fn in agent_callbacks[event_type]:
+                        if event_type == "collision":
+                            fn(agent, sim.agents.get(ev["other"]), lgsvl.Vector.from_json(ev["contact"]) if ev["contact"] is not None else None)
+                        elif event_type == "waypoint_reached":
+                            fn(agent, ev["index"])
+                        elif event_type == "stop_line":
+                            fn(agent)
+                        elif event_type == "lane_change":
+                            fn(agent)
+                        elif event_type == "destination_reached":
+                            fn(agent)
+                        elif event_type == "custom":
+                            fn(agent, ev["kind"], ev["context"])
+        elif None in callbacks:
+            agent_callbacks = callbacks[None]
+            event_type = ev["type"]
+            if event_type in agent_callbacks:
+                for fn in agent_callbacks[event_type]:
+                    if event_type == "agents_traversed_waypoints":
+                        fn()
+
+
+def synthetic_events(uids, count, rng):
+    events = []
+    for _ in range(count):
+        uid = rng.choice(uids)
+        kind = rng.random()
+        if kind < 0.4:
+            events.append({"type": "stop_line", "agent": uid})
+        elif kind < 0.7:
+            events.append({"type": "waypoint_reached", "agent": uid, "index": rng.randrange(10)})
+        elif kind < 0.9:
+            events.append({"type": "lane_change", "agent": uid})
+        else:
+            events.append({
+                "type": "collision", "agent": uid, "other": rng.choice(uids),
+                "contact": {"x": rng.random(), "y": 0.0, "z": rng.random()},
+            })
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agents", type=int, default=500)
+    parser.add_argument("--events", type=int, default=500, help="events per reply")
+    parser.add_argument("--replies", type=int, default=200)
+    parser.add_argument("--listeners", type=float, default=0.1, help="share of agents with callbacks")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with MockSimulator(seed=0) as server:
+        sim = lgsvl.Simulator("127.0.0.1", server.port)
+        agents = [sim.add_agent("Sedan", lgsvl.AgentType.NPC) for _ in range(args.agents)]
+        uids = [agent.uid for agent in agents]
+
+        handled = [0]
+
+        def callback(*args):
+            handled[0] += 1
+
+        legacy = {}
+        for agent in rng.sample(agents, int(len(agents) * args.listeners)):
+            for name in ("collision", "waypoint_reached", "stop_line", "lane_change"):
+                sim._add_callback(agent, name, callback)
+                legacy.setdefault(agent, {}).setdefault(name, set()).add(callback)
+
+        replies = [synthetic_events(uids, args.events, rng) for _ in range(args.replies)]
+        count = args.events * args.replies
+
+        start = time.perf_counter()
+        for events in replies:
+            legacy_process_events(sim, legacy, events)
+        report("if/elif chain", count, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for events in replies:
+            sim._process_events(events)
+        report("dispatch table", count, time.perf_counter() - start)
+
+        sim.on_event("stop_line", callback)
+        start = time.perf_counter()
+        for events in replies:
+            sim._process_events(events)
+        report("dispatch table + on_event", count, time.perf_counter() - start)
+
+        sim.on_events(lambda events: None)
+        start = time.perf_counter()
+        for events in replies:
+            sim._process_events(events)
+        report("dispatch table + on_events", count, time.perf_counter() - start)
+        sim.close()
+
+
+def report(name, count, elapsed):
+    print("{:28} {:>8} {:>10.3f} s {:>12.0f} /s".format(name, count, elapsed, count / elapsed))
+
+
+if __name__ == "__main__":
+    main()
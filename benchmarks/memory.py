@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+# Measures the memory held by a recorded agent state history, one AgentState
+# per agent per sample, with the slotted geometry classes and with the
+# __dict__ based classes they replaced, which are reproduced below. A few
+# minutes are recorded and the total is projected to the full duration, an
+# hour of 100 agents at 10 Hz does not fit in memory with the old classes.
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+
+import lgsvl
+
+
+class DictVector:
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+
+class DictTransform:
+    def __init__(self, position, rotation):
+        self.position = position
+        self.rotation = rotation
+
+
+class DictState:
+    def __init__(self, transform, velocity, angular_velocity):
+        self.transform = transform
+        self.velocity = velocity
+        self.angular_velocity = angular_velocity
+
+
+def record(samples, agents, vector, transform, state):
+    history = []
+    for i in range(samples):
+        t = i * 0.1
+        for a in range(agents):
+            history.append(state(
+                transform(vector(a * 3.6, 0.0, t * 10.0), vector(0.0, 90.0, 0.0)),
+                vector(0.0, 0.0, 10.0),
+                vector(),
+            ))
+    return history
+
+
+def instance_size(obj):
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def measure(name, samples, total, agents, *classes):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    history = record(samples, agents, *classes)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    sample = history[-1]
+    per_state = instance_size(sample) + instance_size(sample.transform) + sum(
+        instance_size(v) for v in (sample.transform.position, sample.transform.rotation, sample.velocity, sample.angular_velocity)
+    )
+    print("{:10} {:>10} states {:>8.1f} MiB  projected {:>10} states {:>8.1f} MiB  {:>5} B/state  Vector {:>3} B  {:>6.2f} s".format(
+        name, len(history), current / 2 ** 20, total * agents, current / 2 ** 20 * total / samples,
+        per_state, instance_size(sample.velocity), elapsed))
+    del history
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agents", type=int, default=100)
+    parser.add_argument("--hours", type=float, default=1.0)
+    parser.add_argument("--rate", type=float, default=10.0, help="samples per second")
+    parser.add_argument("--minutes", type=float, default=2.0, help="minutes actually recorded")
+    args = parser.parse_args()
+
+    total = int(args.hours * 3600 * args.rate)
+    samples = min(total, int(args.minutes * 60 * args.rate))
+    measure("__dict__", samples, total, args.agents, DictVector, DictTransform, DictState)
+    measure("__slots__", samples, total, args.agents, lgsvl.Vector, lgsvl.Transform, lgsvl.AgentState)
+
+
+if __name__ == "__main__":
+    main()
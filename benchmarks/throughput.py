@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+# Measures client side command throughput against the mock simulator with
+# many agents: one state read per agent issued one at a time, pipelined in a
+# batch, a short simulator/run and a sweep of raycasts.
+
+import argparse
+import time
+
+import numpy
+
+import lgsvl
+from lgsvl.mock import MockSimulator
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agents", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.0005, help="mock reply latency in seconds")
+    parser.add_argument("--codec", default=None)
+    args = parser.parse_args()
+
+    with MockSimulator(latency=args.latency, random_agents=args.agents, seed=0) as server:
+        sim = lgsvl.Simulator("127.0.0.1", server.port, codec=args.codec)
+        agents = []
+        start = time.perf_counter()
+        for i in range(args.agents):
+            state = lgsvl.AgentState()
+            state.transform.position = lgsvl.Vector((i % 10) * 3.6, 0, i * 5.0)
+            agents.append(sim.add_agent("Sedan", lgsvl.AgentType.NPC, state))
+        report("simulator/add_agent", args.agents, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for agent in agents:
+            agent.state
+        report("agent/state/get", len(agents), time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with sim.batch():
+            futures = [agent.state for agent in agents]
+        [f.result() for f in futures]
+        report("agent/state/get (batch)", len(agents), time.perf_counter() - start)
+
+        start = time.perf_counter()
+        sim.get_agent_states(agents, as_array=True)
+        report("get_agent_states (array)", len(agents), time.perf_counter() - start)
+
+        for agent in agents:
+            agent.follow_closest_lane(True, 10.0)
+        start = time.perf_counter()
+        sim.run(1.0)
+        report("simulator/run 1s", 1, time.perf_counter() - start)
+
+        # raycast_batch sends a single frame, keep it under the 1 MiB limit
+        rays = 5000
+        origins = numpy.column_stack([numpy.arange(rays) * 0.1, numpy.full(rays, 2.0), numpy.zeros(rays)])
+        directions = numpy.tile([0.0, -1.0, 0.0], (rays, 1))
+        start = time.perf_counter()
+        sim.raycast_batch([
+            {"origin": lgsvl.Vector(*o), "direction": lgsvl.Vector(*d), "layer_mask": -1, "max_distance": float("inf")}
+            for o, d in zip(origins.tolist(), directions.tolist())
+        ])
+        report("raycast_batch", rays, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        sim.raycast_array(origins, directions)
+        report("raycast_array", rays, time.perf_counter() - start)
+        sim.close()
+
+
+def report(name, count, elapsed):
+    print("{:28} {:>8} {:>10.3f} s {:>12.0f} /s".format(name, count, elapsed, count / elapsed))
+
+
+if __name__ == "__main__":
+    main()
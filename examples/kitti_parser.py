@@ -19,7 +19,7 @@
 # path to save location (str)
 
 import lgsvl
-from lgsvl.utils import transform_to_matrix
+from lgsvl.utils import transform_to_matrix, transforms_to_matrices
 import os
 import math
 import time
@@ -413,12 +413,6 @@ class KittiParser:
     def get_filename(self, ext):
         return "{:06d}.{}".format(self.idx, ext)
 
-# Converts the world space position of the NPC into the EGO camera space
-    def get_npc_tf_in_cam_space(self, npc_transform, tf_mat):
-        npc_tf = np.dot(transform_to_matrix(npc_transform), tf_mat)
-
-        return npc_tf
-
 # Returns a vector from the EGO camera to the NPC of the input transform
     def get_location(self, transform):
         location = (transform[3][0], -transform[3][1], transform[3][2])
@@ -509,9 +503,13 @@ class KittiParser:
         ego_mat = transform_to_matrix(self.ego_state.transform)
         tf_mat = np.dot(np.linalg.inv(ego_mat), np.linalg.inv(camera_mat))
 
+        # Every NPC is moved into the camera space at once
+        positions = [[s.position.x, s.position.y, s.position.z] for s in self.npcs_state]
+        rotations = [[s.rotation.x, s.rotation.y, s.rotation.z] for s in self.npcs_state]
+        npc_tfs = np.matmul(transforms_to_matrices(positions, rotations), tf_mat) if self.npcs_state else []
+
         labels = []
-        for npc, npc_state in zip(self.npcs, self.npcs_state):
-            npc_tf = self.get_npc_tf_in_cam_space(npc_state.transform, tf_mat)
+        for npc, npc_tf in zip(self.npcs, npc_tfs):
 
             location = self.get_location(npc_tf)
             rotation_y = self.get_rotation_y(npc_tf)
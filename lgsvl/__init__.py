@@ -4,8 +4,8 @@
 # This software contains code licensed as described in LICENSE.
 #
 
-from .geometry import Vector, BoundingBox, Transform, Quaternion
-from .simulator import Simulator, RaycastHit, WeatherState
+from .geometry import Vector, BoundingBox, Transform, Quaternion, VectorArray, TransformArray
+from .simulator import Simulator, RaycastHit, RaycastHits, WeatherState, Observation
 from .sensor import Sensor, CameraSensor, LidarSensor, ImuSensor
 from .agent import (
     AgentType,
@@ -23,8 +23,11 @@ from .agent import (
 )
 from .controllable import Controllable
 from .utils import ObjectState
+from .mapcache import MapCache
+from .vector_env import VectorEnv, VectorObservation
 
 # Subpackages
+import lgsvl.aio
 import lgsvl.dreamview
 import lgsvl.evaluator
 import lgsvl.wise
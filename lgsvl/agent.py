@@ -4,7 +4,7 @@
 # This software contains code licensed as described in LICENSE.
 #
 
-from .geometry import Vector, BoundingBox, Transform
+from .geometry import Vector, BoundingBox, Transform, Slotted
 from .sensor import Sensor
 from .utils import accepts, ObjectState as AgentState
 
@@ -13,7 +13,9 @@ from collections.abc import Iterable, Callable
 import json
 
 
-class DriveWaypoint:
+class DriveWaypoint(Slotted):
+    __slots__ = ("position", "speed", "acceleration", "angle", "idle", "deactivate", "trigger_distance", "timestamp", "trigger")
+
     def __init__(
         self,
         position,
@@ -37,7 +39,9 @@ class DriveWaypoint:
         self.trigger = trigger
 
 
-class WalkWaypoint:
+class WalkWaypoint(Slotted):
+    __slots__ = ("position", "speed", "acceleration", "idle", "trigger_distance", "trigger")
+
     def __init__(self, position, idle, trigger_distance=0, speed=1, acceleration=0, trigger=None):
         self.position = position
         self.speed = speed
@@ -113,13 +117,12 @@ class Agent:
 
     @property
     def state(self):
-        j = self.remote.command("agent/state/get", {"uid": self.uid})
-        return AgentState.from_json(j)
+        return self.remote.command("agent/state/get", {"uid": self.uid}, AgentState.from_json)
 
     @state.setter
     @accepts(AgentState)
     def state(self, state):
-        self.remote.command(
+        self.remote.send(
             "agent/state/set", {"uid": self.uid, "state": state.to_json()}
         )
 
@@ -129,8 +132,7 @@ class Agent:
 
     @property
     def bounding_box(self):
-        j = self.remote.command("agent/bounding_box/get", {"uid": self.uid})
-        return BoundingBox.from_json(j)
+        return self.remote.command("agent/bounding_box/get", {"uid": self.uid}, BoundingBox.from_json)
 
     def __eq__(self, other):
         return self.uid == other.uid
@@ -138,7 +140,7 @@ class Agent:
     def __hash__(self):
         return hash(self.uid)
 
-    @accepts(Callable)
+    @accepts((Callable, type(None)))
     def on_collision(self, fn):
         self.remote.command("agent/on_collision", {"uid": self.uid})
         self.simulator._add_callback(self, "collision", fn)
@@ -181,7 +183,7 @@ class EgoVehicle(Vehicle):
         return self.remote.command("vehicle/bridge/type", {"uid": self.uid})
 
     def get_sensors(self):
-        j = self.remote.command("vehicle/sensors/get", {"uid": self.uid})
+        j = self.remote.query("vehicle/sensors/get", {"uid": self.uid})
         return [Sensor.create(self.remote, sensor) for sensor in j]
 
     @accepts(bool, float)
@@ -212,7 +214,7 @@ class EgoVehicle(Vehicle):
             args["control"]["turn_signal_left"] = control.turn_signal_left
         if control.turn_signal_right is not None:
             args["control"]["turn_signal_right"] = control.turn_signal_right
-        self.remote.command("vehicle/apply_control", args)
+        self.remote.send("vehicle/apply_control", args)
 
     def on_custom(self, fn):
         self.simulator._add_callback(self, "custom", fn)
@@ -357,7 +359,7 @@ class NpcVehicle(Vehicle):
         ):
             args["control"]["isLeftTurnSignal"] = control.turn_signal_left
             args["control"]["isRightTurnSignal"] = control.turn_signal_right
-        self.remote.command("vehicle/apply_npc_control", args)
+        self.remote.send("vehicle/apply_npc_control", args)
 
     def on_waypoint_reached(self, fn):
         self.remote.command("agent/on_waypoint_reached", {"uid": self.uid})
@@ -440,7 +442,7 @@ class Pedestrian(Agent):
     def set_speed(self, speed):
         self.remote.command("pedestrian/set_speed", {"uid": self.uid, "speed": speed})
 
-    @accepts(Callable)
+    @accepts((Callable, type(None)))
     def on_waypoint_reached(self, fn):
         self.remote.command("agent/on_waypoint_reached", {"uid": self.uid})
         self.simulator._add_callback(self, "waypoint_reached", fn)
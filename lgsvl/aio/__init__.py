@@ -0,0 +1,11 @@
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+from .remote import AsyncRemote
+from .simulator import AsyncSimulator
+from .agent import Agent, Vehicle, EgoVehicle, NpcVehicle, Pedestrian
+from .sensor import Sensor
+from .controllable import Controllable
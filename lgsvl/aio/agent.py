@@ -0,0 +1,277 @@
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+from ..geometry import BoundingBox, Transform
+from ..agent import AgentType, VehicleControl, NPCControl
+from ..utils import accepts, ObjectState as AgentState
+from .sensor import Sensor
+
+from collections.abc import Iterable, Callable
+
+
+class Agent:
+    def __init__(self, uid, simulator):
+        self.uid = uid
+        self.remote = simulator.remote
+        self.simulator = simulator
+
+    @property
+    async def state(self):
+        j = await self.remote.command("agent/state/get", {"uid": self.uid})
+        return AgentState.from_json(j)
+
+    @accepts(AgentState)
+    async def set_state(self, state):
+        await self.remote.command(
+            "agent/state/set", {"uid": self.uid, "state": state.to_json()}
+        )
+
+    @property
+    async def transform(self):
+        return (await self.state).transform
+
+    @property
+    async def bounding_box(self):
+        j = await self.remote.command("agent/bounding_box/get", {"uid": self.uid})
+        return BoundingBox.from_json(j)
+
+    def __eq__(self, other):
+        return self.uid == other.uid
+
+    def __hash__(self):
+        return hash(self.uid)
+
+    @accepts(Callable)
+    async def on_collision(self, fn):
+        await self.remote.command("agent/on_collision", {"uid": self.uid})
+        self.simulator._add_callback(self, "collision", fn)
+
+    @staticmethod
+    def create(simulator, uid, agent_type):
+        if agent_type == AgentType.EGO:
+            return EgoVehicle(uid, simulator)
+        elif agent_type == AgentType.NPC:
+            return NpcVehicle(uid, simulator)
+        elif agent_type == AgentType.PEDESTRIAN:
+            return Pedestrian(uid, simulator)
+        else:
+            raise ValueError("unsupported agent type")
+
+
+class Vehicle(Agent):
+    def __init__(self, uid, simulator):
+        super().__init__(uid, simulator)
+
+
+class EgoVehicle(Vehicle):
+    def __init__(self, uid, simulator):
+        super().__init__(uid, simulator)
+
+    @property
+    def bridge_connected(self):
+        return self.remote.command("vehicle/bridge/connected", {"uid": self.uid})
+
+    @accepts(str, int)
+    async def connect_bridge(self, address, port):
+        if port <= 0 or port > 65535:
+            raise ValueError("port value is out of range")
+        await self.remote.command(
+            "vehicle/bridge/connect",
+            {"uid": self.uid, "address": address, "port": port},
+        )
+
+    async def get_bridge_type(self):
+        return await self.remote.command("vehicle/bridge/type", {"uid": self.uid})
+
+    async def get_sensors(self):
+        j = await self.remote.command("vehicle/sensors/get", {"uid": self.uid})
+        return [Sensor.create(self.remote, sensor) for sensor in j]
+
+    @accepts(bool, float)
+    async def set_fixed_speed(self, isCruise, speed=None):
+        await self.remote.command(
+            "vehicle/set_fixed_speed",
+            {"uid": self.uid, "isCruise": isCruise, "speed": speed},
+        )
+
+    @accepts(VehicleControl, bool)
+    async def apply_control(self, control, sticky=False):
+        args = {
+            "uid": self.uid,
+            "sticky": sticky,
+            "control": {
+                "steering": control.steering,
+                "throttle": control.throttle,
+                "braking": control.braking,
+                "reverse": control.reverse,
+                "handbrake": control.handbrake,
+            },
+        }
+        if control.headlights is not None:
+            args["control"]["headlights"] = control.headlights
+        if control.windshield_wipers is not None:
+            args["control"]["windshield_wipers"] = control.windshield_wipers
+        if control.turn_signal_left is not None:
+            args["control"]["turn_signal_left"] = control.turn_signal_left
+        if control.turn_signal_right is not None:
+            args["control"]["turn_signal_right"] = control.turn_signal_right
+        await self.remote.command("vehicle/apply_control", args)
+
+    def on_custom(self, fn):
+        self.simulator._add_callback(self, "custom", fn)
+
+    async def set_initial_pose(self):
+        await self.remote.command(
+            "vehicle/set_initial_pose",
+            {
+                "uid": self.uid,
+            }
+        )
+
+    @accepts(Transform)
+    async def set_destination(self, transform):
+        await self.remote.command(
+            "vehicle/set_destination",
+            {
+                "uid": self.uid,
+                "transform": transform.to_json(),
+            }
+        )
+
+    async def on_destination_reached(self, fn):
+        await self.remote.command("agent/on_destination_reached", {"uid": self.uid})
+        self.simulator._add_callback(self, "destination_reached", fn)
+
+
+class NpcVehicle(Vehicle):
+    def __init__(self, uid, simulator):
+        super().__init__(uid, simulator)
+
+    @accepts(Iterable, bool, str)
+    async def follow(self, waypoints, loop=False, waypoints_path_type="Linear"):
+        """Tells the NPC to follow the waypoints, see lgsvl.NpcVehicle.follow"""
+        await self.remote.command(
+            "vehicle/follow_waypoints",
+            {
+                "uid": self.uid,
+                "waypoints": [
+                    {
+                        "position": wp.position.to_json(),
+                        "speed": wp.speed,
+                        "acceleration": wp.acceleration,
+                        "angle": wp.angle.to_json(),
+                        "idle": wp.idle,
+                        "deactivate": wp.deactivate,
+                        "trigger_distance": wp.trigger_distance,
+                        "timestamp": wp.timestamp,
+                        "trigger": (
+                            None if wp.trigger is None else wp.trigger.to_json()
+                        ),
+                    }
+                    for wp in waypoints
+                ],
+                "waypoints_path_type": waypoints_path_type,
+                "loop": loop,
+            },
+        )
+
+    async def follow_closest_lane(self, follow, max_speed, isLaneChange=True):
+        await self.remote.command(
+            "vehicle/follow_closest_lane",
+            {
+                "uid": self.uid,
+                "follow": follow,
+                "max_speed": max_speed,
+                "isLaneChange": isLaneChange,
+            },
+        )
+
+    async def set_behaviour(self, behaviour):
+        await self.remote.command(
+            "vehicle/behaviour", {"uid": self.uid, "behaviour": behaviour}
+        )
+
+    @accepts(bool)
+    async def change_lane(self, isLeftChange):
+        await self.remote.command(
+            "vehicle/change_lane", {"uid": self.uid, "isLeftChange": isLeftChange}
+        )
+
+    @accepts(NPCControl)
+    async def apply_control(self, control):
+        args = {"uid": self.uid, "control": {}}
+        if control.headlights is not None:
+            if control.headlights not in [0, 1, 2]:
+                raise ValueError("unsupported intensity value")
+            args["control"]["headlights"] = control.headlights
+        if control.hazards is not None:
+            args["control"]["hazards"] = control.hazards
+        if control.e_stop is not None:
+            args["control"]["e_stop"] = control.e_stop
+        if (
+            control.turn_signal_left is not None
+            or control.turn_signal_right is not None
+        ):
+            args["control"]["isLeftTurnSignal"] = control.turn_signal_left
+            args["control"]["isRightTurnSignal"] = control.turn_signal_right
+        await self.remote.command("vehicle/apply_npc_control", args)
+
+    async def on_waypoint_reached(self, fn):
+        await self.remote.command("agent/on_waypoint_reached", {"uid": self.uid})
+        self.simulator._add_callback(self, "waypoint_reached", fn)
+
+    async def on_stop_line(self, fn):
+        await self.remote.command("agent/on_stop_line", {"uid": self.uid})
+        self.simulator._add_callback(self, "stop_line", fn)
+
+    async def on_lane_change(self, fn):
+        await self.remote.command("agent/on_lane_change", {"uid": self.uid})
+        self.simulator._add_callback(self, "lane_change", fn)
+
+
+class Pedestrian(Agent):
+    def __init__(self, uid, simulator):
+        super().__init__(uid, simulator)
+
+    @accepts(bool)
+    async def walk_randomly(self, enable):
+        await self.remote.command(
+            "pedestrian/walk_randomly", {"uid": self.uid, "enable": enable}
+        )
+
+    @accepts(Iterable, bool, str)
+    async def follow(self, waypoints, loop=False, waypoints_path_type="Linear"):
+        """Tells the Pedestrian to follow the waypoints, see lgsvl.Pedestrian.follow"""
+        await self.remote.command(
+            "pedestrian/follow_waypoints",
+            {
+                "uid": self.uid,
+                "waypoints": [
+                    {
+                        "position": wp.position.to_json(),
+                        "idle": wp.idle,
+                        "trigger_distance": wp.trigger_distance,
+                        "speed": wp.speed,
+                        "acceleration": wp.acceleration,
+                        "trigger": (
+                            None if wp.trigger is None else wp.trigger.to_json()
+                        ),
+                    }
+                    for wp in waypoints
+                ],
+                "waypoints_path_type": waypoints_path_type,
+                "loop": loop,
+            },
+        )
+
+    @accepts(float)
+    async def set_speed(self, speed):
+        await self.remote.command("pedestrian/set_speed", {"uid": self.uid, "speed": speed})
+
+    @accepts(Callable)
+    async def on_waypoint_reached(self, fn):
+        await self.remote.command("agent/on_waypoint_reached", {"uid": self.uid})
+        self.simulator._add_callback(self, "waypoint_reached", fn)
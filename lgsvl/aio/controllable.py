@@ -0,0 +1,41 @@
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+from ..utils import accepts, ObjectState
+from .. import controllable
+
+
+class Controllable(controllable.Controllable):
+    __slots__ = ()
+
+    @property
+    async def object_state(self):
+        j = await self.remote.command("controllable/object_state/get", {"uid": self.uid})
+        return ObjectState.from_json(j)
+
+    @accepts(ObjectState)
+    async def set_object_state(self, object_state):
+        await self.remote.command("controllable/object_state/set", {
+            "uid": self.uid,
+            "state": object_state.to_json()
+        })
+
+    @property
+    async def current_state(self):
+        j = await self.remote.command("controllable/current_state/get", {"uid": self.uid})
+        return j["state"]
+
+    @property
+    async def control_policy(self):
+        j = await self.remote.command("controllable/control_policy/get", {"uid": self.uid})
+        return j["control_policy"]
+
+    @accepts((str, list))
+    async def control(self, control_policy):
+        await self.remote.command("controllable/control_policy/set", {
+            "uid": self.uid,
+            "control_policy": control_policy,
+        })
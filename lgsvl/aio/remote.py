@@ -0,0 +1,122 @@
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+from collections import OrderedDict
+import itertools
+import websockets
+import asyncio
+import time
+
+from ..codec import negotiate
+from ..remote import Request, ConnectionLost
+from ..stats import Stats
+
+
+class AsyncRemote:
+    """Simulator connection that runs on the caller's event loop
+
+    Same wire protocol as lgsvl.remote.Remote, but commands are coroutines and
+    replies are delivered to asyncio futures without any thread handoff.
+    """
+
+    def __init__(self, host, port, codec=None):
+        self.endpoint = "ws://{}:{}".format(host, port)
+        self.codec_name = codec
+        self.codec = None
+        self.pending = OrderedDict()
+        self.stats = Stats()
+        self.ids = itertools.count()
+        self.websocket = None
+        self.lost = None
+
+    async def connect(self):
+        self.websocket = await websockets.connect(self.endpoint, compression=None)
+        self.codec = await negotiate(self.websocket, self.codec_name)
+        self.outbox = asyncio.Queue()
+        self.sender = asyncio.ensure_future(self.send_loop())
+        self.reader = asyncio.ensure_future(self.process())
+        return self
+
+    async def close(self):
+        await self.websocket.close()
+        await self.reader
+
+    async def process(self):
+        error = ConnectionLost("Connection closed")
+        while True:
+            try:
+                data = await self.websocket.recv()
+            except websockets.exceptions.ConnectionClosed:
+                break
+            except Exception as e:
+                error = ConnectionLost(str(e))
+                break
+            self.dispatch(self.codec.decode(data), len(data))
+
+        self.sender.cancel()
+        self.lose(error)
+
+    async def send_loop(self):
+        while True:
+            data = await self.outbox.get()
+            try:
+                await self.websocket.send(data)
+            except websockets.exceptions.ConnectionClosed:
+                self.lose(ConnectionLost("Connection closed"))
+                return
+
+    def lose(self, error):
+        # Later commands raise right away instead of waiting for a reply
+        # that can no longer arrive
+        if self.lost is None:
+            self.lost = error
+        self.fail_pending(self.lost)
+
+    def dispatch(self, data, size=0):
+        if data.get("id") in self.pending:
+            request = self.pending.pop(data["id"])
+        elif self.pending:
+            _, request = self.pending.popitem(last=False)
+        else:
+            return
+        error = data.get("error")
+        self.stats.received(request.name, size, time.perf_counter() - request.sent, request.size, error)
+        if request.future.cancelled():
+            return
+        if "error" in data:
+            request.future.set_exception(Exception(error))
+        else:
+            request.future.set_result(data.get("result"))
+
+    def fail_pending(self, error):
+        requests = list(self.pending.values())
+        self.pending.clear()
+        for request in requests:
+            self.stats.received(request.name, 0, time.perf_counter() - request.sent, request.size, str(error))
+            if not request.future.done():
+                request.future.set_exception(error)
+
+    @property
+    def in_flight(self):
+        return len(self.pending)
+
+    def submit(self, name, args={}):
+        """Queues a command and returns an asyncio.Future for its result"""
+        if not self.websocket:
+            raise Exception("Not connected")
+        if self.lost is not None:
+            raise self.lost
+
+        uid = next(self.ids)
+        data = self.codec.encode({"id": uid, "command": name, "arguments": args})
+        self.stats.sent(name, len(data))
+        future = asyncio.get_event_loop().create_future()
+        self.pending[uid] = Request(future, name, time.perf_counter(), len(data), data)
+        self.outbox.put_nowait(data)
+        return future
+
+    async def command(self, name, args={}):
+        return await self.submit(name, args)
@@ -0,0 +1,97 @@
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+from ..geometry import Transform
+from ..sensor import GpsData
+from ..utils import accepts
+from .. import sensor
+
+# Sensor fields are parsed by the classes in lgsvl.sensor, only the methods
+# talking to the simulator are replaced with coroutines
+
+
+class Sensor(sensor.Sensor):
+    @property
+    async def transform(self):
+        j = await self.remote.command("sensor/transform/get", {"uid": self.uid})
+        return Transform.from_json(j)
+
+    @property
+    def enabled(self):
+        return self.remote.command("sensor/enabled/get", {"uid": self.uid})
+
+    @accepts(bool)
+    async def set_enabled(self, value):
+        await self.remote.command("sensor/enabled/set", {"uid": self.uid, "enabled": value})
+
+    @staticmethod
+    def create(remote, j):
+        if j["type"] == "camera":
+            return CameraSensor(remote, j)
+        if j["type"] == "lidar":
+            return LidarSensor(remote, j)
+        if j["type"] == "imu":
+            return ImuSensor(remote, j)
+        if j["type"] == "gps":
+            return GpsSensor(remote, j)
+        if j["type"] == "radar":
+            return RadarSensor(remote, j)
+        if j["type"] == "canbus":
+            return CanBusSensor(remote, j)
+        if j["type"] == "recorder":
+            return VideoRecordingSensor(remote, j)
+        if j["type"] == "analysis":
+            return AnalysisSensor(remote, j)
+        raise ValueError("Sensor type '{}' not supported".format(j["type"]))
+
+
+class CameraSensor(Sensor, sensor.CameraSensor):
+    @accepts(str, int, int)
+    async def save(self, path, quality=75, compression=6):
+        success = await self.remote.command("sensor/camera/save", {
+            "uid": self.uid,
+            "path": path,
+            "quality": quality,
+            "compression": compression,
+        })
+        return success
+
+
+class LidarSensor(Sensor, sensor.LidarSensor):
+    @accepts(str)
+    async def save(self, path):
+        success = await self.remote.command("sensor/lidar/save", {
+            "uid": self.uid,
+            "path": path,
+        })
+        return success
+
+
+class ImuSensor(Sensor, sensor.ImuSensor):
+    pass
+
+
+class GpsSensor(Sensor, sensor.GpsSensor):
+    @property
+    async def data(self):
+        j = await self.remote.command("sensor/gps/data", {"uid": self.uid})
+        return GpsData(j["latitude"], j["longitude"], j["northing"], j["easting"], j["altitude"], j["orientation"])
+
+
+class RadarSensor(Sensor, sensor.RadarSensor):
+    pass
+
+
+class CanBusSensor(Sensor, sensor.CanBusSensor):
+    pass
+
+
+class VideoRecordingSensor(Sensor, sensor.VideoRecordingSensor):
+    pass
+
+
+class AnalysisSensor(Sensor, sensor.AnalysisSensor):
+    pass
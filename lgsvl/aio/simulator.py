@@ -0,0 +1,343 @@
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+from .remote import AsyncRemote
+from .agent import Agent
+from .controllable import Controllable
+from ..agent import AgentType, AgentState
+from ..sensor import GpsData
+from ..geometry import Vector, Transform, Spawn, Quaternion
+from ..simulator import Simulator, RaycastHit, WeatherState, env
+from ..utils import accepts, ObjectState
+from .. import events
+
+from datetime import datetime
+import inspect
+import re
+
+
+class AsyncSimulator:
+    """Awaitable counterpart of lgsvl.Simulator
+
+    Read-only properties of Simulator, Agent, Sensor and Controllable are
+    awaitable properties here (``await sim.current_scene``) and property
+    setters become ``set_*`` coroutines (``await agent.set_state(state)``).
+    Use as ``async with AsyncSimulator(host, port) as sim:`` or call
+    ``connect()`` and ``close()`` explicitly.
+    """
+
+    SimulatorCameraState = Simulator.SimulatorCameraState
+
+    @accepts(str, int)
+    def __init__(self, address=env.str("LGSVL__SIMULATOR_HOST", "localhost"), port=env.int("LGSVL__SIMULATOR_PORT", 8181), **options):
+        if port <= 0 or port > 65535:
+            raise ValueError("port value is out of range")
+        self.remote = AsyncRemote(address, port, **options)
+        self.agents = {}
+        self.callbacks = events.Callbacks()
+        self.stopped = False
+
+    async def connect(self):
+        await self.remote.connect()
+        return self
+
+    async def close(self):
+        await self.remote.close()
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @accepts(str, int)
+    async def load(self, scene, seed=None):
+        await self.remote.command("simulator/load_scene", {"scene": scene, "seed": seed})
+        self.agents.clear()
+        self.callbacks.clear()
+
+    @property
+    def version(self):
+        return self.remote.command("simulator/version")
+
+    @property
+    def layers(self):
+        return self.remote.command("simulator/layers/get")
+
+    @property
+    def current_scene(self):
+        return self.remote.command("simulator/current_scene")
+
+    @property
+    def current_scene_id(self):
+        return self.remote.command("simulator/current_scene_id")
+
+    @property
+    def current_frame(self):
+        return self.remote.command("simulator/current_frame")
+
+    @property
+    def current_time(self):
+        return self.remote.command("simulator/current_time")
+
+    @property
+    def available_agents(self):
+        return self.remote.command("simulator/available_agents")
+
+    @property
+    def available_npc_behaviours(self):
+        return self.remote.command("simulator/npc/available_behaviours")
+
+    @accepts(Transform)
+    async def set_sim_camera(self, transform):
+        await self.remote.command("simulator/camera/set", {"transform": transform.to_json()})
+
+    @accepts(Simulator.SimulatorCameraState)
+    async def set_sim_camera_state(self, state):
+        await self.remote.command("simulator/camera/state/set", {"state": state.value})
+
+    def agents_traversed_waypoints(self, fn):
+        self._add_callback(None, "agents_traversed_waypoints", fn)
+
+    def on_event(self, event_type, fn):
+        """Calls fn for the events of event_type from every agent, see Simulator.on_event()"""
+        if event_type not in events.DECODERS:
+            raise ValueError("Unknown event type '{}'".format(event_type))
+        self._add_callback(events.ANY, event_type, fn)
+
+    def on_events(self, fn):
+        """Calls fn(events) once per reply with the list of lgsvl.events objects it carried"""
+        self.callbacks.add_batch(fn)
+
+    async def reset(self):
+        await self.remote.command("simulator/reset")
+        self.agents.clear()
+        self.callbacks.clear()
+
+    def stop(self):
+        self.stopped = True
+
+    @accepts((int, float), (int, float))
+    async def run(self, time_limit=0.0, time_scale=None):
+        await self._process("simulator/run", {"time_limit": time_limit, "time_scale": time_scale})
+
+    def _add_callback(self, agent, name, fn):
+        if fn is not None:
+            self.callbacks.add(agent, name, fn)
+
+    async def _call(self, fn, *args):
+        # Callbacks may be plain functions or coroutine functions
+        result = fn(*args)
+        if inspect.isawaitable(result):
+            await result
+
+    async def _process_events(self, evs):
+        self.stopped = False
+        for fn, args in self.callbacks.calls(evs, self.agents):
+            await self._call(fn, *args)
+            if self.stopped:
+                return
+
+    async def _process(self, cmd, args):
+        j = await self.remote.command(cmd, args)
+        while True:
+            if j is None:
+                return
+            if "events" in j:
+                await self._process_events(j["events"])
+                if self.stopped:
+                    break
+            j = await self.remote.command("simulator/continue")
+
+    @accepts(str, AgentType, (AgentState, type(None)), (Vector, type(None)))
+    async def add_agent(self, name, agent_type, state=None, color=None):
+        if state is None: state = AgentState()
+        if color is None: color = Vector(-1, -1, -1)
+        args = {"name": name, "type": agent_type.value, "state": state.to_json(), "color": color.to_json()}
+        uid = await self.remote.command("simulator/add_agent", args)
+        agent = Agent.create(self, uid, agent_type)
+        agent.name = name
+        self.agents[uid] = agent
+        return agent
+
+    @accepts(Agent)
+    async def remove_agent(self, agent):
+        await self.remote.command("simulator/agent/remove", {"uid": agent.uid})
+        del self.agents[agent.uid]
+        if agent in self.callbacks:
+            del self.callbacks[agent]
+
+    @accepts(AgentType)
+    async def add_random_agents(self, agent_type):
+        args = {"type": agent_type.value}
+        await self.remote.command("simulator/add_random_agents", args)
+
+    def get_agents(self):
+        return list(self.agents.values())
+
+    @property
+    async def weather(self):
+        j = await self.remote.command("environment/weather/get")
+        return WeatherState(j.get("rain", 0), j.get("fog", 0), j.get("wetness", 0), j.get("cloudiness", 0), j.get("damage", 0))
+
+    @accepts(WeatherState)
+    async def set_weather(self, state):
+        await self.remote.command("environment/weather/set", {"rain": state.rain, "fog": state.fog, "wetness": state.wetness, "cloudiness": state.cloudiness, "damage": state.damage})
+
+    @property
+    def time_of_day(self):
+        return self.remote.command("environment/time/get")
+
+    @property
+    async def current_datetime(self):
+        date_time_str = await self.remote.command("simulator/datetime/get")
+        date_time_arr = list(map(int, re.split('[. :]', date_time_str)))
+        return datetime(
+            date_time_arr[2],
+            date_time_arr[1],
+            date_time_arr[0],
+            date_time_arr[3],
+            date_time_arr[4],
+            date_time_arr[5]
+        )
+
+    @accepts((int, float), bool)
+    async def set_time_of_day(self, time, fixed=True):
+        await self.remote.command("environment/time/set", {"time": time, "fixed": fixed})
+
+    @accepts(datetime, bool)
+    async def set_date_time(self, date_time, fixed=True):
+        date_time = date_time.__str__()
+        await self.remote.command("environment/datetime/set", {"datetime": date_time, "fixed": fixed})
+
+    async def get_spawn(self):
+        spawns = await self.remote.command("map/spawn/get")
+        return [Spawn.from_json(spawn) for spawn in spawns]
+
+    @accepts((Transform, Spawn))
+    async def map_to_gps(self, transform):
+        j = await self.remote.command("map/to_gps", {"transform": transform.to_json()})
+        return GpsData(j["latitude"], j["longitude"], j["northing"], j["easting"], j["altitude"], j["orientation"])
+
+    async def map_from_gps(self, latitude=None, longitude=None, northing=None, easting=None, altitude=None, orientation=None):
+        coord = {
+            "latitude": latitude,
+            "longitude": longitude,
+            "northing": northing,
+            "easting": easting,
+            "altitude": altitude,
+            "orientation": orientation
+        }
+        return (await self.map_from_gps_batch([coord]))[0]
+
+    async def map_from_gps_batch(self, coords):
+        # Validation is shared with the synchronous client
+        jarr = Simulator._gps_coords_to_json(coords)
+        jarr = await self.remote.command("map/from_gps", jarr)
+        return [Transform.from_json(j) for j in jarr]
+
+    @accepts(Vector)
+    async def map_point_on_lane(self, point):
+        j = await self.remote.command("map/point_on_lane", {"point": point.to_json()})
+        return Transform.from_json(j)
+
+    @accepts(Vector, Quaternion)
+    async def map_from_nav(self, position, orientation):
+        res = await self.remote.command(
+            "map/from_nav",
+            {
+                "position": position.to_json(),
+                "orientation": orientation.to_json()
+            }
+        )
+        return Transform.from_json(res)
+
+    @accepts(Transform, Vector)
+    async def set_nav_origin(self, transform, offset=Vector()):
+        await self.remote.command(
+            "navigation/set_origin",
+            {
+                "transform": transform.to_json(),
+                "offset": offset.to_json(),
+            }
+        )
+
+    async def get_nav_origin(self):
+        res = await self.remote.command("navigation/get_origin")
+        nav_origin = None
+        if res:
+            nav_origin = {
+                "transform": Transform.from_json(res),
+                "offset": res["offset"]
+            }
+        return nav_origin
+
+    @accepts(Vector, Vector, int, float)
+    async def raycast(self, origin, direction, layer_mask=-1, max_distance=float("inf")):
+        hit = await self.remote.command("simulator/raycast", [{
+            "origin": origin.to_json(),
+            "direction": direction.to_json(),
+            "layer_mask": layer_mask,
+            "max_distance": max_distance
+        }])
+        if hit[0] is None:
+            return None
+        return RaycastHit(hit[0]["distance"], Vector.from_json(hit[0]["point"]), Vector.from_json(hit[0]["normal"]))
+
+    async def raycast_batch(self, args):
+        jarr = []
+        for arg in args:
+            jarr.append({
+                "origin": arg["origin"].to_json(),
+                "direction": arg["direction"].to_json(),
+                "layer_mask": arg["layer_mask"],
+                "max_distance": arg["max_distance"]
+            })
+
+        hits = await self.remote.command("simulator/raycast", jarr)
+        results = []
+        for hit in hits:
+            if hit is None:
+                results.append(None)
+            else:
+                results.append(RaycastHit(hit["distance"], Vector.from_json(hit["point"]), Vector.from_json(hit["normal"])))
+
+        return results
+
+    @accepts(str, (ObjectState, type(None)))
+    async def controllable_add(self, name, object_state=None):
+        if object_state is None: object_state = ObjectState()
+        args = {"name": name, "state": object_state.to_json()}
+        j = await self.remote.command("simulator/controllable_add", args)
+        controllable = Controllable(self.remote, j)
+        controllable.name = name
+        return controllable
+
+    @accepts(Controllable)
+    async def controllable_remove(self, controllable):
+        await self.remote.command("simulator/controllable_remove", {"uid": controllable.uid})
+
+    @accepts(str)
+    async def get_controllables(self, control_type=None):
+        j = await self.remote.command("controllable/get/all", {
+            "type": control_type,
+        })
+        return [Controllable(self.remote, controllable) for controllable in j]
+
+    @accepts(str)
+    async def get_controllable_by_uid(self, uid):
+        j = await self.remote.command("controllable/get", {
+            "uid": uid,
+        })
+        return Controllable(self.remote, j)
+
+    @accepts(Vector, str)
+    async def get_controllable(self, position, control_type=None):
+        j = await self.remote.command("controllable/get", {
+            "position": position.to_json(),
+            "type": control_type,
+        })
+        return Controllable(self.remote, j)
@@ -0,0 +1,102 @@
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+import json
+import math
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class JsonCodec:
+    name = "json"
+
+    def encode(self, obj):
+        return json.dumps(obj)
+
+    def decode(self, data):
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    # Same wire format as JsonCodec, encoded and decoded by orjson
+
+    def encode(self, obj):
+        data = orjson.dumps(obj)
+        # orjson writes non-finite floats (raycast max_distance) as null,
+        # only messages that contain a null at all need to be checked
+        if b"null" in data and has_non_finite(obj):
+            return json.dumps(obj)
+        return data.decode("utf-8")
+
+    def decode(self, data):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return json.loads(data)
+
+
+class MsgpackCodec:
+    name = "msgpack"
+
+    def encode(self, obj):
+        return msgpack.packb(obj, use_bin_type=True)
+
+    def decode(self, data):
+        return msgpack.unpackb(data, raw=False)
+
+
+def has_non_finite(obj):
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(has_non_finite(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(has_non_finite(v) for v in obj)
+    return False
+
+
+def json_codec():
+    """Returns the fastest available codec for the JSON wire format"""
+    return OrjsonCodec() if orjson is not None else JsonCodec()
+
+
+def get_codec(name):
+    if name == "json":
+        return json_codec()
+    if name == "msgpack":
+        if msgpack is None:
+            raise ImportError("msgpack codec requested but the msgpack package is not installed")
+        return MsgpackCodec()
+    raise ValueError("Codec '{}' not supported".format(name))
+
+
+async def negotiate(websocket, codec):
+    """Agrees on a wire codec with the server
+
+    JSON is always understood and needs no negotiation. For any other codec
+    a "connection/codec" command is sent as JSON; if the server does not
+    answer with the same codec name, the connection keeps using JSON.
+    """
+    fallback = json_codec()
+    if codec is None or codec == "json":
+        return fallback
+    preferred = get_codec(codec)
+    await websocket.send(fallback.encode({
+        "command": "connection/codec",
+        "arguments": {"codecs": [preferred.name, fallback.name]},
+    }))
+    reply = fallback.decode(await websocket.recv())
+    if reply.get("result") == preferred.name:
+        return preferred
+    return fallback
@@ -9,6 +9,8 @@ from .utils import accepts, ObjectState
 
 
 class Controllable:
+    __slots__ = ("remote", "uid", "type", "transform", "valid_actions", "default_control_policy", "name")
+
     def __init__(self, remote, j):
         self.remote = remote
         self.uid = j["uid"]
@@ -19,8 +21,7 @@ class Controllable:
 
     @property
     def object_state(self):
-        j = self.remote.command("controllable/object_state/get", {"uid": self.uid})
-        return ObjectState.from_json(j)
+        return self.remote.command("controllable/object_state/get", {"uid": self.uid}, ObjectState.from_json)
 
     @object_state.setter
     @accepts(ObjectState)
@@ -32,17 +33,15 @@ class Controllable:
 
     @property
     def current_state(self):
-        j = self.remote.command("controllable/current_state/get", {"uid": self.uid})
-        return j["state"]
+        return self.remote.command("controllable/current_state/get", {"uid": self.uid}, lambda j: j["state"])
 
     @property
     def control_policy(self):
-        j = self.remote.command("controllable/control_policy/get", {"uid": self.uid})
-        return j["control_policy"]
+        return self.remote.command("controllable/control_policy/get", {"uid": self.uid}, lambda j: j["control_policy"])
 
     @accepts((str, list))
     def control(self, control_policy):
-        self.remote.command("controllable/control_policy/set", {
+        self.remote.send("controllable/control_policy/set", {
             "uid": self.uid,
             "control_policy": control_policy,
         })
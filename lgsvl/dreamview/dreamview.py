@@ -36,6 +36,20 @@ class Connection:
         self.ws = create_connection(self.url)
         self.gps_offset = lgsvl.Vector()
 
+    def map_to_gps(self, transform):
+        # Converts locally once the scene's geo reference is known, falling
+        # back to the simulator on maps it cannot describe
+        try:
+            return self.sim.map_to_gps_batch([transform], local=True)[0]
+        except lgsvl.geo.GeoReferenceError:
+            return self.sim.map_to_gps(transform)
+
+    def map_from_gps(self, **coords):
+        try:
+            return self.sim.map_from_gps_batch([coords], local=True)[0]
+        except lgsvl.geo.GeoReferenceError:
+            return self.sim.map_from_gps(**coords)
+
     def set_destination(self, x_long_east, z_lat_north, y=0, coord_type=CoordType.Unity):
         """
         This function can accept a variety of Coordinate systems
@@ -54,7 +68,7 @@ class Connection:
         z_lat_north = Northing
         """
         current_pos = self.ego.state.transform
-        current_gps = self.sim.map_to_gps(current_pos)
+        current_gps = self.map_to_gps(current_pos)
         heading = math.radians(current_gps.orientation)
 
         # Start position should be the position of the GPS
@@ -70,7 +84,7 @@ class Connection:
             transform = lgsvl.Transform(
                 lgsvl.Vector(x_long_east, y, z_lat_north), lgsvl.Vector(0, 0, 0)
             )
-            gps = self.sim.map_to_gps(transform)
+            gps = self.map_to_gps(transform)
             dest_x = gps.easting
             dest_y = gps.northing
 
@@ -79,8 +93,8 @@ class Connection:
             dest_y = z_lat_north
 
         elif coord_type == CoordType.Latitude:
-            transform = self.sim.map_from_gps(longitude=x_long_east, latitude=z_lat_north)
-            gps = self.sim.map_to_gps(transform)
+            transform = self.map_from_gps(longitude=x_long_east, latitude=z_lat_north)
+            gps = self.map_to_gps(transform)
             dest_x = gps.easting
             dest_y = gps.northing
 
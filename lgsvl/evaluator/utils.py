@@ -13,9 +13,8 @@ class TestException(Exception):
 
 
 def right_lane_check(simulator, ego_transform):
-    egoLane = simulator.map_point_on_lane(ego_transform.position)
     right = lgsvl.utils.transform_to_right(ego_transform)
-    rightLane = simulator.map_point_on_lane(ego_transform.position + 3.6 * right)
+    egoLane, rightLane = simulator.map_points_on_lane([ego_transform.position, ego_transform.position + 3.6 * right])
 
     return almost_equal(egoLane.position.x, rightLane.position.x) and \
         almost_equal(egoLane.position.y, rightLane.position.y) and \
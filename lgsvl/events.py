@@ -0,0 +1,160 @@
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+from .geometry import Vector
+
+from collections import namedtuple
+
+CollisionEvent = namedtuple("CollisionEvent", "agent other contact")
+WaypointReachedEvent = namedtuple("WaypointReachedEvent", "agent index")
+StopLineEvent = namedtuple("StopLineEvent", "agent")
+LaneChangeEvent = namedtuple("LaneChangeEvent", "agent")
+DestinationReachedEvent = namedtuple("DestinationReachedEvent", "agent")
+CustomEvent = namedtuple("CustomEvent", "agent kind context")
+AgentsTraversedWaypointsEvent = namedtuple("AgentsTraversedWaypointsEvent", "")
+
+
+def _collision(ev, agents):
+    contact = ev.get("contact")
+    return (
+        agents.get(ev.get("agent")),
+        agents.get(ev.get("other")),
+        Vector.from_json(contact) if contact is not None else None,
+    )
+
+
+def _agent(ev, agents):
+    return (agents.get(ev.get("agent")),)
+
+
+# One decoder per event type, returning the arguments of the matching
+# callback, which are also the fields of the typed event in TYPES
+DECODERS = {
+    "collision": _collision,
+    "waypoint_reached": lambda ev, agents: (agents.get(ev.get("agent")), ev["index"]),
+    "stop_line": _agent,
+    "lane_change": _agent,
+    "destination_reached": _agent,
+    "custom": lambda ev, agents: (agents.get(ev.get("agent")), ev["kind"], ev["context"]),
+    "agents_traversed_waypoints": lambda ev, agents: (),
+}
+
+TYPES = {
+    "collision": CollisionEvent,
+    "waypoint_reached": WaypointReachedEvent,
+    "stop_line": StopLineEvent,
+    "lane_change": LaneChangeEvent,
+    "destination_reached": DestinationReachedEvent,
+    "custom": CustomEvent,
+    "agents_traversed_waypoints": AgentsTraversedWaypointsEvent,
+}
+
+# Callbacks key for handlers of every agent
+ANY = object()
+
+
+def from_json(ev, agents):
+    """Builds the typed event for a JSON event, resolving uids through the agents dict
+
+    Agents unknown to the client, such as the ones added by
+    add_random_agents(), are None. Event types without a decoder are
+    returned as the JSON dict.
+    """
+    event_type = ev["type"]
+    if event_type not in DECODERS:
+        return ev
+    return TYPES[event_type]._make(DECODERS[event_type](ev, agents))
+
+
+class Callbacks(dict):
+    """Event callbacks by agent and event type
+
+    Keys are agents, None for simulator wide events and ANY for handlers of
+    every agent; values map event types to sets of callbacks. Batch handlers
+    receive the decoded events of a whole reply. The dispatch table is
+    compiled on first use after a change, so processing an event costs one
+    lookup by type and one by uid, and events nobody listens to are never
+    decoded.
+    """
+
+    def __init__(self):
+        dict.__init__(self)
+        self.batch = []
+        self.compiled = None
+
+    def add(self, agent, name, fn):
+        self.setdefault(agent, {}).setdefault(name, set()).add(fn)
+        self.compiled = None
+
+    def add_batch(self, fn):
+        self.batch.append(fn)
+
+    def __delitem__(self, agent):
+        dict.__delitem__(self, agent)
+        self.compiled = None
+
+    def clear(self):
+        dict.clear(self)
+        del self.batch[:]
+        self.compiled = None
+
+    def table(self):
+        # {event type: (decoder, {uid: callbacks}, callbacks for other uids)}
+        if self.compiled is None:
+            everyone = {}
+            for name, fns in self.get(ANY, {}).items():
+                everyone[name] = tuple(fns)
+            by_type = {}
+            for agent, callbacks in self.items():
+                if agent is ANY:
+                    continue
+                uid = None if agent is None else agent.uid
+                for name, fns in callbacks.items():
+                    by_type.setdefault(name, {})[uid] = tuple(fns) + everyone.get(name, ())
+            self.compiled = {}
+            for name in set(by_type) | set(everyone):
+                if name in DECODERS:
+                    self.compiled[name] = (DECODERS[name], by_type.get(name, {}), everyone.get(name, ()))
+        return self.compiled
+
+    def calls(self, events, agents):
+        """Yields (callback, arguments) for the JSON events of one reply, in order
+
+        Per event callbacks get their arguments as a tuple, batch handlers
+        the list of typed events. The table is looked up again after
+        callbacks ran, so a callback that removes an agent or its callbacks
+        also stops the calls for the later events of the same reply.
+        """
+        table = self.table()
+        if self.batch:
+            # Typed events are tuples of the callback arguments, so they are
+            # decoded once for both kinds of handlers
+            decoded = [from_json(ev, agents) for ev in events]
+            for fn in list(self.batch):
+                yield fn, (decoded,)
+            if self.compiled is not table:
+                table = self.table()
+            for ev, event in zip(events, decoded):
+                entry = table.get(ev["type"])
+                if entry is not None:
+                    fns = entry[1].get(ev.get("agent"), entry[2])
+                    for fn in fns:
+                        yield fn, event
+                    if fns and self.compiled is not table:
+                        table = self.table()
+            return
+        for ev in events:
+            entry = table.get(ev["type"])
+            if entry is None:
+                continue
+            decoder, by_uid, everyone = entry
+            fns = by_uid.get(ev.get("agent"), everyone)
+            if fns:
+                args = decoder(ev, agents)
+                for fn in fns:
+                    yield fn, args
+                if self.compiled is not table:
+                    table = self.table()
@@ -0,0 +1,252 @@
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+import numpy
+
+# WGS84 ellipsoid and UTM projection constants
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_E2 = WGS84_F * (2 - WGS84_F)
+WGS84_EP2 = WGS84_E2 / (1 - WGS84_E2)
+UTM_K0 = 0.9996
+UTM_FALSE_EASTING = 500000.0
+UTM_FALSE_NORTHING = 10000000.0
+
+
+def utm_zone(longitude):
+    return int((longitude + 180) // 6) + 1
+
+
+def _meridian_arc(lat):
+    e2 = WGS84_E2
+    e4 = e2 * e2
+    e6 = e4 * e2
+    return WGS84_A * (
+        (1 - e2 / 4 - 3 * e4 / 64 - 5 * e6 / 256) * lat
+        - (3 * e2 / 8 + 3 * e4 / 32 + 45 * e6 / 1024) * numpy.sin(2 * lat)
+        + (15 * e4 / 256 + 45 * e6 / 1024) * numpy.sin(4 * lat)
+        - (35 * e6 / 3072) * numpy.sin(6 * lat)
+    )
+
+
+def latlon_to_utm(latitude, longitude, zone, northern=True):
+    """Projects WGS84 latitude and longitude in degrees to UTM (northing, easting)
+
+    Works element-wise on scalars or NumPy arrays; the zone is fixed so that
+    points near a zone border stay in the map's own zone.
+    """
+    lat = numpy.radians(latitude)
+    dlon = numpy.radians(numpy.asarray(longitude) - ((zone - 1) * 6 - 180 + 3))
+
+    sin_lat = numpy.sin(lat)
+    cos_lat = numpy.cos(lat)
+    n = WGS84_A / numpy.sqrt(1 - WGS84_E2 * sin_lat * sin_lat)
+    t = numpy.tan(lat) ** 2
+    c = WGS84_EP2 * cos_lat * cos_lat
+    a = cos_lat * dlon
+
+    easting = UTM_K0 * n * (
+        a
+        + (1 - t + c) * a ** 3 / 6
+        + (5 - 18 * t + t * t + 72 * c - 58 * WGS84_EP2) * a ** 5 / 120
+    ) + UTM_FALSE_EASTING
+    northing = UTM_K0 * (
+        _meridian_arc(lat)
+        + n * numpy.tan(lat) * (
+            a * a / 2
+            + (5 - t + 9 * c + 4 * c * c) * a ** 4 / 24
+            + (61 - 58 * t + t * t + 600 * c - 330 * WGS84_EP2) * a ** 6 / 720
+        )
+    )
+    if not northern:
+        northing = northing + UTM_FALSE_NORTHING
+    return northing, easting
+
+
+def utm_to_latlon(northing, easting, zone, northern=True):
+    """Inverse of latlon_to_utm, returns (latitude, longitude) in degrees"""
+    e2 = WGS84_E2
+    e4 = e2 * e2
+    e6 = e4 * e2
+    e1 = (1 - numpy.sqrt(1 - e2)) / (1 + numpy.sqrt(1 - e2))
+
+    y = numpy.asarray(northing, dtype=float)
+    if not northern:
+        y = y - UTM_FALSE_NORTHING
+    mu = y / UTM_K0 / (WGS84_A * (1 - e2 / 4 - 3 * e4 / 64 - 5 * e6 / 256))
+    lat1 = (
+        mu
+        + (3 * e1 / 2 - 27 * e1 ** 3 / 32) * numpy.sin(2 * mu)
+        + (21 * e1 ** 2 / 16 - 55 * e1 ** 4 / 32) * numpy.sin(4 * mu)
+        + (151 * e1 ** 3 / 96) * numpy.sin(6 * mu)
+        + (1097 * e1 ** 4 / 512) * numpy.sin(8 * mu)
+    )
+
+    sin_lat1 = numpy.sin(lat1)
+    cos_lat1 = numpy.cos(lat1)
+    n1 = WGS84_A / numpy.sqrt(1 - e2 * sin_lat1 * sin_lat1)
+    t1 = numpy.tan(lat1) ** 2
+    c1 = WGS84_EP2 * cos_lat1 * cos_lat1
+    r1 = WGS84_A * (1 - e2) / (1 - e2 * sin_lat1 * sin_lat1) ** 1.5
+    d = (numpy.asarray(easting, dtype=float) - UTM_FALSE_EASTING) / (n1 * UTM_K0)
+
+    lat = lat1 - (n1 * numpy.tan(lat1) / r1) * (
+        d * d / 2
+        - (5 + 3 * t1 + 10 * c1 - 4 * c1 * c1 - 9 * WGS84_EP2) * d ** 4 / 24
+        + (61 + 90 * t1 + 298 * c1 + 45 * t1 * t1 - 252 * WGS84_EP2 - 3 * c1 * c1) * d ** 6 / 720
+    )
+    lon = (
+        d
+        - (1 + 2 * t1 + c1) * d ** 3 / 6
+        + (5 - 2 * c1 + 28 * t1 - 3 * c1 * c1 + 8 * WGS84_EP2 + 24 * t1 * t1) * d ** 5 / 120
+    ) / cos_lat1
+    return numpy.degrees(lat), numpy.degrees(lon) + ((zone - 1) * 6 - 180 + 3)
+
+
+class GeoReferenceError(Exception):
+    pass
+
+
+# Map points converted with map/to_gps to fit a GeoReference: (x, y, z, yaw)
+CALIBRATION_POINTS = (
+    (0.0, 0.0, 0.0, 0.0),
+    (1000.0, 0.0, 0.0, 0.0),
+    (0.0, 0.0, 1000.0, 0.0),
+    (0.0, 100.0, 0.0, 90.0),
+)
+
+# Points the fitted reference is checked against
+VALIDATION_POINTS = (
+    (-700.0, 50.0, 300.0, 30.0),
+    (400.0, -20.0, -900.0, 200.0),
+    (2500.0, 5.0, 1800.0, 315.0),
+)
+
+# Meters per degree of latitude, to express latitude and longitude errors in meters
+METERS_PER_DEGREE = 111320.0
+
+
+class GeoReference:
+    """Converts between map coordinates and GPS locally, vectorized over NumPy arrays
+
+    The map plane maps to UTM through an affine transform of (x, z),
+    altitude and GPS orientation are linear in y and in the yaw. A reference
+    is fitted by calibrate() against map/to_gps replies, see
+    Simulator.geo_reference().
+    """
+
+    def __init__(self, matrix, zone, northern=True, altitude=(1.0, 0.0), orientation=(1.0, 0.0)):
+        # [easting, northing] = matrix @ [x, z, 1]
+        self.matrix = numpy.asarray(matrix, dtype=float)
+        self.inverse = numpy.linalg.inv(self.matrix[:, :2])
+        self.zone = zone
+        self.northern = northern
+        self.altitude = altitude
+        self.orientation = orientation
+        self.error = None
+
+    @staticmethod
+    def calibrate(samples):
+        """Fits a reference to [((x, y, z, yaw), gps json)] samples, see CALIBRATION_POINTS"""
+        points = numpy.array([point for point, _ in samples], dtype=float)
+        gps = [j for _, j in samples]
+        easting = numpy.array([j["easting"] for j in gps])
+        northing = numpy.array([j["northing"] for j in gps])
+
+        plane = numpy.column_stack([points[:, 0], points[:, 2], numpy.ones(len(points))])
+        matrix = numpy.linalg.lstsq(plane, numpy.column_stack([easting, northing]), rcond=None)[0].T
+
+        altitude_fit = numpy.polyfit(points[:, 1], [j["altitude"] for j in gps], 1)
+        turned = points[:, 3] != points[0, 3]
+        if not turned.any():
+            raise GeoReferenceError("Calibration needs samples with different yaw")
+        i = int(numpy.argmax(turned))
+        delta = ((gps[i]["orientation"] - gps[0]["orientation"]) + 180) % 360 - 180
+        sign = 1.0 if delta * (points[i, 3] - points[0, 3]) > 0 else -1.0
+        offset = (gps[0]["orientation"] - sign * points[0, 3]) % 360
+
+        latitude, longitude = gps[0]["latitude"], gps[0]["longitude"]
+        northern = latitude >= 0
+        best = None
+        for zone in (utm_zone(longitude) - 1, utm_zone(longitude), utm_zone(longitude) + 1):
+            n, e = latlon_to_utm(latitude, longitude, zone, northern)
+            error = abs(float(e) - easting[0]) + abs(float(n) - northing[0])
+            if best is None or error < best[0]:
+                best = (error, zone)
+        return GeoReference(
+            matrix, best[1], northern,
+            (float(altitude_fit[0]), float(altitude_fit[1])),
+            (sign, offset),
+        )
+
+    def validate(self, samples, tolerance):
+        """Sets and returns the worst error in meters against [((x, y, z, yaw), gps json)]
+
+        Raises GeoReferenceError when it exceeds tolerance.
+        """
+        points = numpy.array([point for point, _ in samples], dtype=float)
+        local = self.to_gps(points[:, :3], points[:, 3])
+        errors = [0.0]
+        for i, (_, j) in enumerate(samples):
+            errors.append(abs(local["northing"][i] - j["northing"]))
+            errors.append(abs(local["easting"][i] - j["easting"]))
+            errors.append(abs(local["altitude"][i] - j["altitude"]))
+            errors.append(abs(local["latitude"][i] - j["latitude"]) * METERS_PER_DEGREE)
+            errors.append(abs(local["longitude"][i] - j["longitude"]) * METERS_PER_DEGREE * numpy.cos(numpy.radians(j["latitude"])))
+            if abs((local["orientation"][i] - j["orientation"] + 180) % 360 - 180) > 0.01:
+                raise GeoReferenceError("Orientation differs from the simulator by {:.3f} degrees".format(
+                    abs((local["orientation"][i] - j["orientation"] + 180) % 360 - 180)))
+        self.error = float(max(errors))
+        if self.error > tolerance:
+            raise GeoReferenceError("Local conversion differs from the simulator by {:.3f} m".format(self.error))
+        return self.error
+
+    def to_utm(self, positions):
+        """Returns (northing, easting) of an (..., 3) array of map positions"""
+        positions = numpy.asarray(positions, dtype=float)
+        m = self.matrix
+        easting = m[0, 0] * positions[..., 0] + m[0, 1] * positions[..., 2] + m[0, 2]
+        northing = m[1, 0] * positions[..., 0] + m[1, 1] * positions[..., 2] + m[1, 2]
+        return northing, easting
+
+    def to_gps(self, positions, yaw=None):
+        """Converts an (..., 3) array of map positions and yaw angles in degrees
+
+        Returns a dict of arrays with the fields of lgsvl.sensor.GpsData.
+        """
+        positions = numpy.asarray(positions, dtype=float)
+        northing, easting = self.to_utm(positions)
+        latitude, longitude = utm_to_latlon(northing, easting, self.zone, self.northern)
+        yaw = numpy.zeros(positions.shape[:-1]) if yaw is None else numpy.asarray(yaw, dtype=float)
+        return {
+            "latitude": latitude,
+            "longitude": longitude,
+            "northing": northing,
+            "easting": easting,
+            "altitude": self.altitude[0] * positions[..., 1] + self.altitude[1],
+            "orientation": (self.orientation[0] * yaw + self.orientation[1]) % 360,
+        }
+
+    def from_gps(self, latitude=None, longitude=None, northing=None, easting=None, altitude=None, orientation=None):
+        """Converts arrays of GPS coordinates to map positions
+
+        Either latitude and longitude or northing and easting are required.
+        Returns an (..., 3) array of positions, with y from altitude or 0,
+        and the yaw angles in degrees, from orientation or 0.
+        """
+        if latitude is not None and longitude is not None:
+            northing, easting = latlon_to_utm(latitude, longitude, self.zone, self.northern)
+        elif northing is None or easting is None:
+            raise ValueError("Either latitude and longitude or northing and easting should be specified")
+        northing = numpy.asarray(northing, dtype=float)
+        easting = numpy.asarray(easting, dtype=float)
+        de = easting - self.matrix[0, 2]
+        dn = northing - self.matrix[1, 2]
+        x = self.inverse[0, 0] * de + self.inverse[0, 1] * dn
+        z = self.inverse[1, 0] * de + self.inverse[1, 1] * dn
+        y = numpy.zeros_like(x) if altitude is None else (numpy.asarray(altitude, dtype=float) - self.altitude[1]) / self.altitude[0]
+        yaw = numpy.zeros_like(x) if orientation is None else (numpy.asarray(orientation, dtype=float) - self.orientation[1]) * self.orientation[0]
+        return numpy.stack([x, y, z], axis=-1), yaw % 360
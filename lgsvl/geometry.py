@@ -5,9 +5,32 @@
 #
 
 from math import sqrt
+import numpy
 
 
-class Vector:
+class Slotted:
+    """Base of the small value classes, which keep their fields in __slots__
+
+    Instances carry no __dict__. They pickle as a dict of their fields, as
+    they did when they had one, so older pickles still load.
+    """
+
+    __slots__ = ()
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for cls in type(self).__mro__ for name in getattr(cls, "__slots__", ())}
+
+    def __setstate__(self, state):
+        if isinstance(state, tuple):
+            # (__dict__, slots) as pickled by the default protocol
+            state = dict(state[0] or {}, **(state[1] or {}))
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+class Vector(Slotted):
+    __slots__ = ("x", "y", "z")
+
     def __init__(self, x=0.0, y=0.0, z=0.0):
         self.x = x
         self.y = y
@@ -28,6 +51,9 @@ class Vector:
             return Vector(self.x + v.x, self.y + v.y, self.z + v.z)
         elif isinstance(v, (int, float)):
             return Vector(self.x + v, self.y + v, self.z + v)
+        elif isinstance(v, VectorArray):
+            # Handled row by row by VectorArray.__radd__
+            return NotImplemented
         else:
             raise TypeError("Vector addition only allowed between Vectors and numbers")
 
@@ -36,6 +62,8 @@ class Vector:
             return Vector(self.x - v.x, self.y - v.y, self.z - v.z)
         elif isinstance(v, (int, float)):
             return Vector(self.x - v, self.y - v, self.z - v)
+        elif isinstance(v, VectorArray):
+            return NotImplemented
         else:
             raise TypeError("Vector subtraction only allowed between Vectors and numbers")
 
@@ -44,6 +72,8 @@ class Vector:
             return Vector(self.x * v.x, self.y * v.y, self.z * v.z)
         elif isinstance(v, (int, float)):
             return Vector(self.x * v, self.y * v, self.z * v)
+        elif isinstance(v, VectorArray):
+            return NotImplemented
         else:
             raise TypeError("Vector multiplication only allowed between Vectors and numbers")
 
@@ -57,7 +87,136 @@ class Vector:
         return sqrt(self.x**2 + self.y**2 + self.z**2)
 
 
-class BoundingBox:
+class VectorArray:
+    """N vectors stored in one contiguous (N, 3) float64 NumPy array
+
+    Arithmetic, norms and products work on all rows at once. Operands can be
+    another VectorArray of the same length, a Vector, a number or anything
+    NumPy broadcasts against (N, 3); scale rows with an (N, 1) array.
+    Wrapping a float64 array, basic slicing and the x, y and z properties
+    do not copy, so writes through them change the underlying data.
+    """
+
+    def __init__(self, data=None):
+        if data is None:
+            data = numpy.zeros((0, 3))
+        data = numpy.asarray(data, dtype=float)
+        if data.ndim != 2 or data.shape[1] != 3:
+            raise ValueError("VectorArray needs an (N, 3) array, got shape {}".format(data.shape))
+        self.data = data
+
+    @staticmethod
+    def zeros(count):
+        return VectorArray(numpy.zeros((count, 3)))
+
+    @staticmethod
+    def from_vectors(vectors):
+        return VectorArray(numpy.array([(v.x, v.y, v.z) for v in vectors], dtype=float).reshape(-1, 3))
+
+    @staticmethod
+    def from_json(j):
+        return VectorArray(numpy.array([(v["x"], v["y"], v["z"]) for v in j], dtype=float).reshape(-1, 3))
+
+    def to_vectors(self):
+        return [Vector(x, y, z) for x, y, z in self.data.tolist()]
+
+    def to_json(self):
+        return [{"x": x, "y": y, "z": z} for x, y, z in self.data.tolist()]
+
+    def __repr__(self):
+        return "VectorArray({})".format(self.data.tolist() if len(self) <= 6 else "{} vectors".format(len(self)))
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        return iter(self.to_vectors())
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, numpy.integer)):
+            return Vector(*self.data[index].tolist())
+        return VectorArray(self.data[index])
+
+    def __setitem__(self, index, value):
+        self.data[index] = _operand(value)
+
+    def __array__(self, dtype=None, copy=None):
+        return _array(self.data, dtype, copy)
+
+    @property
+    def x(self):
+        return self.data[:, 0]
+
+    @property
+    def y(self):
+        return self.data[:, 1]
+
+    @property
+    def z(self):
+        return self.data[:, 2]
+
+    def __add__(self, v):
+        return VectorArray(self.data + _operand(v))
+
+    __radd__ = __add__
+
+    def __sub__(self, v):
+        return VectorArray(self.data - _operand(v))
+
+    def __rsub__(self, v):
+        return VectorArray(_operand(v) - self.data)
+
+    def __mul__(self, v):
+        return VectorArray(self.data * _operand(v))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, v):
+        return VectorArray(self.data / _operand(v))
+
+    def __neg__(self):
+        return VectorArray(-self.data)
+
+    def magnitude(self):
+        """Returns the (N,) array of vector lengths"""
+        return numpy.sqrt(numpy.einsum("ij,ij->i", self.data, self.data))
+
+    def normalized(self):
+        """Returns unit vectors, rows of zero length stay zero"""
+        length = self.magnitude()[:, None]
+        return VectorArray(numpy.divide(self.data, length, out=numpy.zeros_like(self.data), where=length > 0))
+
+    def dot(self, v):
+        """Returns the (N,) array of row-wise dot products"""
+        return numpy.einsum("ij,ij->i", self.data, numpy.broadcast_to(_operand(v), self.data.shape))
+
+    def cross(self, v):
+        return VectorArray(numpy.cross(self.data, _operand(v)))
+
+
+def _operand(v):
+    # Turns the right hand side of a VectorArray operation into something
+    # NumPy broadcasts against (N, 3)
+    if isinstance(v, VectorArray):
+        return v.data
+    if isinstance(v, Vector):
+        return numpy.array((v.x, v.y, v.z))
+    return v
+
+
+def _array(data, dtype, copy):
+    # __array__ of the array types; copy=False refuses to copy and None
+    # copies only when dtype asks for it, as in NumPy 2
+    if dtype is not None and numpy.dtype(dtype) != data.dtype:
+        if copy is False:
+            raise ValueError("Converting to {} needs a copy".format(numpy.dtype(dtype)))
+        return data.astype(dtype)
+    return data.copy() if copy else data
+
+
+class BoundingBox(Slotted):
+    __slots__ = ("min", "max")
+
     def __init__(self, min, max):
         self.min = min
         self.max = max
@@ -89,7 +248,9 @@ class BoundingBox:
         )
 
 
-class Transform:
+class Transform(Slotted):
+    __slots__ = ("position", "rotation")
+
     def __init__(self, position=None, rotation=None):
         if position is None: position = Vector()
         if rotation is None: rotation = Vector()
@@ -107,7 +268,101 @@ class Transform:
         return "Transform(position={}, rotation={})".format(self.position, self.rotation)
 
 
-class Spawn:
+class TransformArray:
+    """N transforms stored in one contiguous (N, 2, 3) float64 NumPy array
+
+    data[:, 0] holds positions and data[:, 1] rotations; position and
+    rotation are VectorArray views of them, and assigning to them writes
+    into data:
+
+        transforms.position += lgsvl.Vector(0, 0.5, 0)
+
+    Like VectorArray, wrapping a float64 array and basic slicing do not copy.
+    """
+
+    def __init__(self, data=None):
+        if data is None:
+            data = numpy.zeros((0, 2, 3))
+        data = numpy.asarray(data, dtype=float)
+        if data.ndim != 3 or data.shape[1:] != (2, 3):
+            raise ValueError("TransformArray needs an (N, 2, 3) array, got shape {}".format(data.shape))
+        self.data = data
+
+    @staticmethod
+    def zeros(count):
+        return TransformArray(numpy.zeros((count, 2, 3)))
+
+    @staticmethod
+    def from_arrays(position, rotation=None):
+        position = numpy.asarray(position, dtype=float)
+        data = numpy.zeros((len(position), 2, 3))
+        data[:, 0] = position
+        if rotation is not None:
+            data[:, 1] = numpy.asarray(rotation, dtype=float)
+        return TransformArray(data)
+
+    @staticmethod
+    def from_transforms(transforms):
+        return TransformArray(numpy.array([
+            ((t.position.x, t.position.y, t.position.z), (t.rotation.x, t.rotation.y, t.rotation.z))
+            for t in transforms
+        ], dtype=float).reshape(-1, 2, 3))
+
+    @staticmethod
+    def from_json(j):
+        return TransformArray(numpy.array([
+            ((t["position"]["x"], t["position"]["y"], t["position"]["z"]),
+             (t["rotation"]["x"], t["rotation"]["y"], t["rotation"]["z"]))
+            for t in j
+        ], dtype=float).reshape(-1, 2, 3))
+
+    def to_transforms(self):
+        return [Transform(Vector(*p), Vector(*r)) for p, r in self.data.tolist()]
+
+    def to_json(self):
+        return [
+            {"position": {"x": p[0], "y": p[1], "z": p[2]}, "rotation": {"x": r[0], "y": r[1], "z": r[2]}}
+            for p, r in self.data.tolist()
+        ]
+
+    def __repr__(self):
+        return "TransformArray({} transforms)".format(len(self))
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        return iter(self.to_transforms())
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, numpy.integer)):
+            p, r = self.data[index].tolist()
+            return Transform(Vector(*p), Vector(*r))
+        return TransformArray(self.data[index])
+
+    def __array__(self, dtype=None, copy=None):
+        return _array(self.data, dtype, copy)
+
+    @property
+    def position(self):
+        return VectorArray(self.data[:, 0])
+
+    @position.setter
+    def position(self, value):
+        self.data[:, 0] = _operand(value)
+
+    @property
+    def rotation(self):
+        return VectorArray(self.data[:, 1])
+
+    @rotation.setter
+    def rotation(self, value):
+        self.data[:, 1] = _operand(value)
+
+
+class Spawn(Slotted):
+    __slots__ = ("position", "rotation", "destinations")
+
     def __init__(self, transform=None, destinations=None):
         if transform is None: transform = Transform()
         if destinations is None: destinations = []
@@ -134,7 +389,9 @@ class Spawn:
         )
 
 
-class Quaternion:
+class Quaternion(Slotted):
+    __slots__ = ("x", "y", "z", "w")
+
     def __init__(self, x=0.0, y=0.0, z=0.0, w=0.0):
         self.x = x
         self.y = y
@@ -150,3 +407,132 @@ class Quaternion:
 
     def __repr__(self):
         return "Quaternion({}, {}, {}, {})".format(self.x, self.y, self.z, self.w)
+
+    @staticmethod
+    def identity():
+        return Quaternion(0.0, 0.0, 0.0, 1.0)
+
+    @staticmethod
+    def from_array(q):
+        return Quaternion(*numpy.asarray(q, dtype=float).tolist())
+
+    def to_array(self):
+        return numpy.array((self.x, self.y, self.z, self.w), dtype=float)
+
+    @staticmethod
+    def from_euler(angles):
+        """Returns the rotation of Unity Euler angles in degrees, as in Transform.rotation"""
+        return Quaternion.from_array(euler_to_quaternion((angles.x, angles.y, angles.z)))
+
+    def to_euler(self):
+        """Returns the Unity Euler angles in degrees, each in [0, 360)"""
+        return Vector(*quaternion_to_euler(self.to_array()).tolist())
+
+    def __mul__(self, other):
+        # Like in Unity, q * r applies r first and q * v rotates the vector v
+        if isinstance(other, Quaternion):
+            return Quaternion.from_array(quaternion_multiply(self.to_array(), other.to_array()))
+        if isinstance(other, Vector):
+            return self.rotate(other)
+        raise TypeError("Quaternion multiplication only allowed with Quaternions and Vectors")
+
+    def rotate(self, v):
+        return Vector(*quaternion_rotate(self.to_array(), (v.x, v.y, v.z)).tolist())
+
+    def magnitude(self):
+        return sqrt(self.x ** 2 + self.y ** 2 + self.z ** 2 + self.w ** 2)
+
+    def normalized(self):
+        return Quaternion.from_array(quaternion_normalize(self.to_array()))
+
+    def conjugate(self):
+        return Quaternion(-self.x, -self.y, -self.z, self.w)
+
+    def inverse(self):
+        return Quaternion.from_array(quaternion_inverse(self.to_array()))
+
+    @staticmethod
+    def slerp(a, b, t):
+        """Spherical interpolation from a (t = 0) to b (t = 1) along the shorter arc"""
+        return Quaternion.from_array(quaternion_slerp(a.to_array(), b.to_array(), t))
+
+
+# Quaternion math on (..., 4) arrays of (x, y, z, w) and (..., 3) arrays of
+# vectors or Unity Euler angles in degrees, broadcasting like NumPy. Unity
+# composes Euler rotations as z, then x, then y, matching transform_to_matrix.
+
+def quaternion_multiply(a, b):
+    """Hamilton product, the rotation b followed by a"""
+    a = numpy.asarray(a, dtype=float)
+    b = numpy.asarray(b, dtype=float)
+    ax, ay, az, aw = a[..., 0], a[..., 1], a[..., 2], a[..., 3]
+    bx, by, bz, bw = b[..., 0], b[..., 1], b[..., 2], b[..., 3]
+    return numpy.stack([
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+        aw * bw - ax * bx - ay * by - az * bz,
+    ], axis=-1)
+
+
+def quaternion_normalize(q):
+    q = numpy.asarray(q, dtype=float)
+    return q / numpy.linalg.norm(q, axis=-1, keepdims=True)
+
+
+def quaternion_inverse(q):
+    q = numpy.asarray(q, dtype=float)
+    return q * (-1.0, -1.0, -1.0, 1.0) / numpy.sum(q * q, axis=-1, keepdims=True)
+
+
+def quaternion_rotate(q, v):
+    """Rotates vectors by unit quaternions"""
+    q = numpy.asarray(q, dtype=float)
+    v = numpy.asarray(v, dtype=float)
+    u, w = q[..., :3], q[..., 3:]
+    t = 2.0 * numpy.cross(u, v)
+    return v + w * t + numpy.cross(u, t)
+
+
+def euler_to_quaternion(angles):
+    half = numpy.radians(numpy.asarray(angles, dtype=float)) / 2
+    s, c = numpy.sin(half), numpy.cos(half)
+    zero = numpy.zeros(half.shape[:-1])
+    qx = numpy.stack([s[..., 0], zero, zero, c[..., 0]], axis=-1)
+    qy = numpy.stack([zero, s[..., 1], zero, c[..., 1]], axis=-1)
+    qz = numpy.stack([zero, zero, s[..., 2], c[..., 2]], axis=-1)
+    return quaternion_multiply(qy, quaternion_multiply(qx, qz))
+
+
+def quaternion_to_euler(q):
+    q = quaternion_normalize(q)
+    x, y, z, w = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+    sx = numpy.clip(2 * (x * w - y * z), -1.0, 1.0)
+    # Forward points straight up or down: only y + z is defined, keep z at 0
+    locked = numpy.abs(sx) > 1 - 1e-9
+    ax = numpy.arcsin(sx)
+    ay = numpy.where(
+        locked,
+        numpy.arctan2(2 * (y * w - x * z), 1 - 2 * (y * y + z * z)),
+        numpy.arctan2(2 * (x * z + y * w), 1 - 2 * (x * x + y * y)),
+    )
+    az = numpy.where(locked, 0.0, numpy.arctan2(2 * (x * y + z * w), 1 - 2 * (x * x + z * z)))
+    return numpy.degrees(numpy.stack([ax, ay, az], axis=-1)) % 360
+
+
+def quaternion_slerp(a, b, t):
+    """Spherical interpolation between unit quaternions, t broadcasts against their leading axes"""
+    a = quaternion_normalize(a)
+    b = quaternion_normalize(b)
+    t = numpy.asarray(t, dtype=float)[..., None]
+    dot = numpy.sum(a * b, axis=-1, keepdims=True)
+    # q and -q are the same rotation, take the shorter arc
+    b = numpy.where(dot < 0, -b, b)
+    dot = numpy.abs(dot)
+    theta = numpy.arccos(numpy.clip(dot, -1.0, 1.0))
+    sin_theta = numpy.sin(theta)
+    close = sin_theta < 1e-6
+    safe = numpy.where(close, 1.0, sin_theta)
+    wa = numpy.where(close, 1 - t, numpy.sin((1 - t) * theta) / safe)
+    wb = numpy.where(close, t, numpy.sin(t * theta) / safe)
+    return quaternion_normalize(wa * a + wb * b)
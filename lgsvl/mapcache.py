@@ -0,0 +1,77 @@
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+from collections import OrderedDict
+import threading
+
+
+class MapCache:
+    """Bounded LRU cache for map queries keyed by scene and quantized position
+
+    Positions are rounded to resolution meters, so a query within about
+    half of that distance of an earlier one is answered from memory with
+    the earlier result. At most max_entries replies are kept; the least
+    recently used is evicted first. One cache may be shared by several
+    Simulator instances, entries of different scenes never mix.
+
+        sim = lgsvl.Simulator(host, port, map_cache=lgsvl.MapCache(resolution=0.05))
+    """
+
+    def __init__(self, resolution=0.1, max_entries=100000):
+        if resolution <= 0:
+            raise ValueError("resolution must be positive")
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.resolution = resolution
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, scene, command, vector, *extra):
+        scale = 1.0 / self.resolution
+        return (scene, command, round(vector.x * scale), round(vector.y * scale), round(vector.z * scale)) + extra
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, command):
+        """Drops the entries of one command, e.g. map/from_nav after the nav origin moved"""
+        with self.lock:
+            for key in [key for key in self.entries if key[1] == command]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "hit_rate": self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,42 @@
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+from .server import MockSimulator
+
+import argparse
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serves the simulator API with kinematic agents for offline and load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8181)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added before every reply")
+    parser.add_argument("--fixed-delta", type=float, default=0.02, help="physics time step in seconds")
+    parser.add_argument("--random-agents", type=int, default=10, help="agents spawned by add_random_agents")
+    parser.add_argument("--custom-event-rate", type=float, default=0.0, help="custom events per second for every ego vehicle")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = MockSimulator(
+        args.host,
+        args.port,
+        latency=args.latency,
+        fixed_delta=args.fixed_delta,
+        random_agents=args.random_agents,
+        custom_event_rate=args.custom_event_rate,
+        seed=args.seed,
+    ).start()
+    print("Mock simulator listening on ws://{}:{}".format(server.host, server.port))
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,881 @@
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+from ..codec import JsonCodec, get_codec, msgpack
+from ..geo import latlon_to_utm, utm_to_latlon, utm_zone
+
+from datetime import datetime
+import threading
+import asyncio
+import socket
+import random
+import math
+import uuid
+
+import websockets
+import numpy
+
+AGENT_TYPE_EGO = 1
+AGENT_TYPE_NPC = 2
+AGENT_TYPE_PEDESTRIAN = 3
+
+LANE_WIDTH = 3.6
+PEDESTRIAN_SPEED = 1.0
+STOP_LINE_INTERVAL = 100.0
+VERSION = "2021.1 (mock)"
+
+# Scenes that can be loaded, by name and by asset id
+SCENES = {
+    "BorregasAve": "aae03d2a-b7ca-4a88-9e41-9035287a12cc",
+    "CubeTown": "06773677-1ce3-492f-9fe2-b3147e126e27",
+    "SanFrancisco": "5d272540-f689-4355-83c7-03bf11b6865f",
+    "Straight1LanePedestrianCrosswalk": "a3a818b5-c66b-488a-a780-979bd5692db1",
+    "SingleLaneRoad": "a6e2d149-6a18-4b83-9029-4411d7b2e69a",
+    "Straight1LaneSame": "1e2287cf-c590-4804-bcb1-18b2fd3752d1",
+    "Straight2LaneSame": "b39d3ef9-21d7-409d-851b-4c90dad80a25",
+    "Straight2LaneSameCurbRightIntersection": "378edc3f-8fce-4596-87dc-7d12fc2ad743",
+    "Straight2LaneOpposing": "671868be-44f9-44a1-913c-cb0f29d12634",
+    "LGSeocho": "26546191-86e8-4b53-9432-1cecbbd95c87",
+}
+
+# Sensors of every ego vehicle, as (type, name)
+SENSORS = (
+    ("camera", "Main Camera"),
+    ("camera", "Telephoto Camera"),
+    ("lidar", "Lidar"),
+    ("gps", "GPS"),
+    ("imu", "IMU"),
+    ("canbus", "CAN Bus"),
+    ("radar", "Radar"),
+)
+
+ARRAYS = (
+    ("positions", (3,), float),
+    ("rotations", (3,), float),
+    ("velocities", (3,), float),
+    ("angular_velocities", (3,), float),
+    ("radii", (), float),
+    ("speeds", (), float),
+    ("walking", (), bool),
+)
+
+# Half extents of the bounding boxes, also used as collision radius
+EXTENTS = {
+    AGENT_TYPE_EGO: (1.0, 0.75, 2.3),
+    AGENT_TYPE_NPC: (1.0, 0.75, 2.3),
+    AGENT_TYPE_PEDESTRIAN: (0.3, 0.9, 0.3),
+}
+
+
+def vec(x, y, z):
+    return {"x": float(x), "y": float(y), "z": float(z)}
+
+
+def unvec(j):
+    return (j["x"], j["y"], j["z"])
+
+
+def forward(yaw):
+    # Unity forward vector for a rotation around the y axis, in degrees
+    r = numpy.radians(yaw)
+    return numpy.stack([numpy.sin(r), numpy.zeros_like(r), numpy.cos(r)], axis=-1)
+
+
+class MockError(Exception):
+    pass
+
+
+class MockAgent:
+    def __init__(self, uid, name, agent_type, index):
+        self.uid = uid
+        self.name = name
+        self.type = agent_type
+        self.index = index
+        self.events = set()
+        self.control = None
+        self.sticky = False
+        self.fixed_speed = None
+        self.lane_speed = None
+        self.waypoints = []
+        self.waypoint = 0
+        self.loop = False
+        self.idle = 0.0
+        self.destination = None
+        self.lane_change_at = None
+        self.lane_change_left = False
+        self.e_stop = False
+        self.colliding = set()
+        self.bridge = None
+
+    @property
+    def following(self):
+        return self.waypoint < len(self.waypoints)
+
+
+class MockSimulator(threading.Thread):
+    """In-process websocket server speaking the lgsvl.Simulator protocol
+
+    Agents are kinematic: positions are integrated from velocities with a
+    fixed time step, vehicles follow waypoints, lanes or their last control
+    input, and pedestrians can walk randomly. Agent state is kept in NumPy
+    arrays so that lane following and random walking stay cheap for
+    thousands of agents; only agents with waypoints, controls or event
+    subscriptions are stepped one by one. Registered agents receive
+    collision, waypoint_reached, stop_line, lane_change, destination_reached
+    and optional custom events. The map is flat ground at y = 0 with
+    parallel lanes along +z every LANE_WIDTH meters and a stop line every
+    STOP_LINE_INTERVAL meters.
+
+    latency is added before every reply and may be a number of seconds or a
+    dict mapping command names to seconds. Replies echo the request "id".
+
+        with MockSimulator(latency=0.001) as server:
+            sim = lgsvl.Simulator("127.0.0.1", server.port)
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        latency=0.0,
+        fixed_delta=0.02,
+        random_agents=10,
+        custom_event_rate=0.0,
+        seed=None,
+        origin=(4140112.5, 587947.9, 10.0, 0.0, 10),
+    ):
+        super().__init__(daemon=True)
+        self.host = host
+        if port == 0:
+            sock = socket.socket()
+            sock.bind((host, 0))
+            port = sock.getsockname()[1]
+            sock.close()
+        self.port = port
+        self.latency = latency
+        self.fixed_delta = fixed_delta
+        self.random_agents = random_agents
+        self.custom_event_rate = custom_event_rate
+        self.random = random.Random(seed)
+        self.rng = numpy.random.RandomState(seed)
+        # northing, easting, altitude, map rotation in degrees, UTM zone
+        self.origin = origin
+        self.received = 0
+        self.ready = threading.Event()
+        self.commands = {
+            "connection/codec": self.connection_codec,
+            "simulator/version": lambda args: VERSION,
+            "simulator/load_scene": self.load_scene,
+            "simulator/reset": self.reset,
+            "simulator/current_scene": lambda args: self.scene,
+            "simulator/current_scene_id": lambda args: self.scene_id,
+            "simulator/current_frame": lambda args: self.frame,
+            "simulator/current_time": lambda args: self.time,
+            "simulator/layers/get": lambda args: {"Default": 0, "Agent": 8, "NPC": 9, "Pedestrian": 10, "Obstacle": 13},
+            "simulator/available_agents": lambda args: [{"name": "Sedan", "loaded": True}, {"name": "Jaguar2015XE", "loaded": True}],
+            "simulator/npc/available_behaviours": lambda args: [{"name": "NPCLaneFollowBehaviour"}, {"name": "NPCWaypointBehaviour"}],
+            "simulator/camera/set": lambda args: None,
+            "simulator/camera/state/set": lambda args: None,
+            "simulator/run": self.run_simulation,
+            "simulator/continue": self.continue_simulation,
+            "simulator/add_agent": self.add_agent,
+            "simulator/agent/remove": self.remove_agent,
+            "simulator/add_random_agents": self.add_random_agents,
+            "simulator/raycast": self.raycast,
+            "simulator/datetime/get": lambda args: self.datetime.strftime("%d.%m.%Y %H:%M:%S"),
+            "simulator/controllable_add": self.controllable_add,
+            "simulator/controllable_remove": self.controllable_remove,
+            "environment/weather/get": lambda args: dict(self.weather),
+            "environment/weather/set": self.set_weather,
+            "environment/time/get": lambda args: self.time_of_day,
+            "environment/time/set": self.set_time_of_day,
+            "environment/datetime/set": self.set_datetime,
+            "agent/state/get": self.get_state,
+            "agent/state/set": self.set_state,
+            "agent/bounding_box/get": self.bounding_box,
+            "agent/on_collision": self.register("collision"),
+            "agent/on_waypoint_reached": self.register("waypoint_reached"),
+            "agent/on_stop_line": self.register("stop_line"),
+            "agent/on_lane_change": self.register("lane_change"),
+            "agent/on_destination_reached": self.register("destination_reached"),
+            "vehicle/bridge/connected": lambda args: self.agent(args).bridge is not None,
+            "vehicle/bridge/connect": self.connect_bridge,
+            "vehicle/bridge/type": lambda args: "mock" if self.agent(args).bridge is not None else None,
+            "vehicle/sensors/get": self.sensors,
+            "vehicle/set_fixed_speed": self.set_fixed_speed,
+            "vehicle/apply_control": self.apply_control,
+            "vehicle/apply_npc_control": self.apply_npc_control,
+            "vehicle/set_initial_pose": lambda args: self.agent(args) and None,
+            "vehicle/set_destination": self.set_destination,
+            "vehicle/follow_waypoints": self.follow_waypoints,
+            "vehicle/follow_closest_lane": self.follow_closest_lane,
+            "vehicle/behaviour": lambda args: self.agent(args) and None,
+            "vehicle/change_lane": self.change_lane,
+            "pedestrian/walk_randomly": self.set_walk_randomly,
+            "pedestrian/follow_waypoints": self.follow_waypoints,
+            "pedestrian/set_speed": self.set_pedestrian_speed,
+            "sensor/transform/get": lambda args: self.sensor(args)["transform"],
+            "sensor/enabled/get": lambda args: self.sensor(args)["enabled"],
+            "sensor/enabled/set": self.set_sensor_enabled,
+            "sensor/camera/save": lambda args: self.sensor(args) is not None,
+            "sensor/lidar/save": lambda args: self.sensor(args) is not None,
+            "sensor/gps/data": self.gps_data,
+            "map/spawn/get": self.spawns,
+            "map/to_gps": self.to_gps,
+            "map/from_gps": self.from_gps,
+            "map/point_on_lane": self.point_on_lane,
+            "map/from_nav": self.from_nav,
+            "navigation/set_origin": self.set_nav_origin,
+            "navigation/get_origin": lambda args: self.nav_origin,
+            "controllable/get/all": self.get_controllables,
+            "controllable/get": self.get_controllable,
+            "controllable/object_state/get": self.get_controllable_state,
+            "controllable/object_state/set": self.set_controllable_state,
+            "controllable/current_state/get": lambda args: {"state": self.controllable(args)["current_state"]},
+            "controllable/control_policy/get": lambda args: {"control_policy": self.controllable(args)["control_policy"]},
+            "controllable/control_policy/set": self.set_control_policy,
+        }
+        self.load_scene({"scene": "BorregasAve", "seed": seed})
+
+    # Server lifecycle
+
+    def run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(self.listen())
+        self.ready.set()
+        self.loop.run_forever()
+
+    async def listen(self):
+        return await websockets.serve(self.serve, self.host, self.port, compression=None, max_size=None)
+
+    def start(self):
+        super().start()
+        self.ready.wait()
+        return self
+
+    async def shutdown(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.shutdown(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    async def serve(self, websocket, path=None):
+        # Commands are executed in arrival order; each reply is held back by
+        # its latency without blocking the commands pipelined behind it
+        outbox = asyncio.Queue()
+        writer = asyncio.ensure_future(self.write(websocket, outbox))
+        codec = JsonCodec()
+        try:
+            async for message in websocket:
+                request = codec.decode(message)
+                self.received += 1
+                name = request.get("command")
+                response = self.handle(name, request.get("arguments"))
+                if "id" in request:
+                    response["id"] = request["id"]
+                latency = self.latency.get(name, 0.0) if isinstance(self.latency, dict) else self.latency
+                outbox.put_nowait((self.loop.time() + latency, codec.encode(response)))
+                if name == "connection/codec" and "result" in response:
+                    codec = get_codec(response["result"])
+        finally:
+            writer.cancel()
+
+    async def write(self, websocket, outbox):
+        while True:
+            due, data = await outbox.get()
+            delay = due - self.loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await websocket.send(data)
+
+    def handle(self, name, args):
+        handler = self.commands.get(name)
+        if handler is None:
+            return {"error": "Unknown command '{}'".format(name)}
+        try:
+            return {"result": handler(args if args is not None else {})}
+        except MockError as e:
+            return {"error": str(e)}
+        except (KeyError, TypeError, ValueError) as e:
+            return {"error": "Invalid arguments for '{}': {!r}".format(name, e)}
+
+    def connection_codec(self, args):
+        for name in args["codecs"]:
+            if name == "json" or (name == "msgpack" and msgpack is not None):
+                return name
+        raise MockError("No supported codec")
+
+    # Scene
+
+    def load_scene(self, args):
+        scene = args["scene"]
+        if scene in SCENES:
+            self.scene, self.scene_id = scene, SCENES[scene]
+        else:
+            names = [name for name, uid in SCENES.items() if uid == scene]
+            if not names:
+                raise MockError("Scene '{}' not found".format(scene))
+            self.scene, self.scene_id = names[0], scene
+        self.reset(args)
+
+    def reset(self, args):
+        self.frame = 0
+        self.time = 0.0
+        self.remaining = None
+        self.traversed = False
+        self.agents = {}
+        self.order = []
+        self.scripted = {}
+        self.capacity = 0
+        self.grow(16)
+        self.sensors_by_uid = {}
+        self.weather = {"rain": 0.0, "fog": 0.0, "wetness": 0.0, "cloudiness": 0.0, "damage": 0.0}
+        self.time_of_day = 12.0
+        self.time_of_day_fixed = True
+        self.datetime = datetime(2021, 6, 1, 12, 0, 0)
+        self.nav_origin = None
+        self.controllables = {}
+        for i, x in enumerate([10.8, -10.8]):
+            self.add_controllable("signal", "signal-{}".format(i), (x, 5.0, 50.0), {
+                "valid_actions": ["trigger", "wait", "green", "yellow", "red", "loop"],
+                "default_control_policy": [{"action": "state", "value": "green"}, {"action": "wait", "value": "15"}],
+                "current_state": "green",
+            })
+
+    def spawns(self, args):
+        return [
+            {"position": vec(0, 0, 0), "rotation": vec(0, 0, 0), "destinations": [{"position": vec(0, 0, 200), "rotation": vec(0, 0, 0)}]},
+            {"position": vec(LANE_WIDTH, 0, 20), "rotation": vec(0, 0, 0), "destinations": []},
+        ]
+
+    def set_weather(self, args):
+        # Like the simulator, values are clamped to [0, 1] and anything but a
+        # number reads as 0
+        for key in self.weather:
+            value = args.get(key, 0)
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                value = 0.0
+            self.weather[key] = min(max(float(value), 0.0), 1.0)
+
+    def set_time_of_day(self, args):
+        time = float(args["time"])
+        self.time_of_day = time if 0.0 <= time <= 24.0 else 0.0
+        self.time_of_day_fixed = args.get("fixed", True)
+
+    def set_datetime(self, args):
+        self.datetime = datetime.strptime(args["datetime"], "%Y-%m-%d %H:%M:%S")
+
+    # Agents
+
+    def agent(self, args):
+        agent = self.agents.get(args["uid"])
+        if agent is None:
+            raise MockError("Agent '{}' not found".format(args["uid"]))
+        return agent
+
+    def grow(self, capacity):
+        # Per agent arrays indexed by MockAgent.index; speeds is NaN for
+        # agents that are not cruising along their heading
+        for attr, shape, dtype in ARRAYS:
+            new = numpy.zeros((capacity,) + shape, dtype=dtype)
+            if self.capacity:
+                new[:self.capacity] = getattr(self, attr)
+            setattr(self, attr, new)
+        self.capacity = capacity
+
+    def spawn(self, name, agent_type, state=None):
+        if len(self.order) == self.capacity:
+            self.grow(self.capacity * 2)
+        agent = MockAgent(str(uuid.UUID(int=self.random.getrandbits(128))), name, agent_type, len(self.order))
+        self.agents[agent.uid] = agent
+        self.order.append(agent)
+        i = agent.index
+        for attr, _, _ in ARRAYS:
+            getattr(self, attr)[i] = 0
+        self.speeds[i] = numpy.nan
+        self.radii[i] = max(EXTENTS[agent_type][0], EXTENTS[agent_type][2])
+        if state is not None:
+            self.write_state(agent, state)
+        if agent_type == AGENT_TYPE_EGO:
+            self.script(agent)
+        return agent
+
+    def script(self, agent):
+        self.scripted[agent.uid] = agent
+        return agent
+
+    def update_speed(self, agent):
+        speed = agent.fixed_speed if agent.fixed_speed is not None else agent.lane_speed
+        if agent.e_stop and speed is not None:
+            speed = 0.0
+        self.speeds[agent.index] = speed if speed is not None else numpy.nan
+
+    def add_agent(self, args):
+        agent_type = args["type"]
+        if agent_type not in EXTENTS:
+            raise MockError("Unsupported agent type {}".format(agent_type))
+        if not args["name"]:
+            raise MockError("Agent name must not be empty")
+        agent = self.spawn(args["name"], agent_type, args.get("state"))
+        if agent_type == AGENT_TYPE_EGO:
+            for kind, name in SENSORS:
+                sensor = self.make_sensor(agent, kind, name)
+                self.sensors_by_uid[sensor["uid"]] = sensor
+        return agent.uid
+
+    def remove_agent(self, args):
+        agent = self.agent(args)
+        last = self.order.pop()
+        if last is not agent:
+            # Keep the state arrays dense by moving the last agent into the hole
+            i, j = agent.index, last.index
+            for attr, _, _ in ARRAYS:
+                array = getattr(self, attr)
+                array[i] = array[j]
+            last.index = i
+            self.order[i] = last
+        del self.agents[agent.uid]
+        self.scripted.pop(agent.uid, None)
+        self.sensors_by_uid = {uid: s for uid, s in self.sensors_by_uid.items() if s["agent"] != agent.uid}
+
+    def add_random_agents(self, args):
+        agent_type = args["type"]
+        for _ in range(self.random_agents):
+            lane = self.random.randint(-5, 5)
+            agent = self.spawn("random", agent_type, {
+                "transform": {"position": vec(lane * LANE_WIDTH, 0, self.random.uniform(-500, 500)), "rotation": vec(0, 0, 0)},
+                "velocity": vec(0, 0, 0),
+                "angular_velocity": vec(0, 0, 0),
+            })
+            if agent_type == AGENT_TYPE_PEDESTRIAN:
+                self.walking[agent.index] = True
+            else:
+                agent.lane_speed = self.random.uniform(5, 15)
+                self.update_speed(agent)
+
+    def read_state(self, agent):
+        i = agent.index
+        return {
+            "transform": {"position": vec(*self.positions[i]), "rotation": vec(*self.rotations[i])},
+            "velocity": vec(*self.velocities[i]),
+            "angular_velocity": vec(*self.angular_velocities[i]),
+        }
+
+    def write_state(self, agent, state):
+        i = agent.index
+        self.positions[i] = unvec(state["transform"]["position"])
+        self.rotations[i] = unvec(state["transform"]["rotation"])
+        self.velocities[i] = unvec(state["velocity"])
+        self.angular_velocities[i] = unvec(state["angular_velocity"])
+
+    def get_state(self, args):
+        return self.read_state(self.agent(args))
+
+    def set_state(self, args):
+        self.write_state(self.agent(args), args["state"])
+
+    def bounding_box(self, args):
+        x, y, z = EXTENTS[self.agent(args).type]
+        return {"min": vec(-x, 0, -z), "max": vec(x, 2 * y, z)}
+
+    def register(self, event):
+        def handler(args):
+            self.script(self.agent(args)).events.add(event)
+        return handler
+
+    def connect_bridge(self, args):
+        self.agent(args).bridge = (args["address"], args["port"])
+
+    def make_sensor(self, agent, kind, name):
+        sensor = {
+            "uid": str(uuid.UUID(int=self.random.getrandbits(128))),
+            "agent": agent.uid,
+            "type": kind,
+            "name": name,
+            "enabled": True,
+            "transform": {"position": vec(0, 1.7, 0), "rotation": vec(0, 0, 0)},
+        }
+        if kind == "camera":
+            sensor.update(frequency=15, width=1920, height=1080, fov=50, near_plane=0.1, far_plane=2000, format="RGB")
+        elif kind == "lidar":
+            sensor.update(min_distance=0.5, max_distance=100, rays=32, rotations=10, measurements=1500, fov=41.33,
+                          angle=10, compensated=True)
+        elif kind in ("gps", "canbus"):
+            sensor.update(frequency=12.5)
+        return sensor
+
+    def sensors(self, args):
+        agent = self.agent(args)
+        return [
+            {k: v for k, v in s.items() if k not in ("agent", "enabled", "transform")}
+            for s in self.sensors_by_uid.values() if s["agent"] == agent.uid
+        ]
+
+    def sensor(self, args):
+        sensor = self.sensors_by_uid.get(args["uid"])
+        if sensor is None:
+            raise MockError("Sensor '{}' not found".format(args["uid"]))
+        return sensor
+
+    def set_sensor_enabled(self, args):
+        self.sensor(args)["enabled"] = args["enabled"]
+
+    def gps_data(self, args):
+        agent = self.agents[self.sensor(args)["agent"]]
+        return self.to_gps({"transform": self.read_state(agent)["transform"]})
+
+    def apply_npc_control(self, args):
+        agent = self.agent(args)
+        if "e_stop" in args["control"]:
+            agent.e_stop = bool(args["control"]["e_stop"])
+            self.update_speed(agent)
+
+    def set_fixed_speed(self, args):
+        agent = self.agent(args)
+        agent.fixed_speed = args["speed"] if args["isCruise"] else None
+        self.update_speed(agent)
+
+    def apply_control(self, args):
+        agent = self.script(self.agent(args))
+        agent.control = args["control"]
+        agent.sticky = args["sticky"]
+
+    def set_destination(self, args):
+        self.script(self.agent(args)).destination = numpy.array(unvec(args["transform"]["position"]))
+
+    def follow_waypoints(self, args):
+        agent = self.script(self.agent(args))
+        agent.waypoints = args["waypoints"]
+        agent.waypoint = 0
+        agent.idle = 0.0
+        agent.loop = args["loop"]
+        agent.lane_speed = None
+        self.update_speed(agent)
+        self.walking[agent.index] = False
+        self.traversed = False
+
+    def follow_closest_lane(self, args):
+        agent = self.agent(args)
+        agent.lane_speed = args["max_speed"] if args["follow"] else None
+        agent.waypoints = []
+        self.update_speed(agent)
+        if agent.lane_speed is not None:
+            i = agent.index
+            self.positions[i][0] = round(self.positions[i][0] / LANE_WIDTH) * LANE_WIDTH
+            self.rotations[i] = (0, 0, 0)
+
+    def change_lane(self, args):
+        agent = self.script(self.agent(args))
+        agent.lane_change_at = self.time + 1.0
+        agent.lane_change_left = args["isLeftChange"]
+
+    def set_walk_randomly(self, args):
+        agent = self.agent(args)
+        agent.waypoints = []
+        self.walking[agent.index] = args["enable"]
+
+    def set_pedestrian_speed(self, args):
+        agent = self.agent(args)
+        for wp in agent.waypoints:
+            wp["speed"] = args["speed"]
+
+    # Simulation
+
+    def run_simulation(self, args):
+        time_limit = args.get("time_limit") or 0.0
+        if time_limit < 0:
+            # The simulator returns right away without stepping
+            self.remaining = 0.0
+            return None
+        self.remaining = time_limit if time_limit > 0 else None
+        return self.advance()
+
+    def continue_simulation(self, args):
+        return self.advance()
+
+    def advance(self):
+        # Steps until events were produced or the time limit is reached. With
+        # no time limit every call simulates one second and reports events,
+        # so the client keeps calling simulator/continue until it stops.
+        budget = self.remaining if self.remaining is not None else 1.0
+        events = []
+        while budget > 1e-9:
+            dt = min(self.fixed_delta, budget)
+            events.extend(self.step(dt))
+            budget -= dt
+            if self.remaining is not None:
+                self.remaining = budget
+            if events:
+                break
+        if self.remaining is not None and self.remaining <= 1e-9:
+            self.remaining = 0.0
+            if not events:
+                return None
+        return {"events": events}
+
+    def step(self, dt):
+        events = []
+        count = len(self.order)
+        speeds = self.speeds[:count]
+        walking = self.walking[:count] & numpy.isnan(speeds)
+        if walking.any():
+            # Walkers pick a new heading about once a second
+            turning = walking & (self.rng.random_sample(count) < dt)
+            self.rotations[:count, 1][turning] = self.rng.uniform(0, 360, int(turning.sum()))
+            speeds = numpy.where(walking, PEDESTRIAN_SPEED, speeds)
+        moving = ~numpy.isnan(speeds)
+        if moving.any():
+            self.velocities[:count][moving] = forward(self.rotations[:count, 1][moving]) * speeds[moving, None]
+
+        scripted = list(self.scripted.values())
+        for agent in scripted:
+            if agent.following:
+                events.extend(self.step_waypoints(agent, dt))
+            elif agent.control is not None:
+                self.step_control(agent, dt)
+
+        previous = self.positions[:count].copy()
+        self.positions[:count] += self.velocities[:count] * dt
+        self.rotations[:count] += self.angular_velocities[:count] * dt
+        self.time += dt
+        self.frame += 1
+        if not self.time_of_day_fixed:
+            self.time_of_day = (self.time_of_day + dt / 3600.0) % 24.0
+
+        for agent in scripted:
+            if agent.events:
+                events.extend(self.agent_events(agent, previous))
+            if agent.lane_change_at is not None and self.time >= agent.lane_change_at:
+                agent.lane_change_at = None
+                self.positions[agent.index][0] += -LANE_WIDTH if agent.lane_change_left else LANE_WIDTH
+                if "lane_change" in agent.events:
+                    events.append({"type": "lane_change", "agent": agent.uid})
+
+        followers = [a for a in scripted if a.waypoints and not a.loop]
+        if followers and not self.traversed and all(not a.following for a in followers):
+            self.traversed = True
+            events.append({"type": "agents_traversed_waypoints"})
+
+        if self.custom_event_rate > 0:
+            for agent in scripted:
+                if agent.type == AGENT_TYPE_EGO and self.random.random() < self.custom_event_rate * dt:
+                    events.append({"type": "custom", "agent": agent.uid, "kind": "mock", "context": {"frame": self.frame}})
+        return events
+
+    def step_control(self, agent, dt):
+        i = agent.index
+        control = agent.control
+        speed = float(numpy.linalg.norm(self.velocities[i]))
+        braking = 1.0 if control.get("handbrake") else control.get("braking", 0.0)
+        speed += (control.get("throttle", 0.0) * 4.0 - braking * 8.0 - 0.2) * dt
+        speed = max(speed, 0.0)
+        if speed > 0.1:
+            self.rotations[i][1] += control.get("steering", 0.0) * 45.0 * dt
+        direction = -1.0 if control.get("reverse") else 1.0
+        self.velocities[i] = forward(self.rotations[i][1]) * speed * direction
+        if not agent.sticky:
+            # Non sticky controls only last for a single frame
+            agent.control = None
+
+    def step_waypoints(self, agent, dt):
+        i = agent.index
+        if agent.idle > 0:
+            agent.idle -= dt
+            self.velocities[i] = 0
+            return []
+        wp = agent.waypoints[agent.waypoint]
+        target = numpy.array(unvec(wp["position"]))
+        delta = target - self.positions[i]
+        distance = float(numpy.linalg.norm(delta))
+        speed = wp.get("speed", 1.0)
+        if distance > max(speed * dt, 0.05) and speed > 0:
+            self.velocities[i] = delta / distance * speed
+            self.rotations[i][1] = math.degrees(math.atan2(delta[0], delta[2]))
+            return []
+
+        self.positions[i] = target
+        self.velocities[i] = 0
+        if "angle" in wp:
+            self.rotations[i] = unvec(wp["angle"])
+        events = []
+        if "waypoint_reached" in agent.events:
+            events.append({"type": "waypoint_reached", "agent": agent.uid, "index": agent.waypoint})
+        agent.idle = wp.get("idle", 0.0)
+        agent.waypoint += 1
+        if agent.waypoint == len(agent.waypoints) and agent.loop:
+            agent.waypoint = 0
+        return events
+
+    def agent_events(self, agent, previous):
+        events = []
+        i = agent.index
+        count = len(self.order)
+        if "collision" in agent.events:
+            distances = numpy.linalg.norm(self.positions[:count] - self.positions[i], axis=1)
+            touching = set(numpy.nonzero(distances < self.radii[:count] + self.radii[i])[0].tolist())
+            touching.discard(i)
+            others = {self.order[j].uid for j in touching}
+            for uid in others - agent.colliding:
+                other = self.agents[uid]
+                contact = (self.positions[i] + self.positions[other.index]) / 2
+                events.append({"type": "collision", "agent": agent.uid, "other": uid, "contact": vec(*contact)})
+            agent.colliding = others
+        if "stop_line" in agent.events:
+            before = math.floor(previous[i][2] / STOP_LINE_INTERVAL)
+            after = math.floor(self.positions[i][2] / STOP_LINE_INTERVAL)
+            if before != after:
+                events.append({"type": "stop_line", "agent": agent.uid})
+        if "destination_reached" in agent.events and agent.destination is not None:
+            if numpy.linalg.norm(self.positions[i] - agent.destination) < 2.0:
+                agent.destination = None
+                events.append({"type": "destination_reached", "agent": agent.uid})
+        return events
+
+    # Map
+
+    def raycast(self, args):
+        # Rays hit the ground plane at y = 0
+        if not args:
+            return []
+        origins = numpy.array([unvec(a["origin"]) for a in args], dtype=float)
+        directions = numpy.array([unvec(a["direction"]) for a in args], dtype=float)
+        max_distances = numpy.array([a.get("max_distance", float("inf")) for a in args], dtype=float)
+        directions /= numpy.linalg.norm(directions, axis=1, keepdims=True)
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            distances = -origins[:, 1] / directions[:, 1]
+        hit = (directions[:, 1] < 0) & (origins[:, 1] >= 0) & (distances <= max_distances)
+        points = origins + directions * numpy.where(hit, distances, 0)[:, None]
+        return [
+            {"distance": float(distances[k]), "point": vec(*points[k]), "normal": vec(0, 1, 0)} if hit[k] else None
+            for k in range(len(args))
+        ]
+
+    def point_on_lane(self, args):
+        x, _, z = unvec(args["point"])
+        return {"position": vec(round(x / LANE_WIDTH) * LANE_WIDTH, 0, z), "rotation": vec(0, 0, 0)}
+
+    def from_nav(self, args):
+        q = args["orientation"]
+        yaw = math.degrees(2 * math.atan2(q["y"], q["w"])) if q["w"] or q["y"] else 0.0
+        return {"position": args["position"], "rotation": vec(0, yaw, 0)}
+
+    def set_nav_origin(self, args):
+        self.nav_origin = dict(args["transform"], offset=args["offset"])
+
+    def to_gps(self, args):
+        northing0, easting0, altitude0, angle, zone = self.origin
+        x, y, z = unvec(args["transform"]["position"])
+        a = math.radians(angle)
+        easting = easting0 + x * math.cos(a) - z * math.sin(a)
+        northing = northing0 + x * math.sin(a) + z * math.cos(a)
+        latitude, longitude = utm_to_latlon(northing, easting, zone)
+        return {
+            "latitude": float(latitude),
+            "longitude": float(longitude),
+            "northing": northing,
+            "easting": easting,
+            "altitude": y + altitude0,
+            "orientation": (args["transform"]["rotation"]["y"] + angle) % 360,
+        }
+
+    def from_gps(self, args):
+        northing0, easting0, altitude0, angle, zone = self.origin
+        a = math.radians(angle)
+        result = []
+        for c in args:
+            if "latitude" in c:
+                if utm_zone(c["longitude"]) != zone:
+                    raise MockError("Coordinates are outside of UTM zone {}".format(zone))
+                northing, easting = latlon_to_utm(c["latitude"], c["longitude"], zone)
+            else:
+                northing, easting = c["northing"], c["easting"]
+            de, dn = float(easting) - easting0, float(northing) - northing0
+            x = de * math.cos(a) + dn * math.sin(a)
+            z = -de * math.sin(a) + dn * math.cos(a)
+            y = c["altitude"] - altitude0 if "altitude" in c else 0.0
+            yaw = c["orientation"] - angle if "orientation" in c else 0.0
+            result.append({"position": vec(x, y, z), "rotation": vec(0, yaw, 0)})
+        return result
+
+    # Controllables
+
+    def add_controllable(self, kind, uid, position, extra):
+        j = {"uid": uid, "type": kind, "position": vec(*position), "rotation": vec(0, 0, 0),
+             "valid_actions": [], "default_control_policy": [], "current_state": None}
+        j.update(extra)
+        j["control_policy"] = j["default_control_policy"]
+        j["velocity"] = vec(0, 0, 0)
+        j["angular_velocity"] = vec(0, 0, 0)
+        self.controllables[uid] = j
+        return j
+
+    def describe(self, j):
+        return {k: j[k] for k in ("uid", "type", "position", "rotation", "valid_actions", "default_control_policy")}
+
+    def controllable(self, args):
+        j = self.controllables.get(args["uid"])
+        if j is None:
+            raise MockError("Controllable '{}' not found".format(args["uid"]))
+        return j
+
+    def controllable_add(self, args):
+        state = args["state"]
+        uid = str(uuid.UUID(int=self.random.getrandbits(128)))
+        j = self.add_controllable(args["name"], uid, unvec(state["transform"]["position"]), {})
+        j["rotation"] = state["transform"]["rotation"]
+        return self.describe(j)
+
+    def controllable_remove(self, args):
+        self.controllable(args)
+        del self.controllables[args["uid"]]
+
+    def get_controllables(self, args):
+        kind = args.get("type")
+        return [self.describe(j) for j in self.controllables.values() if kind is None or j["type"] == kind]
+
+    def get_controllable(self, args):
+        if "uid" in args:
+            return self.describe(self.controllable(args))
+        kind = args.get("type")
+        candidates = [j for j in self.controllables.values() if kind is None or j["type"] == kind]
+        if not candidates:
+            raise MockError("No controllable found")
+        p = numpy.array(unvec(args["position"]))
+        return self.describe(min(candidates, key=lambda j: numpy.linalg.norm(numpy.array(unvec(j["position"])) - p)))
+
+    def get_controllable_state(self, args):
+        j = self.controllable(args)
+        return {
+            "transform": {"position": j["position"], "rotation": j["rotation"]},
+            "velocity": j["velocity"],
+            "angular_velocity": j["angular_velocity"],
+        }
+
+    def set_controllable_state(self, args):
+        j = self.controllable(args)
+        j["position"] = args["state"]["transform"]["position"]
+        j["rotation"] = args["state"]["transform"]["rotation"]
+        j["velocity"] = args["state"]["velocity"]
+        j["angular_velocity"] = args["state"]["angular_velocity"]
+
+    def set_control_policy(self, args):
+        j = self.controllable(args)
+        policy = args["control_policy"]
+        j["control_policy"] = policy
+        if isinstance(policy, str):
+            for action in policy.split(";"):
+                if "=" in action and action.split("=")[0].strip() == "state":
+                    j["current_state"] = action.split("=")[1].strip()
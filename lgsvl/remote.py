@@ -4,24 +4,381 @@
 # This software contains code licensed as described in LICENSE.
 #
 
+from concurrent.futures import Future, CancelledError, TimeoutError
+from collections import OrderedDict, namedtuple
+import functools
+import itertools
 import threading
+import time
 import websockets
 import asyncio
-import json
 
+from .codec import negotiate
+from .stats import Stats
 
-class Remote(threading.Thread):
+Request = namedtuple("Request", "future name sent size data")
 
-    def __init__(self, host, port):
-        super().__init__(daemon=True)
-        self.endpoint = "ws://{}:{}".format(host, port)
+# Commands without side effects, safe to send again after a reconnect
+# besides every "*/get" and "map/*" command
+IDEMPOTENT = {
+    "simulator/version",
+    "simulator/current_scene",
+    "simulator/current_scene_id",
+    "simulator/current_frame",
+    "simulator/current_time",
+    "simulator/available_agents",
+    "simulator/npc/available_behaviours",
+    "simulator/raycast",
+    "simulator/datetime/get",
+    "vehicle/bridge/connected",
+    "vehicle/bridge/type",
+    "sensor/gps/data",
+    "navigation/get_origin",
+}
+
+RECONNECT_MAX_DELAY = 30.0
+
+
+def idempotent(name):
+    return name.endswith("/get") or name.startswith("map/") or name in IDEMPOTENT
+
+
+class ConnectionLost(Exception):
+    pass
+
+
+class CommandTimeout(Exception):
+    pass
+
+
+class CommandCancelled(Exception):
+    pass
+
+
+class CancellationToken:
+    """Stops waiting for commands from any thread
+
+    Pass it to Remote.command(token=...) or make it the default for a thread
+    with ``with remote.cancellable(token):``. After cancel(), commands
+    waiting on the token and any later ones using it raise CommandCancelled.
+    Their replies are still consumed when they arrive, so the connection
+    stays usable for other commands.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.futures = set()
+        self.cancelled = False
+
+    def cancel(self):
+        with self.lock:
+            self.cancelled = True
+            futures, self.futures = self.futures, set()
+        for future in futures:
+            future.cancel()
+
+    def watch(self, future):
+        with self.lock:
+            if not self.cancelled:
+                self.futures.add(future)
+                return
+        future.cancel()
+
+    def unwatch(self, future):
+        with self.lock:
+            self.futures.discard(future)
+
+
+class Cancellable:
+    def __init__(self, remote, token):
+        self.remote = remote
+        self.token = token
+        self.outer = None
+
+    def __enter__(self):
+        self.outer = getattr(self.remote.local, "token", None)
+        self.remote.local.token = self.token
+        return self.token
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.remote.local.token = self.outer
+
+
+class BatchFuture(Future):
+    def __init__(self, batch):
+        super().__init__()
+        self.batch = batch
+
+    def result(self, timeout=None):
+        # Reading a result before the scope ends sends what was collected so far
+        self.batch.flush()
+        return super().result(timeout)
+
+    def exception(self, timeout=None):
+        self.batch.flush()
+        return super().exception(timeout)
+
+
+class Batch:
+    """Collects commands and sends them to the simulator in one burst
+
+    Created by Remote.batch(). While the scope is active, every
+    Remote.command() issued from the thread that opened it is queued instead
+    of being sent and returns a BatchFuture. The queue is flushed when the
+    scope exits, when any of its futures is read, or before a command that
+    bypasses the batch through Remote.query(), command_many() or
+    unbatched(), so N commands cost a single round trip instead of N.
+    """
+
+    def __init__(self, remote):
+        self.remote = remote
+        self.requests = []
+        self.outer = None
+
+    def command(self, name, args={}, parse=None):
+        future = BatchFuture(self)
+        self.requests.append((name, args, parse, future))
+        return future
+
+    def flush(self):
+        requests, self.requests = self.requests, []
+        if not requests:
+            return
+        sent = self.remote.submit_many([(name, args) for name, args, _, _ in requests])
+        for (_, _, parse, future), reply in zip(requests, sent):
+            reply.add_done_callback(functools.partial(self.resolve, future, parse))
+
+    @staticmethod
+    def resolve(future, parse, reply):
+        try:
+            result = reply.result()
+            future.set_result(result if parse is None else parse(result))
+        except Exception as e:
+            future.set_exception(e)
+
+    def __enter__(self):
+        self.outer = getattr(self.remote.local, "batch", None)
+        if self.outer is not None:
+            self.outer.flush()
+        self.remote.local.batch = self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.remote.local.batch = self.outer
+        self.flush()
+
+
+class Unbatched:
+    def __init__(self, remote):
+        self.remote = remote
+        self.outer = None
+
+    def __enter__(self):
+        self.outer = getattr(self.remote.local, "batch", None)
+        if self.outer is not None:
+            self.outer.flush()
+        self.remote.local.batch = None
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.remote.local.batch = self.outer
+
+
+class BaseRemote:
+    """Command, batch and fire-and-forget logic shared by every transport
+
+    Subclasses deliver the commands by implementing submit_many(), which
+    returns one concurrent.futures.Future per (name, args) command, and
+    close(). Remote talks to a simulator, lgsvl.replay.ReplayRemote serves
+    a recorded session.
+    """
+
+    def __init__(self, timeout=None, fire_and_forget=False):
+        self.timeout = timeout
+        self.fire_and_forget = fire_and_forget
+        self.lost = None
+        # Bumped on every reconnect
+        self.generation = 0
+        # Set once the server echoes request ids in its replies
+        self.tagged = False
         self.lock = threading.Lock()
-        self.cv = threading.Condition()
-        self.data = None
+        self.acknowledged = threading.Condition(self.lock)
+        self.unacknowledged = set()
+        self.errors = []
+        self.pending = {}
+        self.stats = Stats()
+        self.local = threading.local()
+
+    def close(self):
+        pass
+
+    @property
+    def in_flight(self):
+        return len(self.pending)
+
+    def submit(self, name, args={}):
+        """Sends a command without waiting for its reply
+
+        Any number of commands may be outstanding at the same time, from one
+        or many threads. Returns a concurrent.futures.Future which resolves
+        to the command result or raises the error reported by the simulator.
+        """
+        return self.submit_many([(name, args)])[0]
+
+    def submit_many(self, commands):
+        """Sends a list of (name, args) commands and returns their futures"""
+        raise NotImplementedError()
+
+    def batch(self):
+        return Batch(self)
+
+    def unbatched(self):
+        """Sends the commands issued by this thread inside the scope right away
+
+        Commands collected by an enclosing batch scope are sent first, so
+        program order is kept, and the batch resumes when the scope ends.
+        """
+        return Unbatched(self)
+
+    def cancellable(self, token=None):
+        """Uses token for every command issued by this thread inside the scope"""
+        return Cancellable(self, CancellationToken() if token is None else token)
+
+    def send(self, name, args={}):
+        """Sends a command whose result is not used by the caller
+
+        With fire_and_forget enabled this returns as soon as the command is
+        queued. Errors reported by the simulator are kept and raised by the
+        next command() or flush() call.
+        """
+        batch = getattr(self.local, "batch", None)
+        if batch is not None:
+            batch.command(name, args)
+            return
+        if not self.fire_and_forget:
+            self.command(name, args)
+            return
+        future = self.submit(name, args)
+        with self.lock:
+            self.unacknowledged.add(future)
+        future.add_done_callback(self.acknowledge)
+
+    def acknowledge(self, future):
+        with self.acknowledged:
+            self.unacknowledged.discard(future)
+            if future.exception() is not None:
+                self.errors.append(future.exception())
+            self.acknowledged.notify_all()
+
+    def raise_deferred(self):
+        if self.errors:
+            with self.lock:
+                errors, self.errors = self.errors, []
+            raise errors[0]
+
+    def flush(self):
+        """Waits until every command sent with send() has been answered"""
+        with self.acknowledged:
+            self.acknowledged.wait_for(lambda: not self.unacknowledged)
+        self.raise_deferred()
+
+    def command(self, name, args={}, parse=None, timeout=None, token=None):
+        self.raise_deferred()
+        batch = getattr(self.local, "batch", None)
+        if batch is not None:
+            return batch.command(name, args, parse)
+        if token is None:
+            token = getattr(self.local, "token", None)
+        if token is not None and token.cancelled:
+            raise CommandCancelled("'{}' was cancelled before it was sent".format(name))
+        result = self.wait(name, self.submit(name, args), self.timeout if timeout is None else timeout, token)
+        return result if parse is None else parse(result)
+
+    def query(self, name, args={}, parse=None, timeout=None, token=None):
+        """Like command() but always waits for the result, also inside a batch scope
+
+        For callers that need the value right away, such as control flow or
+        results that are parsed or indexed before being returned.
+        """
+        with self.unbatched():
+            return self.command(name, args, parse, timeout, token)
+
+    def command_many(self, commands, timeout=None, token=None):
+        """Sends a list of (name, args) commands in one burst and returns their results
+
+        Costs one round trip instead of one per command. timeout and token
+        apply to each reply as in command(); the first error is raised.
+        Inside a batch scope the commands collected so far are sent first.
+        """
+        self.raise_deferred()
+        batch = getattr(self.local, "batch", None)
+        if batch is not None:
+            batch.flush()
+        if token is None:
+            token = getattr(self.local, "token", None)
+        if token is not None and token.cancelled:
+            raise CommandCancelled("Commands were cancelled before they were sent")
+        if timeout is None:
+            timeout = self.timeout
+        futures = self.submit_many(commands)
+        return [self.wait(name, future, timeout, token) for (name, _), future in zip(commands, futures)]
+
+    def wait(self, name, future, timeout, token):
+        # A command that gives up stays pending, so its late reply is
+        # matched and dropped instead of being taken for another reply
+        if token is not None:
+            token.watch(future)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            if not future.cancel():
+                return future.result()
+            raise CommandTimeout("No reply to '{}' within {} s".format(name, timeout))
+        except CancelledError:
+            raise CommandCancelled("'{}' was cancelled".format(name))
+        finally:
+            if token is not None:
+                token.unwatch(future)
+
+
+class Remote(BaseRemote, threading.Thread):
+    """Connection to the simulator running on its own thread and event loop
+
+    When the connection drops, Remote reconnects up to reconnect_attempts
+    times, waiting reconnect_delay seconds before the first attempt and
+    doubling the wait after every failure up to RECONNECT_MAX_DELAY.
+    Idempotent queries that were waiting for a reply are sent again on the
+    new connection. Other commands that were in flight, or are issued while
+    disconnected, fail with ConnectionLost since the simulator may or may
+    not have executed them. Outages are counted in stats under
+    "connection/reconnect", with their duration as latency.
+
+    timeout is the default number of seconds command() waits for a reply
+    before raising CommandTimeout; None waits forever.
+    """
+
+    def __init__(
+        self, host, port, codec=None, fire_and_forget=False, recorder=None, reconnect_attempts=10, reconnect_delay=0.5, timeout=None
+    ):
+        BaseRemote.__init__(self, timeout, fire_and_forget)
+        threading.Thread.__init__(self, daemon=True)
+        self.endpoint = "ws://{}:{}".format(host, port)
+        self.codec_name = codec
+        self.codec = None
+        self.recorder = recorder
+        self.reconnect_attempts = reconnect_attempts
+        self.reconnect_delay = reconnect_delay
+        self.connected = False
+        self.pending = OrderedDict()
+        self.ids = itertools.count()
+        self.websocket = None
         self.sem = threading.Semaphore(0)
         self.running = True
         self.start()
         self.sem.acquire()
+        if self.lost is not None:
+            self.join()
+            self.loop.close()
+            raise self.lost
 
     def run(self):
         self.loop = asyncio.new_event_loop()
@@ -29,42 +386,177 @@ class Remote(threading.Thread):
         self.loop.run_until_complete(self.process())
 
     def close(self):
-        asyncio.run_coroutine_threadsafe(self.websocket.close(), self.loop)
+        if self.is_alive():
+            self.loop.call_soon_threadsafe(self.shutdown)
         self.join()
         self.loop.close()
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def shutdown(self):
+        if self.closing.is_set():
+            return
+        self.closing.set()
+        self.closer = asyncio.ensure_future(self.websocket.close())
+
+    async def connect(self):
+        websocket = await websockets.connect(self.endpoint, compression=None)
+        self.codec = await negotiate(websocket, self.codec_name)
+        self.websocket = websocket
+        self.sender = asyncio.ensure_future(self.send_loop())
+        with self.lock:
+            self.connected = True
 
     async def process(self):
-        self.websocket = await websockets.connect(self.endpoint, compression=None)
+        self.closing = asyncio.Event()
+        self.closer = None
+        self.outbox = asyncio.Queue()
+        try:
+            await self.connect()
+        except Exception as e:
+            self.lost = e
+            self.sem.release()
+            return
         self.sem.release()
 
+        error = ConnectionLost("Connection closed")
         while True:
             try:
                 data = await self.websocket.recv()
+            except websockets.exceptions.ConnectionClosed:
+                if not self.closing.is_set() and await self.reconnect():
+                    continue
+                break
             except Exception as e:
-                if isinstance(e, websockets.exceptions.ConnectionClosed):
-                    break
-                with self.cv:
-                    self.data = {"error": str(e)}
-                    self.cv.notify()
+                error = ConnectionLost(str(e))
                 break
-            with self.cv:
-                self.data = json.loads(data)
-                self.cv.notify()
+            self.dispatch(self.codec.decode(data), len(data))
 
+        self.sender.cancel()
+        with self.lock:
+            self.connected = False
+            self.lost = error
+        # Nobody is left to answer, so waiters must not block forever
+        self.fail_pending(error)
+        self.closing.set()
+        if self.closer is not None:
+            await self.closer
         await self.websocket.close()
 
-    def command(self, name, args={}):
-        if not self.websocket:
-            raise Exception("Not connected")
+    async def reconnect(self):
+        self.sender.cancel()
+        self.stats.sent("connection/reconnect", 0)
+        down = time.perf_counter()
+        with self.lock:
+            self.connected = False
+            # Messages still queued for the old connection are dropped, as
+            # are enqueue() calls scheduled before this point
+            self.generation += 1
+            self.outbox = asyncio.Queue()
+            requests = list(self.pending.items())
+            self.pending.clear()
+            for uid, request in requests:
+                if idempotent(request.name):
+                    self.pending[uid] = request
+                    self.outbox.put_nowait(request.data)
+        for uid, request in requests:
+            if not idempotent(request.name):
+                self.fail(request, ConnectionLost("Connection lost while '{}' was in flight".format(request.name)))
 
-        data = json.dumps({"command": name, "arguments": args})
-        asyncio.run_coroutine_threadsafe(self.websocket.send(data), self.loop)
+        delay = self.reconnect_delay
+        for _ in range(self.reconnect_attempts):
+            try:
+                await asyncio.wait_for(self.closing.wait(), delay)
+                break
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.connect()
+            except Exception:
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+                continue
+            if self.closing.is_set():
+                break
+            self.stats.received("connection/reconnect", 0, time.perf_counter() - down)
+            return True
+        error = None if self.closing.is_set() else "gave up"
+        self.stats.received("connection/reconnect", 0, time.perf_counter() - down, 0, error)
+        return False
+
+    async def send_loop(self):
+        # A single writer keeps frames on the wire in the same order as the
+        # requests were registered in self.pending
+        while True:
+            data = await self.outbox.get()
+            try:
+                await self.websocket.send(data)
+            except websockets.exceptions.ConnectionClosed:
+                # The reader notices too and takes care of the pending requests
+                return
 
-        with self.cv:
-            self.cv.wait_for(lambda: self.data is not None)
-            data = self.data
-            self.data = None
+    def enqueue(self, generation, messages):
+        if generation != self.generation:
+            return
+        for data in messages:
+            self.outbox.put_nowait(data)
 
+    def dispatch(self, data, size=0):
+        # Replies carrying an "id" are routed to their request, anything else
+        # belongs to the oldest outstanding request as the simulator answers
+        # commands in the order it receives them
+        with self.lock:
+            if data.get("id") in self.pending:
+                request = self.pending.pop(data["id"])
+                self.tagged = True
+            elif self.pending:
+                _, request = self.pending.popitem(last=False)
+            else:
+                return
+        error = data.get("error")
+        self.stats.received(request.name, size, time.perf_counter() - request.sent, request.size, error)
+        if not request.future.set_running_or_notify_cancel():
+            # The caller timed out or was cancelled and no longer waits
+            return
         if "error" in data:
-            raise Exception(data["error"])
-        return data["result"]
+            request.future.set_exception(Exception(error))
+        else:
+            request.future.set_result(data.get("result"))
+
+    def fail(self, request, error):
+        self.stats.received(request.name, 0, time.perf_counter() - request.sent, request.size, str(error))
+        if request.future.set_running_or_notify_cancel():
+            request.future.set_exception(error)
+
+    def fail_pending(self, error):
+        with self.lock:
+            requests = list(self.pending.values())
+            self.pending.clear()
+        for request in requests:
+            self.fail(request, error)
+
+    def submit_many(self, commands):
+        """Sends a list of (name, args) commands with a single writer wakeup"""
+        if self.lost is not None:
+            raise self.lost
+
+        requests = []
+        for name, args in commands:
+            uid = next(self.ids)
+            data = self.codec.encode({"id": uid, "command": name, "arguments": args})
+            self.stats.sent(name, len(data))
+            requests.append((uid, Request(Future(), name, time.perf_counter(), len(data), data)))
+        if self.recorder is not None:
+            for (name, args), (_, request) in zip(commands, requests):
+                request.future.add_done_callback(functools.partial(self.recorder.record, name, args, request.sent))
+        futures = [request.future for _, request in requests]
+        rejected = []
+        with self.lock:
+            if not self.connected:
+                # Queries wait for the reconnect, anything else fails fast
+                rejected = [request for _, request in requests if not idempotent(request.name)]
+                requests = [(uid, request) for uid, request in requests if idempotent(request.name)]
+            self.pending.update(requests)
+            self.loop.call_soon_threadsafe(self.enqueue, self.generation, [request.data for _, request in requests])
+        for request in rejected:
+            self.fail(request, ConnectionLost("Not connected, '{}' was not sent".format(request.name)))
+        return futures
@@ -0,0 +1,114 @@
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+from .remote import BaseRemote
+from .codec import json_codec
+
+from concurrent.futures import Future
+from collections import deque
+import threading
+import gzip
+import json
+import time
+
+
+class ReplayError(Exception):
+    pass
+
+
+def open_log(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class Recorder:
+    """Appends every completed command to a log, one JSON object per line
+
+    Each entry holds the command name, its arguments, the result or error,
+    the time it was sent relative to the start of the recording and its
+    round trip latency in seconds. Paths ending in ".gz" are compressed.
+    """
+
+    def __init__(self, path):
+        self.file = open_log(path, "a")
+        self.lock = threading.Lock()
+        self.start = time.perf_counter()
+
+    def record(self, name, args, sent, future):
+        entry = {
+            "command": name,
+            "arguments": args,
+            "time": round(sent - self.start, 6),
+            "latency": round(time.perf_counter() - sent, 6),
+        }
+        error = "cancelled" if future.cancelled() else future.exception()
+        if error is not None:
+            entry["error"] = str(error)
+        else:
+            entry["result"] = future.result()
+        line = json.dumps(entry, separators=(",", ":"))
+        with self.lock:
+            self.file.write(line + "\n")
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+def load(path):
+    with open_log(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ReplayRemote(BaseRemote):
+    """Serves the replies of a recorded session without a simulator
+
+    Replies are handed out in recorded order per command name, so a script
+    replays deterministically as long as it issues the same commands. With
+    strict=True the arguments must match the recording too, and with
+    realtime=True every command waits for its recorded latency.
+    Use it through ``lgsvl.Simulator(replay="session.jsonl")``.
+    """
+
+    def __init__(self, path, strict=False, realtime=False, fire_and_forget=False, **options):
+        super().__init__(fire_and_forget=fire_and_forget)
+        self.endpoint = path
+        self.strict = strict
+        self.realtime = realtime
+        self.codec = json_codec()
+        # Every reply is handed to its own request
+        self.tagged = True
+        self.entries = {}
+        for entry in load(path):
+            self.entries.setdefault(entry["command"], deque()).append(entry)
+
+    def submit_many(self, commands):
+        futures = []
+        for name, args in commands:
+            future = Future()
+            futures.append(future)
+            self.stats.sent(name, 0)
+            with self.lock:
+                queue = self.entries.get(name)
+                entry = queue.popleft() if queue else None
+            if entry is None:
+                self.stats.received(name, 0, 0.0, 0, "not recorded")
+                future.set_exception(ReplayError("No recorded reply left for '{}'".format(name)))
+                continue
+            if self.strict and json.loads(json.dumps(args)) != entry["arguments"]:
+                self.stats.received(name, 0, 0.0, 0, "arguments differ")
+                future.set_exception(ReplayError("Arguments of '{}' differ from the recording: {} != {}".format(
+                    name, args, entry["arguments"])))
+                continue
+            if self.realtime:
+                time.sleep(entry["latency"])
+            self.stats.received(name, 0, entry["latency"], 0, entry.get("error"))
+            if "error" in entry:
+                future.set_exception(Exception(entry["error"]))
+            else:
+                future.set_result(entry["result"])
+        return futures
@@ -20,8 +20,7 @@ class Sensor:
 
     @property
     def transform(self):
-        j = self.remote.command("sensor/transform/get", {"uid": self.uid})
-        return Transform.from_json(j)
+        return self.remote.command("sensor/transform/get", {"uid": self.uid}, Transform.from_json)
 
     @property
     def enabled(self):
@@ -30,7 +29,7 @@ class Sensor:
     @enabled.setter
     @accepts(bool)
     def enabled(self, value):
-        self.remote.command("sensor/enabled/set", {"uid": self.uid, "enabled": value})
+        self.remote.send("sensor/enabled/set", {"uid": self.uid, "enabled": value})
 
     def __eq__(self, other):
         return self.uid == other.uid
@@ -119,8 +118,11 @@ class GpsSensor(Sensor):
 
     @property
     def data(self):
-        j = self.remote.command("sensor/gps/data", {"uid": self.uid})
-        return GpsData(j["latitude"], j["longitude"], j["northing"], j["easting"], j["altitude"], j["orientation"])
+        return self.remote.command(
+            "sensor/gps/data",
+            {"uid": self.uid},
+            lambda j: GpsData(j["latitude"], j["longitude"], j["northing"], j["easting"], j["altitude"], j["orientation"]),
+        )
 
 
 class RadarSensor(Sensor):
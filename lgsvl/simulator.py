@@ -5,20 +5,31 @@
 #
 
 from .remote import Remote
+from .replay import Recorder, ReplayRemote
 from .agent import Agent, AgentType, AgentState
 from .sensor import GpsData
 from .geometry import Vector, Transform, Spawn, Quaternion
-from .utils import accepts, ObjectState
+from .utils import accepts, ObjectState, states_to_array, array_to_states
 from .controllable import Controllable
+from .mapcache import MapCache
+from . import geo
+from . import events
 
 from enum import Enum
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 from environs import Env
 from datetime import datetime
+import asyncio
+import inspect
+import numpy
 import re
 
 RaycastHit = namedtuple("RaycastHit", "distance point normal")
 
+RaycastHits = namedtuple("RaycastHits", "hit distance point normal")
+
+Observation = namedtuple("Observation", "frame time states events")
+
 WeatherState = namedtuple("WeatherState", "rain fog wetness cloudiness damage")
 WeatherState.__new__.__defaults__ = (0,) * len(WeatherState._fields)
 
@@ -34,38 +45,86 @@ class Simulator:
         DRIVER = 3
 
     @accepts(str, int)
-    def __init__(self, address=env.str("LGSVL__SIMULATOR_HOST", "localhost"), port=env.int("LGSVL__SIMULATOR_PORT", 8181)):
+    def __init__(self, address=env.str("LGSVL__SIMULATOR_HOST", "localhost"), port=env.int("LGSVL__SIMULATOR_PORT", 8181), **options):
+        """Connects to the simulator at address:port
+
+        Keyword options are passed on to lgsvl.remote.Remote (codec,
+        fire_and_forget, reconnect_attempts, reconnect_delay, timeout).
+        record="session.jsonl" appends every command and its reply to a log,
+        replay="session.jsonl" serves a recorded session through
+        lgsvl.replay.ReplayRemote without connecting anywhere.
+        map_cache=True, or an lgsvl.MapCache, answers repeated
+        map_point_on_lane() and map_from_nav() queries locally.
+        """
         if port <= 0 or port > 65535:
             raise ValueError("port value is out of range")
-        self.remote = Remote(address, port)
+        map_cache = options.pop("map_cache", None)
+        self.map_cache = MapCache() if map_cache is True else map_cache or None
+        if "replay" in options:
+            self.remote = ReplayRemote(options.pop("replay"), **options)
+        else:
+            if "record" in options:
+                options["recorder"] = Recorder(options.pop("record"))
+            self.remote = Remote(address, port, **options)
         self.agents = {}
-        self.callbacks = {}
+        self.callbacks = events.Callbacks()
         self.stopped = False
+        self.loop = None
+        self.metadata = {}
+        self.metadata_generation = 0
 
     def close(self):
         self.remote.close()
+        if self.loop is not None:
+            self.loop.close()
 
     @accepts(str, int)
     def load(self, scene, seed=None):
         self.remote.command("simulator/load_scene", {"scene": scene, "seed": seed})
         self.agents.clear()
         self.callbacks.clear()
+        self.metadata.clear()
+
+    def clear_cache(self):
+        """Forgets the cached scene metadata so the next access reads it again
+
+        version, layers, current_scene, current_scene_id, available_agents,
+        available_npc_behaviours and get_spawn() are read once per scene and
+        then served from a cache that load(), reset() and reconnects clear.
+        Call this when the scene was changed behind the script's back, e.g.
+        from the simulator's web UI.
+        """
+        self.metadata.clear()
+
+    def _metadata(self, cmd, read=None):
+        # Reads cmd, or calls read(), once per scene and connection
+        generation = self.remote.generation
+        if generation != self.metadata_generation:
+            self.metadata.clear()
+            self.metadata_generation = generation
+        if cmd in self.metadata:
+            return self.metadata[cmd]
+        # Reads bypass batch scopes, so only values are cached and returned
+        with self.remote.unbatched():
+            result = self.remote.command(cmd) if read is None else read()
+        self.metadata[cmd] = result
+        return result
 
     @property
     def version(self):
-        return self.remote.command("simulator/version")
+        return self._metadata("simulator/version")
 
     @property
     def layers(self):
-        return self.remote.command("simulator/layers/get")
+        return self._metadata("simulator/layers/get")
 
     @property
     def current_scene(self):
-        return self.remote.command("simulator/current_scene")
+        return self._metadata("simulator/current_scene")
 
     @property
     def current_scene_id(self):
-        return self.remote.command("simulator/current_scene_id")
+        return self._metadata("simulator/current_scene_id")
 
     @property
     def current_frame(self):
@@ -77,11 +136,11 @@ class Simulator:
 
     @property
     def available_agents(self):
-        return self.remote.command("simulator/available_agents")
+        return self._metadata("simulator/available_agents")
 
     @property
     def available_npc_behaviours(self):
-        return self.remote.command("simulator/npc/available_behaviours")
+        return self._metadata("simulator/npc/available_behaviours")
 
     @accepts(Transform)
     def set_sim_camera(self, transform):
@@ -94,74 +153,187 @@ class Simulator:
     def agents_traversed_waypoints(self, fn):
         self._add_callback(None, "agents_traversed_waypoints", fn)
 
+    def on_event(self, event_type, fn):
+        """Calls fn for the events of event_type from every agent
+
+        fn takes the same arguments as the per agent callback, e.g.
+        fn(agent, other, contact) for "collision". Agents still have to be
+        subscribed, see run_iter(). Coroutine functions are run to completion
+        before the simulation continues.
+        """
+        if event_type not in events.DECODERS:
+            raise ValueError("Unknown event type '{}'".format(event_type))
+        self._add_callback(events.ANY, event_type, fn)
+
+    def on_events(self, fn):
+        """Calls fn(events) once per reply with the list of lgsvl.events objects it carried"""
+        self.callbacks.add_batch(fn)
+
     def reset(self):
         self.remote.command("simulator/reset")
         self.agents.clear()
         self.callbacks.clear()
+        self.metadata.clear()
 
     def stop(self):
         self.stopped = True
 
-    @accepts((int, float), (int, float))
-    def run(self, time_limit=0.0, time_scale=None):
-        self._process("simulator/run", {"time_limit": time_limit, "time_scale": time_scale})
+    def stats(self):
+        """Returns per-command call counts, errors, byte sizes and latency histograms
+
+        ``sim.remote.stats.to_prometheus()`` renders the same counters in the
+        Prometheus text format and ``sim.remote.stats.add_hook(fn, command)``
+        registers a callback invoked for every reply.
+        """
+        return self.remote.stats.to_json()
+
+    def flush(self):
+        """Waits for fire-and-forget commands and raises the first error they reported"""
+        self.remote.flush()
+
+    def batch(self):
+        """Sends the commands issued inside a ``with sim.batch():`` scope in one burst
+
+        Inside the scope, agent, sensor and controllable calls return futures
+        instead of values; read them with ``future.result()``. Setters such as
+        ``agent.state = ...``, ``sensor.enabled = ...`` and
+        ``controllable.control(...)`` are queued and sent when the scope ends.
+        Calls that need a reply to go on, such as run(), add_agent(), weather
+        or the scene metadata, send what was queued so far and then wait as
+        usual; event callbacks run outside of the scope.
+        """
+        return self.remote.batch()
+
+    def cancellable(self, token=None):
+        """Lets another thread abort the commands issued inside the scope
+
+            with sim.cancellable() as token:
+                watchdog = threading.Timer(600, token.cancel)
+                watchdog.start()
+                sim.run()
+
+        Once token.cancel() is called, the command being waited for and every
+        later one in the scope raise lgsvl.remote.CommandCancelled.
+        """
+        return self.remote.cancellable(token)
+
+    @accepts((int, float), (int, float), (int, float))
+    def run(self, time_limit=0.0, time_scale=None, timeout=None):
+        """Runs the simulation for time_limit seconds, or until stopped if 0
+
+        timeout overrides the default command timeout for each reply the run
+        waits for, see lgsvl.remote.CommandTimeout.
+        """
+        self._process("simulator/run", {"time_limit": time_limit, "time_scale": time_scale}, timeout)
+
+    def run_iter(self, time_limit=0.0, time_scale=None, timeout=None):
+        """Runs the simulation and lazily yields its events
+
+        Yields the event types from lgsvl.events as replies arrive. The
+        simulator is only asked to continue once the consumer wants the
+        next event, and leaving the loop early pauses the simulation just
+        like stop() does in a callback:
+
+            for event in sim.run_iter(30):
+                if isinstance(event, lgsvl.events.CollisionEvent):
+                    break
 
-    def _add_callback(self, agent, name, fn):
-        if agent not in self.callbacks:
-            self.callbacks[agent] = {}
-        if name not in self.callbacks[agent]:
-            self.callbacks[agent][name] = set()
-        self.callbacks[agent][name].add(fn)
+        Agents report the events they are subscribed to with on_collision()
+        and friends, which accept None in place of a callback for use with
+        run_iter(); registered callbacks are not called.
+        """
+        j = self.remote.query("simulator/run", {"time_limit": time_limit, "time_scale": time_scale}, timeout=timeout)
+        while j is not None:
+            for ev in j.get("events", []):
+                yield events.from_json(ev, self.agents)
+            j = self.remote.query("simulator/continue", timeout=timeout)
 
-    def _process_events(self, events):
+    def _add_callback(self, agent, name, fn):
+        if fn is None:
+            # Subscribed for run_iter() only
+            return
+        self.callbacks.add(agent, name, fn)
+
+    def _await(self, result):
+        # Coroutine callbacks run to completion on a private event loop
+        if self.loop is None:
+            self.loop = asyncio.new_event_loop()
+        self.loop.run_until_complete(result)
+
+    def _process_events(self, evs):
         self.stopped = False
-        for ev in events:
-            if "agent" in ev:
-                agent = self.agents[ev["agent"]]
-                if agent in self.callbacks:
-                    callbacks = self.callbacks[agent]
-                    event_type = ev["type"]
-                    if event_type in callbacks:
-                        for fn in callbacks[event_type]:
-                            if event_type == "collision":
-                                fn(agent, self.agents.get(ev["other"]), Vector.from_json(ev["contact"]) if ev["contact"] is not None else None)
-                            elif event_type == "waypoint_reached":
-                                fn(agent, ev["index"])
-                            elif event_type == "stop_line":
-                                fn(agent)
-                            elif event_type == "lane_change":
-                                fn(agent)
-                            elif event_type == "destination_reached":
-                                fn(agent)
-                            elif event_type == "custom":
-                                fn(agent, ev["kind"], ev["context"])
-                            if self.stopped:
-                                return
-            elif None in self.callbacks:
-                callbacks = self.callbacks[None]
-                event_type = ev["type"]
-                if event_type in callbacks:
-                    for fn in callbacks[event_type]:
-                        if event_type == "agents_traversed_waypoints":
-                            fn()
-
-    def _process(self, cmd, args):
-        j = self.remote.command(cmd, args)
+        # Callbacks read values, so they do not join the caller's batch
+        with self.remote.unbatched():
+            for fn, args in self.callbacks.calls(evs, self.agents):
+                result = fn(*args)
+                if result is not None and inspect.isawaitable(result):
+                    self._await(result)
+                if self.stopped:
+                    return
+
+    def _process(self, cmd, args, timeout=None):
+        return self._continue(self.remote.query(cmd, args, timeout=timeout), timeout)
+
+    def _continue(self, j, timeout=None):
+        # Follows a simulator/run reply until the run is over and returns
+        # the events that interrupted it
+        fired = []
         while True:
             if j is None:
-                return
+                return fired
             if "events" in j:
+                fired.extend(j["events"])
                 self._process_events(j["events"])
                 if self.stopped:
-                    break
-            j = self.remote.command("simulator/continue")
+                    return fired
+            j = self.remote.query("simulator/continue", timeout=timeout)
+
+    def step(self, dt, agents=(), states=None, as_array=False, timeout=None):
+        """Runs the simulation for dt seconds and observes the result in one round trip
+
+        states, written before the run, takes the same forms as
+        set_agent_states(). Controls and other writes issued inside a
+        ``with sim.batch():`` scope around step() go out in the same burst:
+
+            with sim.batch():
+                ego.apply_control(control)
+                obs = sim.step(0.1, [ego])
+
+        Returns an Observation with the frame number, simulation time, the
+        states of agents (as by get_agent_states()) and the events fired
+        during the step, which are also passed to the registered callbacks.
+        When events interrupt the run it is continued and the observation
+        is read again, costing extra round trips only for those steps.
+        Servers that echo request ids get the reads pipelined behind
+        simulator/run. Otherwise replies are matched in arrival order, which
+        a server answering queued commands while the run is still going
+        would break, so the reads are sent once the run has been answered.
+        """
+        uids = [agent.uid for agent in agents]
+        commands = [] if states is None else self._state_writes(states)
+        commands.append(("simulator/run", {"time_limit": dt, "time_scale": None}))
+        reads = [("agent/state/get", {"uid": uid}) for uid in uids]
+        reads += [("simulator/current_frame", {}), ("simulator/current_time", {})]
+
+        pipelined = self.remote.tagged
+        results = self.remote.command_many(commands + reads if pipelined else commands, timeout)
+        fired = self._continue(results[len(commands) - 1], timeout)
+        if fired or not pipelined:
+            results = self.remote.command_many(reads, timeout)
+        observed, (frame, time) = results[-len(reads):-2], results[-2:]
+
+        if as_array:
+            observed = states_to_array(uids, observed)
+        else:
+            observed = {uid: AgentState.from_json(j) for uid, j in zip(uids, observed)}
+        return Observation(frame, time, observed, fired)
 
     @accepts(str, AgentType, (AgentState, type(None)), (Vector, type(None)))
     def add_agent(self, name, agent_type, state=None, color=None):
         if state is None: state = AgentState()
         if color is None: color = Vector(-1, -1, -1)
         args = {"name": name, "type": agent_type.value, "state": state.to_json(), "color": color.to_json()}
-        uid = self.remote.command("simulator/add_agent", args)
+        uid = self.remote.query("simulator/add_agent", args)
         agent = Agent.create(self, uid, agent_type)
         agent.name = name
         self.agents[uid] = agent
@@ -182,9 +354,46 @@ class Simulator:
     def get_agents(self):
         return list(self.agents.values())
 
+    def get_agent_states(self, agents=None, as_array=False):
+        """Reads the state of every agent, or of the given ones, in one round trip
+
+        Returns a dict of AgentState keyed by uid, or with as_array=True a
+        NumPy structured array with a "uid" column and (N, 3) "position",
+        "rotation", "velocity" and "angular_velocity" columns, which skips
+        building Vector objects for every agent.
+        """
+        if agents is None:
+            agents = list(self.agents.values())
+        uids = [agent.uid for agent in agents]
+        states = self.remote.command_many([("agent/state/get", {"uid": uid}) for uid in uids])
+        if as_array:
+            return states_to_array(uids, states)
+        return {uid: AgentState.from_json(j) for uid, j in zip(uids, states)}
+
+    def set_agent_states(self, states):
+        """Writes the state of many agents in one round trip
+
+        states is a dict mapping agents or uids to AgentState, or a NumPy
+        structured array with "uid", "position" and "rotation" columns and
+        optional "velocity" and "angular_velocity" columns, such as the one
+        returned by get_agent_states(as_array=True).
+        """
+        self.remote.command_many(self._state_writes(states))
+
+    @staticmethod
+    def _state_writes(states):
+        if isinstance(states, dict):
+            pairs = [
+                (agent if isinstance(agent, str) else agent.uid, state.to_json())
+                for agent, state in states.items()
+            ]
+        else:
+            pairs = array_to_states(states)
+        return [("agent/state/set", {"uid": uid, "state": j}) for uid, j in pairs]
+
     @property
     def weather(self):
-        j = self.remote.command("environment/weather/get")
+        j = self.remote.query("environment/weather/get")
         return WeatherState(j.get("rain", 0), j.get("fog", 0), j.get("wetness", 0), j.get("cloudiness", 0), j.get("damage", 0))
 
     @weather.setter
@@ -198,7 +407,7 @@ class Simulator:
 
     @property
     def current_datetime(self):
-        date_time_str = self.remote.command("simulator/datetime/get")
+        date_time_str = self.remote.query("simulator/datetime/get")
         date_time_arr = list(map(int, re.split('[. :]', date_time_str)))
         date_time = datetime(
             date_time_arr[2],
@@ -220,12 +429,13 @@ class Simulator:
         self.remote.command("environment/datetime/set", {"datetime": date_time, "fixed": fixed})
 
     def get_spawn(self):
-        spawns = self.remote.command("map/spawn/get")
+        spawns = self._metadata("map/spawn/get")
+        # Parsed on every call, callers are free to modify the spawns
         return [Spawn.from_json(spawn) for spawn in spawns]
 
     @accepts((Transform, Spawn))
     def map_to_gps(self, transform):
-        j = self.remote.command("map/to_gps", {"transform": transform.to_json()})
+        j = self.remote.query("map/to_gps", {"transform": transform.to_json()})
         return GpsData(j["latitude"], j["longitude"], j["northing"], j["easting"], j["altitude"], j["orientation"])
 
     def map_from_gps(self, latitude=None, longitude=None, northing=None, easting=None, altitude=None, orientation=None):
@@ -241,8 +451,89 @@ class Simulator:
         c.append(coord)
         return self.map_from_gps_batch(c)[0]
 
-    def map_from_gps_batch(self, coords):
-        # coords dictionary
+    def map_from_gps_batch(self, coords, local=False):
+        """Converts a list of coordinate dicts, as taken by map_from_gps(), to transforms
+
+        With local=True they are converted with geo_reference() instead of
+        by the simulator.
+        """
+        jarr = self._gps_coords_to_json(coords)
+        if local:
+            return self._map_from_gps_local(jarr)
+        jarr = self.remote.query("map/from_gps", jarr)
+        transforms = []
+        for j in jarr:
+            transforms.append(Transform.from_json(j))
+        return transforms
+
+    def map_to_gps_batch(self, transforms, local=False):
+        """Converts a list of transforms to GpsData in one round trip
+
+        With local=True they are converted with geo_reference() instead of
+        by the simulator.
+        """
+        if not local:
+            replies = self.remote.command_many([("map/to_gps", {"transform": t.to_json()}) for t in transforms])
+            return [GpsData(*(j[field] for field in GpsData._fields)) for j in replies]
+        positions = numpy.array([[t.position.x, t.position.y, t.position.z] for t in transforms], dtype=float).reshape(-1, 3)
+        yaw = numpy.array([t.rotation.y for t in transforms], dtype=float)
+        gps = self.geo_reference().to_gps(positions, yaw)
+        return [GpsData(*row) for row in zip(*(gps[field].tolist() for field in GpsData._fields))]
+
+    def geo_reference(self, tolerance=0.05):
+        """Returns the lgsvl.geo.GeoReference of the current scene for local GPS conversions
+
+        It is fitted once per scene to a few map/to_gps replies, sent in one
+        burst, and checked against more of them; lgsvl.geo.GeoReferenceError
+        is raised if it is off by more than tolerance meters, also on later
+        calls for the same scene without asking the simulator again. Its
+        to_gps() and from_gps() work on whole NumPy arrays:
+
+            gps = sim.geo_reference().to_gps(trajectory)  # (N, 3) positions
+            gps["latitude"], gps["longitude"]
+        """
+        reference = self._metadata("geo_reference", lambda: self._calibrate_geo_reference(tolerance))
+        if isinstance(reference, geo.GeoReferenceError):
+            raise geo.GeoReferenceError(str(reference))
+        return reference
+
+    def _calibrate_geo_reference(self, tolerance):
+        points = geo.CALIBRATION_POINTS + geo.VALIDATION_POINTS
+        replies = self.remote.command_many([
+            ("map/to_gps", {"transform": Transform(Vector(x, y, z), Vector(0, yaw, 0)).to_json()})
+            for x, y, z, yaw in points
+        ])
+        samples = list(zip(points, replies))
+        count = len(geo.CALIBRATION_POINTS)
+        try:
+            reference = geo.GeoReference.calibrate(samples[:count])
+            reference.validate(samples[count:], tolerance)
+        except geo.GeoReferenceError as e:
+            # Cached like a fitted reference, maps that cannot be described
+            # cost the calibration burst once per scene
+            return e
+        return reference
+
+    def _map_from_gps_local(self, jarr):
+        # jarr as validated by _gps_coords_to_json; missing altitude and
+        # orientation give y and yaw 0 as they do in the simulator
+        def column(name):
+            return numpy.array([j.get(name, numpy.nan) for j in jarr], dtype=float)
+
+        reference = self.geo_reference()
+        latlon = numpy.array(["latitude" in j for j in jarr], dtype=bool)
+        northing, easting = column("northing"), column("easting")
+        if latlon.any():
+            northing[latlon], easting[latlon] = geo.latlon_to_utm(
+                column("latitude")[latlon], column("longitude")[latlon], reference.zone, reference.northern)
+        altitude, orientation = column("altitude"), column("orientation")
+        positions, yaw = reference.from_gps(northing=northing, easting=easting, altitude=altitude, orientation=orientation)
+        positions[numpy.isnan(altitude), 1] = 0.0
+        yaw[numpy.isnan(orientation)] = 0.0
+        return [Transform(Vector(*p), Vector(0, r, 0)) for p, r in zip(positions.tolist(), yaw.tolist())]
+
+    @staticmethod
+    def _gps_coords_to_json(coords):
         jarr = []
 
         for c in coords:
@@ -271,29 +562,60 @@ class Simulator:
                 if not isinstance(c["orientation"], numtype): raise TypeError("Argument 'orientation' should have '{}' type".format(numtype))
                 j["orientation"] = c["orientation"]
             jarr.append(j)
-
-        jarr = self.remote.command("map/from_gps", jarr)
-        transforms = []
-        for j in jarr:
-            transforms.append(Transform.from_json(j))
-        return transforms
+        return jarr
 
     @accepts(Vector)
     def map_point_on_lane(self, point):
-        j = self.remote.command("map/point_on_lane", {"point": point.to_json()})
+        if self.map_cache is not None:
+            return self.map_points_on_lane([point])[0]
+        j = self.remote.query("map/point_on_lane", {"point": point.to_json()})
         return Transform.from_json(j)
 
+    def map_points_on_lane(self, points):
+        """Returns map_point_on_lane() for every point, asking the simulator in one round trip
+
+        With a map cache only the points it cannot answer are sent.
+        """
+        return self._map_query("map/point_on_lane", [({"point": p.to_json()}, p, ()) for p in points])
+
     @accepts(Vector, Quaternion)
     def map_from_nav(self, position, orientation):
-        res = self.remote.command(
-            "map/from_nav",
-            {
-                "position": position.to_json(),
-                "orientation": orientation.to_json()
-            }
-        )
+        args = {
+            "position": position.to_json(),
+            "orientation": orientation.to_json()
+        }
+        if self.map_cache is not None:
+            extra = tuple(round(c * 1e4) for c in (orientation.x, orientation.y, orientation.z, orientation.w))
+            return self._map_query("map/from_nav", [(args, position, extra)])[0]
+        res = self.remote.query("map/from_nav", args)
         return Transform.from_json(res)
 
+    def _map_query(self, cmd, queries):
+        # queries are (args, position, extra key) tuples; the ones the map
+        # cache cannot answer are deduplicated and sent in one burst
+        cache = self.map_cache
+        scene = self.current_scene_id if cache is not None else None
+        results = [None] * len(queries)
+        misses = OrderedDict()
+        for i, (args, position, extra) in enumerate(queries):
+            if cache is None:
+                key = i
+            else:
+                key = cache.key(scene, cmd, position, *extra)
+                j = cache.get(key)
+                if j is not None:
+                    results[i] = j
+                    continue
+            misses.setdefault(key, (args, []))[1].append(i)
+        if misses:
+            replies = self.remote.command_many([(cmd, args) for args, _ in misses.values()])
+            for (key, (_, indices)), j in zip(misses.items(), replies):
+                if cache is not None:
+                    cache.put(key, j)
+                for i in indices:
+                    results[i] = j
+        return [Transform.from_json(j) for j in results]
+
     @accepts(Transform, Vector)
     def set_nav_origin(self, transform, offset=Vector()):
         self.remote.command(
@@ -303,9 +625,11 @@ class Simulator:
                 "offset": offset.to_json(),
             }
         )
+        if self.map_cache is not None:
+            self.map_cache.discard("map/from_nav")
 
     def get_nav_origin(self):
-        res = self.remote.command("navigation/get_origin")
+        res = self.remote.query("navigation/get_origin")
         nav_origin = None
         if res:
             nav_origin = {
@@ -316,7 +640,7 @@ class Simulator:
 
     @accepts(Vector, Vector, int, float)
     def raycast(self, origin, direction, layer_mask=-1, max_distance=float("inf")):
-        hit = self.remote.command("simulator/raycast", [{
+        hit = self.remote.query("simulator/raycast", [{
             "origin": origin.to_json(),
             "direction": direction.to_json(),
             "layer_mask": layer_mask,
@@ -336,7 +660,7 @@ class Simulator:
                 "max_distance": arg["max_distance"]
             })
 
-        hits = self.remote.command("simulator/raycast", jarr)
+        hits = self.remote.query("simulator/raycast", jarr)
         results = []
         for hit in hits:
             if hit is None:
@@ -346,11 +670,54 @@ class Simulator:
 
         return results
 
+    def raycast_array(self, origins, directions, layer_mask=-1, max_distance=float("inf"), chunk_size=1000):
+        """Casts the rays of (N, 3) origins and directions arrays
+
+        layer_mask and max_distance are scalars or length N arrays. Rays are
+        sent in simulator/raycast commands of at most chunk_size rays, all
+        pipelined in one burst. Returns RaycastHits of arrays: a boolean hit
+        mask of shape (N,), distance (N,) and point and normal (N, 3), which
+        are NaN for rays that hit nothing.
+        """
+        origins = numpy.asarray(origins, dtype=float).reshape(-1, 3)
+        directions = numpy.asarray(directions, dtype=float).reshape(-1, 3)
+        if origins.shape != directions.shape:
+            raise ValueError("origins and directions should have the same shape")
+        count = len(origins)
+        layer_masks = numpy.broadcast_to(numpy.asarray(layer_mask, dtype=numpy.int64), (count,)).tolist()
+        max_distances = numpy.broadcast_to(numpy.asarray(max_distance, dtype=float), (count,)).tolist()
+
+        rays = [
+            {
+                "origin": {"x": o[0], "y": o[1], "z": o[2]},
+                "direction": {"x": d[0], "y": d[1], "z": d[2]},
+                "layer_mask": m,
+                "max_distance": r,
+            }
+            for o, d, m, r in zip(origins.tolist(), directions.tolist(), layer_masks, max_distances)
+        ]
+        chunks = [rays[i:i + chunk_size] for i in range(0, count, chunk_size)]
+        replies = self.remote.command_many([("simulator/raycast", chunk) for chunk in chunks])
+
+        distance = numpy.full(count, numpy.nan)
+        point = numpy.full((count, 3), numpy.nan)
+        normal = numpy.full((count, 3), numpy.nan)
+        k = 0
+        for hits in replies:
+            for hit in hits:
+                if hit is not None:
+                    distance[k] = hit["distance"]
+                    p, n = hit["point"], hit["normal"]
+                    point[k] = (p["x"], p["y"], p["z"])
+                    normal[k] = (n["x"], n["y"], n["z"])
+                k += 1
+        return RaycastHits(~numpy.isnan(distance), distance, point, normal)
+
     @accepts(str, (ObjectState, type(None)))
     def controllable_add(self, name, object_state=None):
         if object_state is None: object_state = ObjectState()
         args = {"name": name, "state": object_state.to_json()}
-        j = self.remote.command("simulator/controllable_add", args)
+        j = self.remote.query("simulator/controllable_add", args)
         controllable = Controllable(self.remote, j)
         controllable.name = name
         return controllable
@@ -362,21 +729,21 @@ class Simulator:
 
     @accepts(str)
     def get_controllables(self, control_type=None):
-        j = self.remote.command("controllable/get/all", {
+        j = self.remote.query("controllable/get/all", {
             "type": control_type,
         })
         return [Controllable(self.remote, controllable) for controllable in j]
 
     @accepts(str)
     def get_controllable_by_uid(self, uid):
-        j = self.remote.command("controllable/get", {
+        j = self.remote.query("controllable/get", {
             "uid": uid,
         })
         return Controllable(self.remote, j)
 
     @accepts(Vector, str)
     def get_controllable(self, position, control_type=None):
-        j = self.remote.command("controllable/get", {
+        j = self.remote.query("controllable/get", {
             "position": position.to_json(),
             "type": control_type,
         })
@@ -0,0 +1,139 @@
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+import threading
+import traceback
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+
+class CommandStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency_sum = 0.0
+        self.latency_min = None
+        self.latency_max = None
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+    def to_json(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "latency": {
+                "sum": self.latency_sum,
+                "min": self.latency_min,
+                "max": self.latency_max,
+                "buckets": list(zip(LATENCY_BUCKETS, self.buckets)),
+            },
+        }
+
+
+class Stats:
+    """Per-command counters collected by Remote
+
+    Every command records its call count, errors, in-flight count, request
+    and response sizes and a latency histogram measured from the moment it
+    is queued until its reply is decoded. Hooks added with add_hook() are
+    called for every reply, or only for one command name, with
+    (name, latency, bytes_sent, bytes_received, error) on the connection
+    thread, so they should return quickly.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.commands = {}
+        self.hooks = {}
+
+    def add_hook(self, fn, command=None):
+        self.hooks.setdefault(command, []).append(fn)
+
+    def remove_hook(self, fn, command=None):
+        self.hooks.get(command, []).remove(fn)
+
+    def sent(self, name, size):
+        with self.lock:
+            stats = self.commands.get(name)
+            if stats is None:
+                stats = self.commands[name] = CommandStats()
+            stats.count += 1
+            stats.in_flight += 1
+            stats.bytes_sent += size
+
+    def received(self, name, size, latency, sent_size=0, error=None):
+        with self.lock:
+            stats = self.commands[name]
+            stats.in_flight -= 1
+            stats.bytes_received += size
+            if error is not None:
+                stats.errors += 1
+            stats.latency_sum += latency
+            if stats.latency_min is None or latency < stats.latency_min:
+                stats.latency_min = latency
+            if stats.latency_max is None or latency > stats.latency_max:
+                stats.latency_max = latency
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    stats.buckets[i] += 1
+                    break
+
+        for fn in self.hooks.get(None, []) + self.hooks.get(name, []):
+            try:
+                fn(name, latency, sent_size, size, error)
+            except Exception:
+                traceback.print_exc()
+
+    @property
+    def in_flight(self):
+        return sum(stats.in_flight for stats in self.commands.values())
+
+    def reset(self):
+        with self.lock:
+            commands, self.commands = self.commands, {}
+            for name, old in commands.items():
+                stats = self.commands[name] = CommandStats()
+                stats.in_flight = old.in_flight
+
+    def to_json(self):
+        with self.lock:
+            return {name: stats.to_json() for name, stats in self.commands.items()}
+
+    def to_prometheus(self, prefix="lgsvl_command"):
+        """Returns the counters in the Prometheus text exposition format"""
+        lines = []
+
+        def metric(name, kind, help, samples):
+            lines.append("# HELP {}_{} {}".format(prefix, name, help))
+            lines.append("# TYPE {}_{} {}".format(prefix, name, kind))
+            for labels, value in samples:
+                lines.append("{}_{}{{{}}} {}".format(prefix, name, labels, value))
+
+        with self.lock:
+            commands = sorted(self.commands.items())
+            metric("calls_total", "counter", "Commands sent", [('command="{}"'.format(n), s.count) for n, s in commands])
+            metric("errors_total", "counter", "Commands answered with an error", [('command="{}"'.format(n), s.errors) for n, s in commands])
+            metric("in_flight", "gauge", "Commands waiting for a reply", [('command="{}"'.format(n), s.in_flight) for n, s in commands])
+            metric("sent_bytes_total", "counter", "Encoded request size", [('command="{}"'.format(n), s.bytes_sent) for n, s in commands])
+            metric("received_bytes_total", "counter", "Encoded response size", [('command="{}"'.format(n), s.bytes_received) for n, s in commands])
+
+            lines.append("# HELP {}_latency_seconds Time from queueing a command until its reply is decoded".format(prefix))
+            lines.append("# TYPE {}_latency_seconds histogram".format(prefix))
+            for n, s in commands:
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, s.buckets):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append('{}_latency_seconds_bucket{{command="{}",le="{}"}} {}'.format(prefix, n, le, cumulative))
+                lines.append('{}_latency_seconds_sum{{command="{}"}} {}'.format(prefix, n, s.latency_sum))
+                lines.append('{}_latency_seconds_count{{command="{}"}} {}'.format(prefix, n, cumulative))
+        return "\n".join(lines) + "\n"
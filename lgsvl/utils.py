@@ -4,29 +4,55 @@
 # This software contains code licensed as described in LICENSE.
 #
 
-from .geometry import Vector, Transform
+from .geometry import Vector, Transform, Slotted
 
+from environs import Env
+import functools
 import math
 import inspect
+import numpy
+
+# Columns of the arrays built by states_to_array()
+OBJECT_STATE_FIELDS = ("position", "rotation", "velocity", "angular_velocity")
+
+# LGSVL__TYPE_CHECKS=0 leaves @accepts functions undecorated, see set_type_checks()
+DECORATE = Env().bool("LGSVL__TYPE_CHECKS", True)
+TYPE_CHECKS = DECORATE
+
+
+def set_type_checks(enabled):
+    """Turns the argument checks of @accepts decorated functions on or off at runtime
+
+    Starting with LGSVL__TYPE_CHECKS=0 in the environment removes the checks
+    entirely: functions are then left undecorated when lgsvl is imported, and
+    checks cannot be turned back on.
+    """
+    global TYPE_CHECKS
+    TYPE_CHECKS = bool(enabled)
 
 
 def accepts(*types):
     def check_accepts(f):
         assert len(types) + 1 == f.__code__.co_argcount
+        if not DECORATE:
+            return f
+        # (index, name, types) of each checked positional argument
+        checks = tuple(zip(range(1, len(types) + 1), inspect.getfullargspec(f)[0][1:], types))
 
+        @functools.wraps(f)
         def new_f(*args, **kwargs):
-            names = inspect.getfullargspec(f)[0]
-            it = zip(args[1:], types, names[1:])
-            for (a, t, n) in it:
-                if not isinstance(a, t):
-                    raise TypeError("Argument '{}' should have '{}' type".format(n, t))
+            if TYPE_CHECKS:
+                for i, n, t in checks:
+                    if i < len(args) and not isinstance(args[i], t):
+                        raise TypeError("Argument '{}' should have '{}' type".format(n, t))
             return f(*args, **kwargs)
-        new_f.__name__ = f.__name__
         return new_f
     return check_accepts
 
 
-class ObjectState:
+class ObjectState(Slotted):
+    __slots__ = ("transform", "velocity", "angular_velocity")
+
     def __init__(self, transform=None, velocity=None, angular_velocity=None):
         if transform is None:
             transform = Transform()
@@ -79,6 +105,52 @@ class ObjectState:
         )
 
 
+def states_to_array(uids, states):
+    """Packs JSON object states into a NumPy structured array
+
+    Every row has a "uid" and a float64 (x, y, z) column for each of
+    OBJECT_STATE_FIELDS, without building Vector objects on the way.
+    """
+    width = max([len(uid) for uid in uids] + [1])
+    dtype = [("uid", "U{}".format(width))] + [(name, numpy.float64, (3,)) for name in OBJECT_STATE_FIELDS]
+    array = numpy.zeros(len(states), dtype=dtype)
+    array["uid"] = uids
+    values = numpy.array([
+        [
+            j["transform"]["position"]["x"], j["transform"]["position"]["y"], j["transform"]["position"]["z"],
+            j["transform"]["rotation"]["x"], j["transform"]["rotation"]["y"], j["transform"]["rotation"]["z"],
+            j["velocity"]["x"], j["velocity"]["y"], j["velocity"]["z"],
+            j["angular_velocity"]["x"], j["angular_velocity"]["y"], j["angular_velocity"]["z"],
+        ]
+        for j in states
+    ], dtype=numpy.float64).reshape(len(states), len(OBJECT_STATE_FIELDS), 3)
+    for i, name in enumerate(OBJECT_STATE_FIELDS):
+        array[name] = values[:, i]
+    return array
+
+
+def array_to_states(array):
+    """Turns a structured array like the one from states_to_array() into (uid, JSON state) pairs
+
+    The "uid", "position" and "rotation" columns are required, missing
+    velocity columns are sent as zero.
+    """
+    zero = [[0.0, 0.0, 0.0]] * len(array)
+    columns = [array[name].tolist() if name in array.dtype.names else zero for name in OBJECT_STATE_FIELDS]
+
+    def xyz(v):
+        return {"x": v[0], "y": v[1], "z": v[2]}
+
+    return [
+        (uid, {
+            "transform": {"position": xyz(position), "rotation": xyz(rotation)},
+            "velocity": xyz(velocity),
+            "angular_velocity": xyz(angular_velocity),
+        })
+        for uid, position, rotation, velocity, angular_velocity in zip(array["uid"].tolist(), *columns)
+    ]
+
+
 def transform_to_matrix(tr):
     px = tr.position.x
     py = tr.position.y
@@ -170,3 +242,106 @@ def vector_multiply(v, m):
     for i in range(3):
         tmp[i] = v.x * m[0][i] + v.y * m[1][i] + v.z * m[2][i] + m[3][i]
     return Vector(tmp[0], tmp[1], tmp[2])
+
+
+# Batched versions of the functions above. Positions, rotations (Euler
+# angles in degrees) and points are (..., 3) arrays, anything numpy.asarray
+# accepts such as VectorArray; matrices are (..., 4, 4) in the same row
+# vector convention as transform_to_matrix, so p' = [p, 1] @ m.
+
+def rotations_to_basis(rotations):
+    """Returns the (..., 3, 3) rotation matrices whose rows are right, up and forward"""
+    a = numpy.radians(numpy.asarray(rotations, dtype=float))
+    sx, cx = numpy.sin(a[..., 0]), numpy.cos(a[..., 0])
+    sy, cy = numpy.sin(a[..., 1]), numpy.cos(a[..., 1])
+    sz, cz = numpy.sin(a[..., 2]), numpy.cos(a[..., 2])
+
+    basis = numpy.empty(a.shape[:-1] + (3, 3))
+    basis[..., 0, 0] = sx * sy * sz + cy * cz
+    basis[..., 0, 1] = cx * sz
+    basis[..., 0, 2] = sx * cy * sz - sy * cz
+    basis[..., 1, 0] = sx * sy * cz - cy * sz
+    basis[..., 1, 1] = cx * cz
+    basis[..., 1, 2] = sy * sz + sx * cy * cz
+    basis[..., 2, 0] = cx * sy
+    basis[..., 2, 1] = -sx
+    basis[..., 2, 2] = cx * cy
+    return basis
+
+
+def transforms_to_matrices(positions, rotations):
+    """Batched transform_to_matrix, returns (..., 4, 4) matrices"""
+    positions = numpy.asarray(positions, dtype=float)
+    basis = rotations_to_basis(rotations)
+    m = numpy.zeros(numpy.broadcast(positions[..., None, :], basis).shape[:-2] + (4, 4))
+    m[..., :3, :3] = basis
+    m[..., 3, :3] = positions
+    m[..., 3, 3] = 1.0
+    return m
+
+
+def transforms_to_forward(rotations):
+    """Batched transform_to_forward, returns (..., 3) unit vectors"""
+    a = numpy.radians(numpy.asarray(rotations, dtype=float))
+    sx, cx = numpy.sin(a[..., 0]), numpy.cos(a[..., 0])
+    sy, cy = numpy.sin(a[..., 1]), numpy.cos(a[..., 1])
+    return numpy.stack([cx * sy, -sx, cx * cy], axis=-1)
+
+
+def transforms_to_up(rotations):
+    """Batched transform_to_up, returns (..., 3) unit vectors"""
+    return rotations_to_basis(rotations)[..., 1, :]
+
+
+def transforms_to_right(rotations):
+    """Batched transform_to_right, returns (..., 3) unit vectors"""
+    return rotations_to_basis(rotations)[..., 0, :]
+
+
+def matrices_inverse(m):
+    """Batched matrix_inverse, for rigid transformation matrices only"""
+    m = numpy.asarray(m, dtype=float)
+    rotation = numpy.swapaxes(m[..., :3, :3], -1, -2)
+    inverse = numpy.zeros(m.shape)
+    inverse[..., :3, :3] = rotation
+    inverse[..., 3, :3] = -numpy.einsum("...i,...ij->...j", m[..., 3, :3], rotation)
+    inverse[..., 3, 3] = 1.0
+    return inverse
+
+
+def matrices_multiply(a, b):
+    """Batched matrix_multiply, broadcasting like numpy.matmul"""
+    return numpy.matmul(a, b)
+
+
+def points_multiply(points, m):
+    """Batched vector_multiply: transforms (..., 3) points by (..., 4, 4) matrices"""
+    points = numpy.asarray(points, dtype=float)
+    m = numpy.asarray(m, dtype=float)
+    return numpy.einsum("...i,...ij->...j", points, m[..., :3, :3]) + m[..., 3, :3]
+
+
+def local_to_world(points, positions, rotations):
+    """Transforms points from the frames of transforms to world space
+
+    With points of the same shape as positions each point belongs to the
+    transform at the same index. Otherwise every transform applies to a
+    group of points along the second to last axis, e.g. (N, 8, 3) box
+    corners for N transforms, or (M, 3) points for a single transform.
+    """
+    points = numpy.asarray(points, dtype=float)
+    positions = numpy.asarray(positions, dtype=float)
+    basis = rotations_to_basis(rotations)
+    if points.shape == positions.shape:
+        return numpy.einsum("...i,...ij->...j", points, basis) + positions
+    return numpy.einsum("...mi,...ij->...mj", points, basis) + positions[..., None, :]
+
+
+def world_to_local(points, positions, rotations):
+    """Inverse of local_to_world, with the same rules for the shape of points"""
+    points = numpy.asarray(points, dtype=float)
+    positions = numpy.asarray(positions, dtype=float)
+    basis = rotations_to_basis(rotations)
+    if points.shape == positions.shape:
+        return numpy.einsum("...j,...ij->...i", points - positions, basis)
+    return numpy.einsum("...mj,...ij->...mi", points - positions[..., None, :], basis)
@@ -0,0 +1,111 @@
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+from .simulator import Simulator
+
+from concurrent.futures import ThreadPoolExecutor
+from collections import namedtuple
+from environs import Env
+import numpy
+
+VectorObservation = namedtuple("VectorObservation", "frame time states events")
+
+env = Env()
+
+
+def parse_endpoints(hosts, default_port=8181):
+    """Splits "host1:8181,host2,host3:8182" into [(host, port), ...]"""
+    endpoints = []
+    for entry in hosts.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        host, _, port = entry.rpartition(":") if ":" in entry else (entry, "", "")
+        endpoints.append((host, int(port) if port else default_port))
+    return endpoints
+
+
+class VectorEnv:
+    """Drives several simulators in lockstep, one thread per simulator
+
+    endpoints is a list of (host, port) pairs and defaults to the
+    comma separated LGSVL__SIMULATOR_HOSTS variable, e.g.
+    "node1:8181,node2:8181"; entries without a port use
+    LGSVL__SIMULATOR_PORT. Keyword options are passed to every Simulator.
+
+    setup(sim) prepares a scene and returns the agents to observe, the same
+    number in every simulator. act(sim, agents, action), if given, applies
+    one action per simulator; its commands are sent in the same burst as
+    the step. Observations are stacked, so states has shape (K, N) for K
+    simulators and N agents with the columns of get_agent_states().
+
+        envs = lgsvl.VectorEnv(setup=spawn_ego, act=drive, dt=0.1)
+        obs = envs.reset()
+        while True:
+            obs = envs.step(policy(obs.states))
+    """
+
+    def __init__(self, endpoints=None, setup=None, act=None, dt=0.1, **options):
+        if endpoints is None:
+            endpoints = parse_endpoints(
+                env.str("LGSVL__SIMULATOR_HOSTS", env.str("LGSVL__SIMULATOR_HOST", "localhost")),
+                env.int("LGSVL__SIMULATOR_PORT", 8181),
+            )
+        if not endpoints:
+            raise ValueError("At least one simulator endpoint is required")
+        self.setup = setup
+        self.act = act
+        self.dt = dt
+        self.executor = ThreadPoolExecutor(max_workers=len(endpoints))
+        self.sims = list(self.executor.map(lambda e: Simulator(e[0], e[1], **options), endpoints))
+        self.agents = [[] for _ in self.sims]
+
+    def __len__(self):
+        return len(self.sims)
+
+    def map(self, fn, *iterables):
+        """Calls fn(sim, ...) on every simulator concurrently and returns the results in order"""
+        return list(self.executor.map(fn, self.sims, *iterables))
+
+    def reset(self):
+        def reset(sim):
+            sim.reset()
+            return list(self.setup(sim)) if self.setup is not None else []
+
+        self.agents = self.map(reset)
+        return self.observe()
+
+    def observe(self):
+        """Reads the current VectorObservation without stepping"""
+        def observe(sim, agents):
+            frame, time = sim.remote.command_many([("simulator/current_frame", {}), ("simulator/current_time", {})])
+            return frame, time, sim.get_agent_states(agents, as_array=True), []
+
+        return self.stack(self.map(observe, self.agents))
+
+    def step(self, actions=None):
+        """Steps every simulator by dt and returns a VectorObservation"""
+        if actions is None:
+            actions = [None] * len(self.sims)
+        if len(actions) != len(self.sims):
+            raise ValueError("Expected {} actions, got {}".format(len(self.sims), len(actions)))
+
+        def step(sim, agents, action):
+            with sim.batch():
+                if self.act is not None:
+                    self.act(sim, agents, action)
+                return sim.step(self.dt, agents, as_array=True)
+
+        return self.stack(self.map(step, self.agents, actions))
+
+    @staticmethod
+    def stack(observations):
+        frames, times, states, events = zip(*observations)
+        return VectorObservation(numpy.array(frames), numpy.array(times), numpy.stack(states), list(events))
+
+    def close(self):
+        self.map(lambda sim: sim.close())
+        self.executor.shutdown()
@@ -85,23 +85,25 @@ print()
 print("Stepping forward for {} steps of {}s per step" .format(steps, step_time))
 input("Press Enter to start:")
 
-# The simulator can be run for a set amount of time.
-# time_limit is optional and if omitted or set to 0, then the simulator will run indefinitely
+# sim.step() writes the given agent states, runs the simulator for step_time seconds
+# and reads back the frame, time and the states of the listed agents in one round trip
+driving = not ego.bridge_connected
+states = None
 t0 = time.time()
 for i in range(steps):
     t1 = time.time()
-    sim.run(time_limit=step_time)
+    obs = sim.step(step_time, [ego], states)
     t2 = time.time()
-    s2 = sim.current_time
+    s2 = obs.time
 
-    state = ego.state
+    state = obs.states[ego.uid]
     pos = state.position
     speed = state.speed * 3.6
 
-    # if Apollo is not driving
-    if not ego.bridge_connected:
+    # if Apollo is not driving, keep the speed up in the next step
+    if driving:
         state.velocity = 20 * forward
-        ego.state = state
+        states = {ego: state}
 
     print("Sim time = {:5.2f}".format(s2 - s1) + "; Real time elapsed = {:5.3f}; ".format(t2 - t1), end='')
     print("Speed = {:4.1f}; Position = {:5.3f},{:5.3f},{:5.3f}".format(speed, pos.x, pos.y, pos.z))
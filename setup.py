@@ -91,7 +91,7 @@ setup(
     author_email="contact@svlsimulator.com",
     python_requires=">=3.6.0",
     url="https://github.com/lgsvl/PythonAPI",
-    packages=["lgsvl", "lgsvl.dreamview", "lgsvl.evaluator", "lgsvl.wise"],
+    packages=["lgsvl", "lgsvl.aio", "lgsvl.mock", "lgsvl.dreamview", "lgsvl.evaluator", "lgsvl.wise"],
     install_requires=[
         "environs",
         "numpy",
@@ -106,6 +106,10 @@ setup(
         "ci": [
             "flake8>=3.7.0"
         ],
+        "fast": [
+            "msgpack",
+            "orjson"
+        ],
     },
     zip_safe=True,
     maintainer='Hadi Tabatabaee',
@@ -12,6 +12,12 @@ from .test_NPC import TestNPC
 from .test_sensors import TestSensors
 from .test_peds import TestPeds
 from .test_utils import TestUtils
+from .test_geometry import TestGeometry
+from .test_remote import TestRemote
+from .test_async import TestAsync
+from .test_replay import TestReplay
+from .test_mock import TestMock
+from .test_vector_env import TestVectorEnv
 
 
 def load_tests(loader, standard_tests, pattern):
@@ -22,5 +28,11 @@ def load_tests(loader, standard_tests, pattern):
     suite.addTests(loader.loadTestsFromTestCase(TestSensors))
     suite.addTests(loader.loadTestsFromTestCase(TestPeds))
     suite.addTests(loader.loadTestsFromTestCase(TestUtils))
+    suite.addTests(loader.loadTestsFromTestCase(TestGeometry))
+    suite.addTests(loader.loadTestsFromTestCase(TestRemote))
+    suite.addTests(loader.loadTestsFromTestCase(TestAsync))
+    suite.addTests(loader.loadTestsFromTestCase(TestReplay))
+    suite.addTests(loader.loadTestsFromTestCase(TestMock))
+    suite.addTests(loader.loadTestsFromTestCase(TestVectorEnv))
     suite.addTests(loader.loadTestsFromTestCase(TestSimulator)) #must be last
     return suite
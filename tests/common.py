@@ -4,8 +4,10 @@
 # This software contains code licensed as described in LICENSE.
 #
 
+import functools
 import signal
 import lgsvl
+import lgsvl.mock.server
 import os
 
 class TestTimeout(Exception):
@@ -16,6 +18,35 @@ class TestException(Exception):
     pass
 
 
+def connect(timeout=None):
+    return lgsvl.Simulator(os.environ.get("LGSVL__SIMULATOR_HOST", "127.0.0.1"), int(os.environ.get("LGSVL__SIMULATOR_PORT", 8181)), timeout=timeout)
+
+
+MOCK = None
+
+
+def connected_to_mock():
+    global MOCK
+    if MOCK is None:
+        sim = connect()
+        try:
+            MOCK = sim.version == lgsvl.mock.server.VERSION
+        finally:
+            sim.close()
+    return MOCK
+
+
+def skipOnMock(reason):  # Skips tests that need what lgsvl.mock does not model
+    def decorator(test):
+        @functools.wraps(test)
+        def wrapper(self, *args, **kwargs):
+            if connected_to_mock():
+                self.skipTest("Not supported by lgsvl.mock: {}".format(reason))
+            return test(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
 class SimConnection:
     def __init__(self, seconds=30, scene=lgsvl.wise.DefaultAssets.map_borregasave, error_message=None, load_scene=True):
         if error_message is None:
@@ -32,7 +63,7 @@ class SimConnection:
         signal.signal(signal.SIGALRM, self.handle_timeout)
         signal.alarm(self.seconds)
 
-        self.sim = lgsvl.Simulator(os.environ.get("LGSVL__SIMULATOR_HOST", "127.0.0.1"), 8181)
+        self.sim = connect(self.seconds)
         if self.load_scene:
             if self.sim.current_scene == self.scene:
                 self.sim.reset()
@@ -8,7 +8,7 @@ import unittest
 import math
 
 import lgsvl
-from .common import SimConnection, spawnState, cmEqual
+from .common import SimConnection, spawnState, cmEqual, skipOnMock
 
 
 # TODO add tests for bridge connection
@@ -48,6 +48,7 @@ class TestEGO(unittest.TestCase):
 
             cmEqual(self, agent.state.velocity, state.velocity, "50 Velocity")
 
+    @skipOnMock("expects vehicle physics to damp the initial velocity")
     def test_ego_different_directions(self):  # Check that the xyz velocities equate to xyz changes in position
         with SimConnection(60) as sim:
             state = spawnState(sim)
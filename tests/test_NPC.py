@@ -7,7 +7,7 @@
 import unittest
 import time
 import lgsvl
-from .common import SimConnection, spawnState, cmEqual, mEqual, TestException
+from .common import SimConnection, spawnState, cmEqual, mEqual, TestException, skipOnMock
 
 PROBLEM = "Object reference not set to an instance of an object"
 
@@ -72,6 +72,7 @@ class TestNPC(unittest.TestCase):
             # self.assertAlmostEqual(agent.state.speed, 5.6, delta=1)
             self.assertLess(agent.state.position.x - sim.get_spawn()[0].position.x, 5.6*2)
 
+    @skipOnMock("expects the BorregasAve spawn rotation")
     def test_rotate_NPC(self):  # Check if NPC can be rotated
         with SimConnection() as sim:
             state = spawnState(sim)
@@ -106,6 +107,7 @@ class TestNPC(unittest.TestCase):
             with self.assertRaises(ValueError):
                 sim.add_agent("SUV", lgsvl.AgentType(9), spawnState(sim))
 
+    @skipOnMock("agents are kinematic, there is no gravity")
     def test_upsidedown_NPC(self):  # Check that an upside-down NPC keeps falling
         with SimConnection() as sim:
             state = spawnState(sim)
@@ -120,6 +122,7 @@ class TestNPC(unittest.TestCase):
             final_height = agent.state.position.y
             self.assertLess(final_height, initial_height)
 
+    @skipOnMock("agents are kinematic, there is no gravity")
     def test_flying_NPC(self):  # Check if an NPC created above the map falls
         with SimConnection() as sim:
             state = spawnState(sim)
@@ -135,6 +138,7 @@ class TestNPC(unittest.TestCase):
             final_height = agent.state.position.y
             self.assertLess(final_height, initial_height)
 
+    @skipOnMock("agents are kinematic, there is no gravity")
     def test_underground_NPC(self):  # Check if an NPC created below the map keeps falling
         with SimConnection() as sim:
             state = spawnState(sim)
@@ -222,6 +226,7 @@ class TestNPC(unittest.TestCase):
 
             self.assertLess((agent.state.position - destination).magnitude(), 1)
 
+    @skipOnMock("expects NPC physics to damp the initial velocity")
     def test_npc_different_directions(self):  # Check that specified velocities match the NPC's movement
         with SimConnection() as sim:
             state = spawnState(sim)
@@ -297,6 +302,7 @@ class TestNPC(unittest.TestCase):
             sim.run(1)
             self.assertEqual(npc.state.speed,0)
 
+    @skipOnMock("expects the BorregasAve lanes")
     def test_lane_change_right(self):
         with SimConnection(40) as sim:
             state = lgsvl.AgentState()
@@ -323,6 +329,7 @@ class TestNPC(unittest.TestCase):
             self.assertTrue(npc == agents[0])
             self.assertAlmostEqual((npc.state.position - target).magnitude(), 0, delta=2)
 
+    @skipOnMock("expects the BorregasAve lanes")
     def test_lane_change_right_missing_lane(self):
         with SimConnection(40) as sim:
             state = lgsvl.AgentState()
@@ -349,6 +356,7 @@ class TestNPC(unittest.TestCase):
             self.assertTrue(len(agents)== 0)
             self.assertAlmostEqual((npc.state.position - target).magnitude(), 0, delta=2)
 
+    @skipOnMock("expects the BorregasAve lanes")
     def test_lane_change_left(self):
         with SimConnection(40) as sim:
             state = lgsvl.AgentState()
@@ -375,6 +383,7 @@ class TestNPC(unittest.TestCase):
             self.assertTrue(npc == agents[0])
             self.assertAlmostEqual((npc.state.position - target).magnitude(), 0, delta=2)
 
+    @skipOnMock("expects the BorregasAve lanes")
     def test_lane_change_left_opposing_traffic(self):
         with SimConnection(40) as sim:
             state = lgsvl.AgentState()
@@ -481,6 +490,7 @@ class TestNPC(unittest.TestCase):
             sim.run(2)
             self.assertGreater(npc.state.speed, 0)
 
+    @skipOnMock("measures wall clock time of real time simulation")
     def test_waypoint_speed(self):
         with SimConnection(60) as sim:
             state = lgsvl.AgentState()
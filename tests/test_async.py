@@ -0,0 +1,100 @@
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+import asyncio
+import time
+import unittest
+
+import lgsvl
+from lgsvl.aio import AsyncSimulator, AsyncRemote
+from lgsvl.remote import ConnectionLost
+
+from .test_remote import StandInServer
+
+
+def scenario(name, args):
+    if name == "simulator/current_scene":
+        return "BorregasAve"
+    if name == "simulator/add_agent":
+        return "npc-{}".format(args["name"])
+    if name == "agent/state/get":
+        state = lgsvl.AgentState()
+        state.transform.position = lgsvl.Vector(1, 2, 3)
+        return state.to_json()
+    if name == "simulator/run":
+        return {"events": [{"type": "waypoint_reached", "agent": "npc-Sedan", "index": 4}]}
+    return None
+
+
+class TestAsync(unittest.TestCase):
+    def run_async(self, coroutine):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
+
+    def test_simulator(self):  # Check that the awaitable API mirrors the synchronous one
+        server = StandInServer(scenario)
+
+        async def main():
+            reached = []
+
+            async def on_waypoint(agent, index):
+                reached.append((agent.uid, index))
+
+            async with AsyncSimulator("127.0.0.1", server.port) as sim:
+                self.assertEqual(await sim.current_scene, "BorregasAve")
+                npc = await sim.add_agent("Sedan", lgsvl.AgentType.NPC)
+                self.assertIsInstance(npc, lgsvl.aio.NpcVehicle)
+                state = await npc.state
+                self.assertEqual(state.position.z, 3)
+                await npc.set_state(state)
+                await npc.on_waypoint_reached(on_waypoint)
+                await sim.run(1.0)
+            return reached
+
+        try:
+            self.assertEqual(self.run_async(main()), [("npc-Sedan", 4)])
+            self.assertEqual([r["command"] for r in server.received][-3:], ["agent/on_waypoint_reached", "simulator/run", "simulator/continue"])
+        finally:
+            server.stop()
+
+    def test_concurrent_sessions(self):  # Check that many connections share one loop without blocking each other
+        servers = [StandInServer(scenario, latency=0.05) for _ in range(4)]
+
+        async def session(port):
+            async with AsyncSimulator("127.0.0.1", port) as sim:
+                return await sim.current_scene
+
+        async def main():
+            return await asyncio.gather(*[session(s.port) for s in servers])
+
+        try:
+            start = time.monotonic()
+            self.assertEqual(self.run_async(main()), ["BorregasAve"] * 4)
+            self.assertLess(time.monotonic() - start, 4 * 0.05)
+        finally:
+            for s in servers:
+                s.stop()
+
+    def test_connection_lost(self):  # Check that commands issued after the connection dropped raise instead of hanging
+        server = StandInServer(scenario)
+
+        async def main():
+            remote = await AsyncRemote("127.0.0.1", server.port).connect()
+            self.assertEqual(await remote.command("simulator/current_scene"), "BorregasAve")
+            await asyncio.get_event_loop().run_in_executor(None, server.drop)
+            await asyncio.wait_for(remote.reader, 5)
+            with self.assertRaises(ConnectionLost):
+                await asyncio.wait_for(remote.command("simulator/current_scene"), 5)
+            self.assertEqual(remote.in_flight, 0)
+            await remote.close()
+
+        try:
+            self.run_async(main())
+        finally:
+            server.stop()
@@ -7,7 +7,7 @@
 import unittest
 
 import lgsvl
-from .common import SimConnection, spawnState
+from .common import SimConnection, spawnState, skipOnMock
 
 # TODO add tests for collisions between NPCs, EGO & obstacles
 
@@ -111,6 +111,7 @@ class TestCollisions(unittest.TestCase):
             self.assertTrue(collisions[0][0].name == "Jeep" or collisions[0][1].name == "Jeep")
             self.assertTrue(collisions[0][0].name == "SchoolBus" or collisions[0][1].name == "SchoolBus")
 
+    @skipOnMock("there is no static map geometry to collide with")
     def test_wall_collision(self):  # Check that an EGO collision with a wall is reported properly
         with SimConnection() as sim:
             state = spawnState(sim)
@@ -0,0 +1,141 @@
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+import pickle
+import unittest
+import warnings
+
+import numpy
+
+import lgsvl
+
+from .common import cmEqual
+
+
+class TestGeometry(unittest.TestCase):
+    def test_vector_array(self):
+        vectors = [lgsvl.Vector(1, 2, 3), lgsvl.Vector(-4, 0, 0.5), lgsvl.Vector(0, 0, 0)]
+        array = lgsvl.VectorArray.from_vectors(vectors)
+        self.assertEqual(len(array), 3)
+        for a, b in zip(array, vectors):
+            cmEqual(self, a, b, "round trip")
+        self.assertEqual(lgsvl.VectorArray.from_json(array.to_json()).data.tolist(), array.data.tolist())
+
+        offset = lgsvl.Vector(1, 1, 1)
+        for i, v in enumerate(vectors):
+            cmEqual(self, (array + offset)[i], v + offset, "add")
+            cmEqual(self, (array - offset)[i], v - offset, "sub")
+            cmEqual(self, (offset + array)[i], offset + v, "reflected add")
+            cmEqual(self, (offset - array)[i], offset - v, "reflected sub")
+            cmEqual(self, (array * offset)[i], v * offset, "mul by vector")
+            cmEqual(self, (offset * array)[i], offset * v, "reflected mul by vector")
+            cmEqual(self, (2 * array)[i], v * 2, "mul")
+            cmEqual(self, (-array)[i], -v, "neg")
+            self.assertAlmostEqual(array.magnitude()[i], v.magnitude())
+        numpy.testing.assert_allclose(array.dot(offset), [6, -3.5, 0])
+        cmEqual(self, array.cross(lgsvl.Vector(0, 0, 1))[0], lgsvl.Vector(2, -1, 0), "cross")
+        numpy.testing.assert_allclose(array.normalized().magnitude(), [1, 1, 0])
+        numpy.testing.assert_allclose((array * numpy.array([[2], [0], [1]])).data[:2], [[2, 4, 6], [0, 0, 0]])
+
+        with self.assertRaises(ValueError):
+            lgsvl.VectorArray(numpy.zeros((3, 2)))
+        for operand in ("a", None, numpy.array([1.0, 2.0, 3.0])):
+            with self.assertRaises(TypeError):
+                offset + operand
+            with self.assertRaises(TypeError):
+                offset - operand
+            with self.assertRaises(TypeError):
+                offset * operand
+
+    def test_views(self):
+        data = numpy.zeros((4, 3))
+        array = lgsvl.VectorArray(data)
+        array.x[:] = 1
+        array[1:3] = lgsvl.Vector(0, 5, 0)
+        self.assertIs(numpy.asarray(array), data)
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            self.assertFalse(numpy.shares_memory(numpy.array(array), data))
+            self.assertEqual(numpy.asarray(array, dtype=numpy.float32).dtype, numpy.float32)
+            pairs = numpy.zeros((2, 2, 3))
+            self.assertIs(numpy.asarray(lgsvl.TransformArray(pairs)), pairs)
+            self.assertFalse(numpy.shares_memory(numpy.array(lgsvl.TransformArray(pairs)), pairs))
+        self.assertEqual(data[:, 0].tolist(), [1, 0, 0, 1])
+        self.assertEqual(data[:, 1].tolist(), [0, 5, 5, 0])
+
+        transforms = lgsvl.TransformArray.from_arrays(data, data * [0, 0, 90])
+        transforms.position += lgsvl.Vector(0, 0.5, 0)
+        transforms[1:].rotation.y[:] = 30
+        cmEqual(self, transforms[0].position, lgsvl.Vector(1, 0.5, 0), "position")
+        cmEqual(self, transforms[2].rotation, lgsvl.Vector(0, 30, 0), "rotation")
+        self.assertEqual(data[0].tolist(), [1, 0, 0])
+
+    def test_transform_array(self):
+        transforms = [lgsvl.Transform(lgsvl.Vector(i, 0, -i), lgsvl.Vector(0, 10 * i, 0)) for i in range(5)]
+        array = lgsvl.TransformArray.from_transforms(transforms)
+        self.assertEqual(array.to_json(), [t.to_json() for t in transforms])
+        self.assertEqual(lgsvl.TransformArray.from_json(array.to_json()).data.tolist(), array.data.tolist())
+        self.assertEqual(array.position.z.tolist(), [0, -1, -2, -3, -4])
+        cmEqual(self, array[3].rotation, transforms[3].rotation, "index")
+        self.assertEqual(len(array[::2]), 3)
+
+    def test_compact(self):
+        state = lgsvl.AgentState(velocity=lgsvl.Vector(1, 2, 3))
+        waypoint = lgsvl.DriveWaypoint(lgsvl.Vector(1, 0, 0), 5, angle=lgsvl.Vector(0, 90, 0))
+        for obj in (state, state.transform, state.velocity, waypoint, lgsvl.Quaternion(), lgsvl.geometry.Spawn()):
+            self.assertFalse(hasattr(obj, "__dict__"), type(obj).__name__)
+            with self.assertRaises(AttributeError):
+                obj.unknown = 1
+
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            copy = pickle.loads(pickle.dumps([state, waypoint], protocol))
+            self.assertEqual(copy[0].to_json(), state.to_json())
+            cmEqual(self, copy[1].angle, waypoint.angle, "waypoint")
+
+        # Pickled by versions whose classes still had a __dict__
+        old = lgsvl.Vector.__new__(lgsvl.Vector)
+        old.__setstate__({"x": 1, "y": 2, "z": 3})
+        cmEqual(self, old, lgsvl.Vector(1, 2, 3), "old pickle")
+
+    def test_quaternion(self):
+        rng = numpy.random.RandomState(0)
+        angles = rng.uniform(0, 360, (50, 3))
+        angles[:, 0] = rng.uniform(-89, 89, 50) % 360
+        q = lgsvl.geometry.euler_to_quaternion(angles)
+        numpy.testing.assert_allclose(numpy.linalg.norm(q, axis=-1), 1.0)
+
+        # Rotating a vector agrees with the transform matrices
+        v = rng.uniform(-1, 1, (50, 3))
+        expected = numpy.einsum("ni,nij->nj", v, lgsvl.utils.rotations_to_basis(angles))
+        numpy.testing.assert_allclose(lgsvl.geometry.quaternion_rotate(q, v), expected, atol=1e-12)
+
+        numpy.testing.assert_allclose(lgsvl.geometry.quaternion_to_euler(q), angles, atol=1e-9)
+        locked = lgsvl.geometry.euler_to_quaternion([90, 40, 0])
+        numpy.testing.assert_allclose(lgsvl.geometry.quaternion_to_euler(locked), [90, 40, 0], atol=1e-6)
+
+        product = lgsvl.geometry.quaternion_multiply(q[:-1], q[1:])
+        numpy.testing.assert_allclose(
+            lgsvl.geometry.quaternion_rotate(product, v[1:]),
+            lgsvl.geometry.quaternion_rotate(q[:-1], lgsvl.geometry.quaternion_rotate(q[1:], v[1:])), atol=1e-12)
+        identity = lgsvl.geometry.quaternion_multiply(q, lgsvl.geometry.quaternion_inverse(2 * q))
+        numpy.testing.assert_allclose(identity, numpy.tile([0, 0, 0, 0.5], (50, 1)), atol=1e-12)
+
+    def test_quaternion_methods(self):
+        a = lgsvl.Quaternion.from_euler(lgsvl.Vector(0, 90, 0))
+        cmEqual(self, a * lgsvl.Vector(0, 0, 1), lgsvl.Vector(1, 0, 0), "rotate")
+        cmEqual(self, a.to_euler(), lgsvl.Vector(0, 90, 0), "euler")
+        cmEqual(self, (a * a).to_euler(), lgsvl.Vector(0, 180, 0), "product")
+        cmEqual(self, (a * a.inverse()).to_euler(), lgsvl.Vector(0, 0, 0), "inverse")
+        self.assertAlmostEqual(lgsvl.Quaternion(0, 2, 0, 0).normalized().y, 1.0)
+
+        b = lgsvl.Quaternion.from_euler(lgsvl.Vector(0, 350, 0))
+        half = lgsvl.Quaternion.slerp(lgsvl.Quaternion.identity(), b, 0.5)
+        self.assertAlmostEqual(half.to_euler().y, 355.0)
+        mid = lgsvl.Quaternion.slerp(lgsvl.Quaternion.identity(), a, 1 / 3)
+        self.assertAlmostEqual(mid.to_euler().y, 30.0)
+
+        steps = lgsvl.geometry.quaternion_slerp(lgsvl.Quaternion.identity().to_array(), a.to_array(), numpy.linspace(0, 1, 7))
+        numpy.testing.assert_allclose(lgsvl.geometry.quaternion_to_euler(steps)[:, 1], numpy.linspace(0, 90, 7), atol=1e-9)
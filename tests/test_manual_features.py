@@ -9,7 +9,7 @@
 import unittest
 
 import lgsvl
-from .common import SimConnection, spawnState, TestTimeout
+from .common import SimConnection, spawnState, TestTimeout, skipOnMock
 
 class TestManual(unittest.TestCase):
     @unittest.skip("Windshield wipers no longer supported")
@@ -37,6 +37,7 @@ class TestManual(unittest.TestCase):
         except TestTimeout:
             self.fail("Wipers were not on")
 
+    @skipOnMock("nothing is rendered to check by eye")
     def test_headlights(self):
         try:
             with SimConnection() as sim:
@@ -55,6 +56,7 @@ class TestManual(unittest.TestCase):
         except TestTimeout:
             self.fail("Headlights were not on")
 
+    @skipOnMock("nothing is rendered to check by eye")
     def test_blinkers(self):
         try:
             with SimConnection() as sim:
@@ -99,6 +101,7 @@ class TestManual(unittest.TestCase):
         except TestTimeout:
             self.fail("Wipers were on")
 
+    @skipOnMock("nothing is rendered to check by eye")
     def test_headlights_large_value(self):
         try:
             with SimConnection() as sim:
@@ -111,6 +114,7 @@ class TestManual(unittest.TestCase):
         except TestTimeout:
             self.fail("Headlights were on")
 
+    @skipOnMock("nothing is rendered to check by eye")
     def test_headlights_str(self):
         try:
             with SimConnection() as sim:
@@ -0,0 +1,353 @@
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+import time
+import unittest
+
+import numpy
+
+import lgsvl
+from lgsvl.mock import MockSimulator
+
+from .common import cmEqual
+
+
+class TestMock(unittest.TestCase):
+    def setUp(self):
+        self.server = MockSimulator(seed=0).start()
+        self.sim = lgsvl.Simulator("127.0.0.1", self.server.port)
+
+    def tearDown(self):
+        self.sim.close()
+        self.server.stop()
+
+    def add(self, agent_type, x=0.0, z=0.0):
+        state = lgsvl.AgentState()
+        state.transform.position = lgsvl.Vector(x, 0, z)
+        return self.sim.add_agent("Sedan", agent_type, state)
+
+    def test_scene(self):
+        self.sim.load("CubeTown")
+        self.assertEqual(self.sim.current_scene, "CubeTown")
+        self.assertEqual(len(self.sim.get_spawn()), 2)
+        self.sim.run(0.5)
+        self.assertAlmostEqual(self.sim.current_time, 0.5)
+        self.sim.run(-5)
+        self.assertAlmostEqual(self.sim.current_time, 0.5)
+        self.sim.reset()
+        self.assertEqual(self.sim.current_frame, 0)
+        self.sim.load(lgsvl.wise.DefaultAssets.map_borregasave)
+        self.assertEqual(self.sim.current_scene, "BorregasAve")
+        with self.assertRaises(Exception):
+            self.sim.load("SF")
+
+    def test_metadata_cache(self):
+        self.sim.load("CubeTown")
+        for _ in range(3):
+            self.assertEqual(self.sim.current_scene, "CubeTown")
+            spawns = self.sim.get_spawn()
+        spawns[0].position.x += 100
+        self.assertNotEqual(self.sim.get_spawn()[0].position.x, spawns[0].position.x)
+        stats = self.sim.stats()
+        self.assertEqual(stats["simulator/current_scene"]["count"], 1)
+        self.assertEqual(stats["map/spawn/get"]["count"], 1)
+
+        self.sim.load("BorregasAve")
+        self.assertEqual(self.sim.current_scene, "BorregasAve")
+        self.sim.reset()
+        self.sim.current_scene
+        self.sim.clear_cache()
+        self.sim.current_scene
+        self.assertEqual(self.sim.stats()["simulator/current_scene"]["count"], 4)
+
+    def test_kinematics(self):
+        ego = self.add(lgsvl.AgentType.EGO)
+        control = lgsvl.VehicleControl()
+        control.throttle = 1.0
+        ego.apply_control(control, True)
+        self.sim.run(2.0)
+        state = ego.state
+        self.assertAlmostEqual(state.speed, 7.6, 3)
+        self.assertGreater(state.position.z, 7.0)
+
+        state.transform.position = lgsvl.Vector(10, 0, 10)
+        ego.state = state
+        cmEqual(self, ego.state.position, lgsvl.Vector(10, 0, 10), "state was not set")
+        self.assertEqual([type(s).__name__ for s in ego.get_sensors()], ["CameraSensor", "CameraSensor", "LidarSensor", "GpsSensor", "ImuSensor", "CanBusSensor", "RadarSensor"])
+
+    def test_events(self):
+        ego = self.add(lgsvl.AgentType.EGO)
+        npc = self.add(lgsvl.AgentType.NPC, 3.6)
+        collisions = []
+        reached = []
+        ego.on_collision(lambda agent, other, contact: collisions.append(other))
+        npc.on_waypoint_reached(lambda agent, index: reached.append(index))
+        self.sim.agents_traversed_waypoints(self.sim.stop)
+        npc.follow([lgsvl.DriveWaypoint(lgsvl.Vector(0, 0, z), 10) for z in (10, 20)])
+
+        self.sim.run(10.0)
+        self.assertEqual(reached, [0, 1])
+        self.assertEqual(collisions, [npc])
+        self.assertLess(self.sim.current_time, 3.0)
+
+    def test_event_handlers(self):
+        ego = self.add(lgsvl.AgentType.EGO)
+        npc = self.add(lgsvl.AgentType.NPC, 3.6)
+        ego.on_collision(None)
+        npc.on_waypoint_reached(None)
+        npc.follow([lgsvl.DriveWaypoint(lgsvl.Vector(0, 0, z), 10) for z in (10, 20)])
+
+        collisions = []
+        reached = []
+        batches = []
+
+        async def on_waypoint(agent, index):
+            reached.append((agent, index))
+
+        self.sim.on_event("collision", lambda agent, other, contact: collisions.append((agent, other)))
+        self.sim.on_event("waypoint_reached", on_waypoint)
+        self.sim.on_events(batches.append)
+        self.sim.agents_traversed_waypoints(self.sim.stop)
+        with self.assertRaises(ValueError):
+            self.sim.on_event("unknown", print)
+
+        self.sim.run(10.0)
+        self.assertEqual(collisions, [(ego, npc)])
+        self.assertEqual(reached, [(npc, 0), (npc, 1)])
+        self.assertEqual(sum(len(batch) for batch in batches), 4)
+        self.assertIsInstance(batches[-1][-1], lgsvl.events.AgentsTraversedWaypointsEvent)
+
+    def test_remove_in_callback(self):
+        for batch in (False, True):
+            if batch:
+                self.sim.on_events(lambda events: None)
+            first = self.add(lgsvl.AgentType.NPC)
+            second = self.add(lgsvl.AgentType.NPC, 3.6)
+            calls = []
+
+            def on_first(agent, index):
+                calls.append(("first", index))
+                if second.uid in self.sim.agents:
+                    self.sim.remove_agent(second)
+
+            first.on_waypoint_reached(on_first)
+            second.on_waypoint_reached(lambda agent, index: calls.append(("second", index)))
+            self.sim._process_events([
+                {"type": "waypoint_reached", "agent": first.uid, "index": 0},
+                {"type": "waypoint_reached", "agent": second.uid, "index": 0},
+                {"type": "waypoint_reached", "agent": first.uid, "index": 1},
+            ])
+            self.assertEqual(calls, [("first", 0), ("first", 1)])
+
+    def test_run_iter(self):
+        ego = self.add(lgsvl.AgentType.EGO)
+        npc = self.add(lgsvl.AgentType.NPC, 3.6)
+        ego.on_collision(None)
+        npc.on_waypoint_reached(None)
+        npc.follow([lgsvl.DriveWaypoint(lgsvl.Vector(0, 0, z), 10) for z in (10, 20)])
+
+        seen = []
+        for event in self.sim.run_iter(10.0):
+            seen.append(event)
+            if isinstance(event, lgsvl.events.WaypointReachedEvent) and event.index == 1:
+                break
+        collision = lgsvl.events.CollisionEvent(ego, npc, seen[0].contact)
+        self.assertEqual(seen[0], collision)
+        self.assertIsInstance(seen[1], lgsvl.events.WaypointReachedEvent)
+        self.assertEqual([e.index for e in seen[1:]], [0, 1])
+        self.assertLess(self.sim.current_time, 3.0)
+
+    def test_batch_values(self):  # Check that calls needing a reply get values inside a batch
+        ego = self.add(lgsvl.AgentType.EGO)
+        states = []
+        with self.sim.batch():
+            before = ego.state
+            npc = self.add(lgsvl.AgentType.NPC, 3.6)
+            self.assertIsInstance(npc.uid, str)
+            self.assertIs(self.sim.agents[npc.uid], npc)
+            self.assertIsInstance(self.sim.weather, lgsvl.WeatherState)
+            self.assertIsInstance(self.sim.current_scene, str)
+            self.assertIsInstance(ego.get_sensors()[0], lgsvl.CameraSensor)
+            self.assertIsInstance(before.result(), lgsvl.AgentState)
+
+            ego.on_collision(lambda agent, other, contact: states.append(other.state))
+            self.sim.run(0.5)
+            after = ego.state
+        self.assertEqual(len(states), 1)
+        self.assertIsInstance(states[0], lgsvl.AgentState)
+        self.assertAlmostEqual(after.result().position.x, 0.0)
+
+    def test_map(self):
+        hit =self.sim.raycast(lgsvl.Vector(0, 10, 0), lgsvl.Vector(0, -1, 0))
+        self.assertAlmostEqual(hit.distance, 10.0)
+        self.assertIsNone(self.sim.raycast(lgsvl.Vector(0, 10, 0), lgsvl.Vector(0, 1, 0)))
+        cmEqual(self, self.sim.map_point_on_lane(lgsvl.Vector(4, 0, 7)).position, lgsvl.Vector(3.6, 0, 7), "not on lane")
+
+        transform = lgsvl.Transform(lgsvl.Vector(120, 0, -40), lgsvl.Vector(0, 30, 0))
+        gps = self.sim.map_to_gps(transform)
+        back = self.sim.map_from_gps(latitude=gps.latitude, longitude=gps.longitude)
+        self.assertAlmostEqual(back.position.x, 120, 3)
+        self.assertAlmostEqual(back.position.z, -40, 3)
+
+    def test_raycast_array(self):
+        origins = numpy.column_stack([numpy.arange(2500.0), numpy.full(2500, 10.0), numpy.zeros(2500)])
+        directions = numpy.tile([0.0, -1.0, 0.0], (2500, 1))
+        directions[::2, 1] = 1.0
+        hits = self.sim.raycast_array(origins, directions, max_distance=20.0)
+        self.assertEqual(self.sim.stats()["simulator/raycast"]["count"], 3)
+        self.assertEqual(hits.hit.tolist(), [False, True] * 1250)
+        numpy.testing.assert_allclose(hits.distance[1::2], 10.0)
+        numpy.testing.assert_allclose(hits.point[1::2], origins[1::2] * [1, 0, 1])
+        self.assertTrue(numpy.isnan(hits.normal[::2]).all())
+
+        hits = self.sim.raycast_array(origins[1:3], directions[1:3], max_distance=[5.0, 20.0])
+        self.assertEqual(hits.hit.tolist(), [False, False])
+        self.assertEqual(len(self.sim.raycast_array(numpy.zeros((0, 3)), numpy.zeros((0, 3))).hit), 0)
+
+    def test_map_cache(self):
+        cache = lgsvl.MapCache(resolution=0.1, max_entries=3)
+        sim = lgsvl.Simulator("127.0.0.1", self.server.port, map_cache=cache)
+        try:
+            points = [lgsvl.Vector(4, 0, z) for z in range(3)]
+            first = sim.map_points_on_lane(points + points)
+            cmEqual(self, first[4].position, lgsvl.Vector(3.6, 0, 1), "batch")
+            self.assertEqual(sim.stats()["map/point_on_lane"]["count"], 3)
+
+            cmEqual(self, sim.map_point_on_lane(lgsvl.Vector(4.01, 0, 1)).position, lgsvl.Vector(3.6, 0, 1), "cached")
+            sim.map_point_on_lane(lgsvl.Vector(4, 0, 10))
+            self.assertEqual(sim.stats()["map/point_on_lane"]["count"], 4)
+            self.assertEqual(cache.stats()["evictions"], 1)
+            self.assertEqual(cache.stats()["entries"], 3)
+
+            sim.map_point_on_lane(points[0])
+            self.assertEqual(sim.stats()["map/point_on_lane"]["count"], 5)
+
+            npc = sim.add_agent("Sedan", lgsvl.AgentType.NPC)
+            sim.clear_cache()
+            with sim.batch():
+                state = npc.state
+                inside = [sim.map_point_on_lane(points[0]) for _ in range(2)]
+            for transform in inside:
+                cmEqual(self, transform.position, lgsvl.Vector(3.6, 0, 0), "inside a batch")
+            self.assertEqual(sim.stats()["map/point_on_lane"]["count"], 5)
+            self.assertTrue(all(isinstance(key[0], str) for key in cache.entries))
+            cmEqual(self, state.result().position, lgsvl.Vector(), "state read in the batch")
+        finally:
+            sim.close()
+
+    def test_geo_reference(self):
+        server = MockSimulator(origin=(4140112.5, 587947.9, 10.0, 30.0, 10)).start()
+        sim = lgsvl.Simulator("127.0.0.1", server.port)
+        try:
+            reference = sim.geo_reference()
+            self.assertLess(reference.error, 0.01)
+            transforms = [lgsvl.Transform(lgsvl.Vector(x, y, z), lgsvl.Vector(0, yaw, 0))
+                          for x, y, z, yaw in ((120, 2, -40, 10), (-3000, 0, 2500, 350), (0.5, -1, 0.25, 180))]
+            for local, remote in zip(sim.map_to_gps_batch(transforms, local=True), sim.map_to_gps_batch(transforms)):
+                for field in ("latitude", "longitude"):
+                    self.assertAlmostEqual(getattr(local, field), getattr(remote, field), 7)
+                for field in ("northing", "easting", "altitude", "orientation"):
+                    self.assertAlmostEqual(getattr(local, field), getattr(remote, field), 3)
+
+            gps = sim.map_to_gps(transforms[0])
+            coords = [
+                {"latitude": gps.latitude, "longitude": gps.longitude, "altitude": gps.altitude},
+                {"northing": gps.northing, "easting": gps.easting, "orientation": gps.orientation},
+            ]
+            for local, remote in zip(sim.map_from_gps_batch(coords, local=True), sim.map_from_gps_batch(coords)):
+                cmEqual(self, local.position, remote.position, "position")
+                cmEqual(self, local.rotation, remote.rotation, "rotation")
+
+            trajectory = numpy.column_stack([numpy.linspace(0, 500, 1000), numpy.zeros(1000), numpy.linspace(0, -800, 1000)])
+            positions, _ = reference.from_gps(**{k: v for k, v in reference.to_gps(trajectory).items() if k != "orientation"})
+            numpy.testing.assert_allclose(positions, trajectory, atol=1e-4)
+            self.assertEqual(sim.stats()["map/to_gps"]["count"], len(lgsvl.geo.CALIBRATION_POINTS + lgsvl.geo.VALIDATION_POINTS) + 4)
+        finally:
+            sim.close()
+            server.stop()
+
+    def test_controllables(self):
+        signals = self.sim.get_controllables("signal")
+        self.assertEqual(len(signals), 2)
+        signal = self.sim.get_controllable(lgsvl.Vector(10, 0, 50), "signal")
+        signal.control("state=red;wait=5")
+        self.assertEqual(signal.current_state, "red")
+
+    def test_latency(self):
+        self.server.latency = {"agent/state/get": 0.05}
+        npc = self.add(lgsvl.AgentType.NPC)
+        start = time.perf_counter()
+        with self.sim.batch():
+            futures = [npc.state for _ in range(10)]
+        [f.result() for f in futures]
+        self.assertLess(time.perf_counter() - start, 0.3)
+
+    def test_many_agents(self):
+        self.server.random_agents = 5000
+        self.sim.add_random_agents(lgsvl.AgentType.NPC)
+        self.sim.add_random_agents(lgsvl.AgentType.PEDESTRIAN)
+        start = time.perf_counter()
+        self.sim.run(1.0)
+        self.assertLess(time.perf_counter() - start, 2.0)
+
+    def test_agent_states(self):
+        agents = [self.add(lgsvl.AgentType.NPC, 3.6 * i, 10.0 * i) for i in range(20)]
+        states = self.sim.get_agent_states()
+        self.assertEqual(set(states), {a.uid for a in agents})
+        self.assertAlmostEqual(states[agents[3].uid].position.z, 30.0)
+
+        array = self.sim.get_agent_states(agents[5:], as_array=True)
+        self.assertEqual(list(array["uid"]), [a.uid for a in agents[5:]])
+        self.assertEqual(array["position"].shape, (15, 3))
+        self.assertAlmostEqual(array["position"][0, 0], 18.0)
+        self.assertAlmostEqual(array["position"][0, 2], 50.0)
+        self.assertEqual(self.sim.remote.stats.to_json()["agent/state/get"]["count"], 35)
+
+    def test_set_agent_states(self):
+        agents = [self.add(lgsvl.AgentType.NPC, 3.6 * i) for i in range(10)]
+        state = lgsvl.AgentState()
+        state.transform.position = lgsvl.Vector(1, 0, 2)
+        self.sim.set_agent_states({agents[0]: state, agents[1].uid: state})
+        self.assertAlmostEqual(agents[1].state.position.z, 2.0)
+
+        array = self.sim.get_agent_states(as_array=True)
+        array["position"][:, 2] += 100
+        array["velocity"][:, 2] = 5
+        self.sim.set_agent_states(array)
+        states = self.sim.get_agent_states()
+        self.assertAlmostEqual(states[agents[0].uid].position.z, 102.0)
+        self.assertAlmostEqual(states[agents[9].uid].position.x, 32.4)
+        self.assertAlmostEqual(states[agents[9].uid].velocity.z, 5.0)
+
+    def test_step(self):
+        ego = self.add(lgsvl.AgentType.EGO)
+        npc = self.add(lgsvl.AgentType.NPC, 0, 30)
+        state = lgsvl.AgentState()
+        state.velocity = lgsvl.Vector(0, 0, 10)
+        collisions = []
+        ego.on_collision(lambda agent, other, contact: collisions.append(other))
+
+        obs = self.sim.step(0.5, [ego, npc], {ego: state})
+        self.assertEqual(obs.frame, 25)
+        self.assertAlmostEqual(obs.time, 0.5)
+        self.assertAlmostEqual(obs.states[ego.uid].position.z, 5.0)
+        self.assertEqual(obs.events, [])
+        self.assertNotIn("simulator/continue", self.sim.remote.stats.to_json())
+
+        with self.sim.batch():
+            control = lgsvl.VehicleControl()
+            control.braking = 1.0
+            ego.apply_control(control, True)
+            obs = self.sim.step(0.5, [ego], as_array=True)
+        self.assertLess(obs.states["velocity"][0, 2], 10.0)
+
+        with self.sim.batch():
+            ego.apply_control(lgsvl.VehicleControl(), True)
+            obs = self.sim.step(5.0, [ego], {ego: state})
+        self.assertEqual([e["type"] for e in obs.events], ["collision"])
+        self.assertEqual(collisions, [npc])
+        self.assertAlmostEqual(obs.time, 6.0)
+        self.assertTrue(self.sim.remote.tagged)
@@ -8,7 +8,7 @@ import unittest
 import math
 
 import lgsvl
-from .common import SimConnection, cmEqual, mEqual, spawnState
+from .common import SimConnection, cmEqual, mEqual, spawnState, skipOnMock
 
 
 class TestPeds(unittest.TestCase):
@@ -24,6 +24,7 @@ class TestPeds(unittest.TestCase):
                 cmEqual(self, agent.state.position, sim.get_spawn()[0].position, name)
                 self.assertEqual(agent.name, name)
 
+    @skipOnMock("the ground is flat, walking never changes the height")
     def test_ped_random_walk(self):  # Check if pedestrians can walk randomly
         with SimConnection(40) as sim:
             state = spawnState(sim)
@@ -0,0 +1,480 @@
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+import asyncio
+import socket
+import threading
+import time
+import unittest
+
+import websockets
+
+import lgsvl
+
+from lgsvl.codec import JsonCodec, OrjsonCodec, get_codec, orjson, msgpack
+from lgsvl.remote import Remote, ConnectionLost, CommandTimeout, CommandCancelled, CancellationToken
+
+from .common import cmEqual
+
+
+class StandInServer(threading.Thread):
+    # Speaks the simulator command protocol; handler(name, args) returns the result
+    def __init__(self, handler, latency=0.0, echo_id=False, concurrent=False, codecs=()):
+        super().__init__(daemon=True)
+        self.handler = handler
+        self.codecs = codecs
+        self.latency = latency
+        self.echo_id = echo_id
+        self.concurrent = concurrent
+        self.received = []
+        self.connections = set()
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        self.port = sock.getsockname()[1]
+        sock.close()
+        self.ready = threading.Event()
+        self.start()
+        self.ready.wait()
+
+    def run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(self.listen())
+        self.ready.set()
+        self.loop.run_forever()
+
+    async def listen(self):
+        return await websockets.serve(self.serve, "127.0.0.1", self.port)
+
+    async def shutdown(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.shutdown(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.join()
+
+    async def disconnect(self):
+        for websocket in list(self.connections):
+            await websocket.close()
+
+    def drop(self):  # Closes the open connections but keeps accepting new ones
+        asyncio.run_coroutine_threadsafe(self.disconnect(), self.loop).result()
+
+    async def reply(self, websocket, codec, request):
+        latency = self.latency(request) if callable(self.latency) else self.latency
+        if latency:
+            await asyncio.sleep(latency)
+        try:
+            response = {"result": self.handler(request["command"], request["arguments"])}
+        except Exception as e:
+            response = {"error": str(e)}
+        if self.echo_id:
+            response["id"] = request.get("id")
+        try:
+            await websocket.send(codec.encode(response))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    async def serve(self, websocket, path=None):
+        self.connections.add(websocket)
+        codec = JsonCodec()
+        async for message in websocket:
+            request = codec.decode(message)
+            if request["command"] == "connection/codec" and self.codecs:
+                chosen = next(c for c in request["arguments"]["codecs"] if c in self.codecs)
+                await websocket.send(codec.encode({"result": chosen}))
+                codec = get_codec(chosen)
+                continue
+            self.received.append(request)
+            if self.concurrent:
+                asyncio.ensure_future(self.reply(websocket, codec, request))
+            else:
+                await self.reply(websocket, codec, request)
+
+
+def echo(name, args):
+    if name == "fail":
+        raise ValueError("failed on purpose")
+    return {"command": name, "arguments": args}
+
+
+class TestRemote(unittest.TestCase):
+    def test_command(self):  # Check that results and errors reach the caller
+        server = StandInServer(echo)
+        remote = Remote("127.0.0.1", server.port)
+        try:
+            self.assertEqual(remote.command("agent/state/get", {"uid": "a"}), {"command": "agent/state/get", "arguments": {"uid": "a"}})
+            with self.assertRaises(Exception) as cm:
+                remote.command("fail")
+            self.assertIn("failed on purpose", str(cm.exception))
+            self.assertEqual(remote.in_flight, 0)
+        finally:
+            remote.close()
+            server.stop()
+
+    def test_pipelining(self):  # Check that many outstanding commands share one round trip
+        server = StandInServer(echo, latency=0.05, concurrent=True)
+        remote = Remote("127.0.0.1", server.port)
+        try:
+            start = time.monotonic()
+            futures = [remote.submit("agent/state/get", {"uid": i}) for i in range(20)]
+            results = [f.result() for f in futures]
+            elapsed = time.monotonic() - start
+            self.assertEqual([r["arguments"]["uid"] for r in results], list(range(20)))
+            self.assertLess(elapsed, 10 * 0.05)
+        finally:
+            remote.close()
+            server.stop()
+
+    def test_threads(self):  # Check that concurrent callers each get their own reply
+        server = StandInServer(echo)
+        remote = Remote("127.0.0.1", server.port)
+        errors = []
+
+        def worker(n):
+            for i in range(50):
+                uid = "{}-{}".format(n, i)
+                if remote.command("agent/state/get", {"uid": uid})["arguments"]["uid"] != uid:
+                    errors.append(uid)
+
+        try:
+            threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            self.assertEqual(errors, [])
+        finally:
+            remote.close()
+            server.stop()
+
+    def test_correlation_id(self):  # Check that replies are routed by id when the server answers out of order
+        def delay(request):
+            return 0.01 * (5 - request["arguments"]["n"])
+
+        server = StandInServer(lambda name, args: args["n"], latency=delay, echo_id=True, concurrent=True)
+        remote = Remote("127.0.0.1", server.port)
+        try:
+            futures = [remote.submit("simulator/version", {"n": n}) for n in range(5)]
+            self.assertEqual([f.result() for f in futures], list(range(5)))
+            self.assertEqual(len({r["id"] for r in server.received}), 5)
+        finally:
+            remote.close()
+            server.stop()
+
+    def test_step_untagged(self):  # Check that step() observes the right replies from a server that does not echo ids
+        clock = {"frame": 0, "time": 0.0}
+
+        def handler(name, args):
+            if name == "agent/state/get":
+                state = lgsvl.AgentState()
+                state.transform.position = lgsvl.Vector(args["uid"], clock["frame"], clock["time"])
+                return state.to_json()
+            if name == "simulator/run":
+                clock["frame"] += 5
+                clock["time"] += args["time_limit"]
+                if clock["frame"] == 10:
+                    return {"events": [{"type": "waypoint_reached", "agent": 1, "index": 3}]}
+            if name == "simulator/current_frame":
+                return clock["frame"]
+            if name == "simulator/current_time":
+                return clock["time"]
+            return None
+
+        # Replies carry no "id" and commands are answered while a run is still going
+        server = StandInServer(handler, latency=lambda request: 0.05 if request["command"] == "simulator/run" else 0.0, concurrent=True)
+        sim = lgsvl.Simulator("127.0.0.1", server.port)
+        try:
+            agents = [lgsvl.NpcVehicle(i, sim) for i in range(3)]
+            sim.agents.update((agent.uid, agent) for agent in agents)
+            reached = []
+            sim._add_callback(agents[1], "waypoint_reached", lambda agent, index: reached.append((agent.uid, index)))
+
+            for frame in (5, 10, 15):
+                obs = sim.step(0.5, agents, {agents[0]: lgsvl.AgentState()})
+                self.assertEqual((obs.frame, obs.time), (frame, frame / 10))
+                for uid, state in obs.states.items():
+                    cmEqual(self, state.position, lgsvl.Vector(uid, frame, frame / 10), "agent {}".format(uid))
+                self.assertEqual(len(obs.events), 1 if frame == 10 else 0)
+            self.assertEqual(reached, [(1, 3)])
+            self.assertFalse(sim.remote.tagged)
+            self.assertEqual([r["command"] for r in server.received[-7:]], ["agent/state/set", "simulator/run"] + ["agent/state/get"] * 3 + ["simulator/current_frame", "simulator/current_time"])
+        finally:
+            sim.close()
+            server.stop()
+
+    def test_geo_reference_error(self):  # Check that a failed geo reference calibration is not repeated within a scene
+        def handler(name, args):
+            if name == "map/to_gps":
+                # The same location for every point, which no fit can describe
+                return {"latitude": 37.4, "longitude": -122.0, "northing": 4141627.3, "easting": 587060.9, "altitude": 0.0, "orientation": 0.0}
+            return None
+
+        server = StandInServer(handler)
+        sim = lgsvl.Simulator("127.0.0.1", server.port)
+        try:
+            for _ in range(2):
+                with self.assertRaises(lgsvl.geo.GeoReferenceError):
+                    sim.map_to_gps_batch([lgsvl.Transform()], local=True)
+            count = len(lgsvl.geo.CALIBRATION_POINTS + lgsvl.geo.VALIDATION_POINTS)
+            self.assertEqual(sim.stats()["map/to_gps"]["count"], count)
+            sim.load("CubeTown")
+            with self.assertRaises(lgsvl.geo.GeoReferenceError):
+                sim.geo_reference()
+            self.assertEqual(sim.stats()["map/to_gps"]["count"], 2 * count)
+        finally:
+            sim.close()
+            server.stop()
+
+    def test_batch(self):  # Check that commands issued inside a batch are sent together and resolve lazily
+        def handler(name, args):
+            if name == "agent/state/get":
+                state = lgsvl.AgentState()
+                state.transform.position.x = args["uid"]
+                return state.to_json()
+            return None
+
+        server = StandInServer(handler, latency=0.05, concurrent=True)
+        sim = lgsvl.Simulator("127.0.0.1", server.port)
+        try:
+            agents = [lgsvl.NpcVehicle(i, sim) for i in range(10)]
+            start = time.monotonic()
+            with sim.batch():
+                for agent in agents:
+                    agent.state = lgsvl.AgentState()
+                states = [agent.state for agent in agents]
+                self.assertEqual(server.received, [])
+            self.assertEqual([s.result().position.x for s in states], list(range(10)))
+            self.assertLess(time.monotonic() - start, 10 * 0.05)
+            self.assertEqual([r["command"] for r in server.received], ["agent/state/set"] * 10 + ["agent/state/get"] * 10)
+        finally:
+            sim.close()
+            server.stop()
+
+    def test_batch_order(self):  # Check that nested scopes and early reads keep program order
+        server = StandInServer(echo)
+        remote = Remote("127.0.0.1", server.port)
+        try:
+            with remote.batch() as batch:
+                first = remote.command("first")
+                with remote.batch():
+                    second = remote.command("second")
+                    self.assertEqual(first.result()["command"], "first")
+                third = batch.command("third", parse=lambda r: r["command"].upper())
+                self.assertEqual(remote.query("fourth")["command"], "fourth")
+                fifth = remote.command("fifth")
+            self.assertEqual(second.result()["command"], "second")
+            self.assertEqual(third.result(), "THIRD")
+            self.assertEqual(fifth.result()["command"], "fifth")
+            self.assertEqual([r["command"] for r in server.received], ["first", "second", "third", "fourth", "fifth"])
+        finally:
+            remote.close()
+            server.stop()
+
+    def exchange(self, server, codec):  # Runs a representative command sequence and returns every result
+        remote = Remote("127.0.0.1", server.port, codec=codec)
+        try:
+            state = lgsvl.AgentState()
+            state.velocity = lgsvl.Vector(1.5, -2.25, 1e-9)
+            results = [
+                remote.command("agent/state/set", {"uid": "ego", "state": state.to_json()}),
+                remote.command("simulator/raycast", [{
+                    "origin": {"x": 0, "y": 1, "z": 0},
+                    "direction": {"x": 0, "y": -1, "z": 0},
+                    "layer_mask": -1,
+                    "max_distance": float("inf"),
+                }]),
+                remote.command("simulator/continue", {"events": [{"type": "custom", "agent": "ego", "kind": "ünicode", "context": None}]}),
+            ]
+            return remote.codec.name, results
+        finally:
+            remote.close()
+
+    def test_codecs(self):  # Check that every codec produces identical results, with and without negotiation
+        server = StandInServer(echo, codecs=("msgpack", "json"))
+        try:
+            name, expected = self.exchange(server, None)
+            self.assertEqual(name, "json")
+            self.assertEqual(expected[1]["arguments"][0]["max_distance"], float("inf"))
+            if msgpack is not None:
+                name, results = self.exchange(server, "msgpack")
+                self.assertEqual(name, "msgpack")
+                self.assertEqual(results, expected)
+        finally:
+            server.stop()
+
+        server = StandInServer(echo)
+        try:
+            name, results = self.exchange(server, "msgpack" if msgpack is not None else "json")
+            self.assertEqual(name, "json")
+            self.assertEqual(results, expected)
+        finally:
+            server.stop()
+
+    @unittest.skipIf(orjson is None, "orjson is not installed")
+    def test_orjson_non_finite(self):  # Check that orjson output stays readable by the simulator for non-finite floats
+        codec = OrjsonCodec()
+        self.assertEqual(codec.encode({"max_distance": float("inf")}), '{"max_distance": Infinity}')
+        self.assertEqual(codec.encode({"seed": None}), '{"seed":null}')
+        self.assertEqual(codec.decode('{"distance": NaN}').keys(), {"distance"})
+
+    def test_fire_and_forget(self):  # Check that write-only calls do not wait and their errors surface later
+        replying = threading.Event()
+
+        def handler(name, args):
+            # Holds every reply until the client has issued its commands
+            replying.wait(10)
+            if name == "vehicle/apply_control" and args["control"]["throttle"] > 1:
+                raise ValueError("throttle out of range")
+            return None
+
+        server = StandInServer(handler)
+        sim = lgsvl.Simulator("127.0.0.1", server.port, fire_and_forget=True)
+        try:
+            ego = lgsvl.EgoVehicle("ego", sim)
+            control = lgsvl.VehicleControl()
+            for _ in range(10):
+                ego.apply_control(control)
+            self.assertEqual(len(sim.remote.unacknowledged), 10)
+            replying.set()
+            sim.flush()
+            self.assertEqual(len(server.received), 10)
+
+            control.throttle = 2.0
+            ego.apply_control(control)
+            with self.assertRaises(Exception) as cm:
+                sim.flush()
+            self.assertIn("throttle out of range", str(cm.exception))
+
+            ego.apply_control(control)
+            with sim.remote.acknowledged:
+                sim.remote.acknowledged.wait_for(lambda: not sim.remote.unacknowledged, 5)
+            with self.assertRaises(Exception):
+                sim.current_time
+            self.assertIsNone(sim.current_time)
+        finally:
+            replying.set()
+            sim.close()
+            server.stop()
+
+    def test_stats(self):  # Check that every command is counted, timed and reported to hooks
+        server = StandInServer(echo, latency=0.01)
+        sim = lgsvl.Simulator("127.0.0.1", server.port)
+        seen = []
+        try:
+            sim.remote.stats.add_hook(lambda *args: seen.append(args), "fail")
+            for _ in range(3):
+                sim.current_time
+            with self.assertRaises(Exception):
+                sim.remote.command("fail")
+
+            stats = sim.stats()
+            self.assertEqual(stats["simulator/current_time"]["count"], 3)
+            self.assertEqual(stats["simulator/current_time"]["in_flight"], 0)
+            self.assertGreaterEqual(stats["simulator/current_time"]["latency"]["min"], 0.01)
+            self.assertGreater(stats["simulator/current_time"]["bytes_received"], 0)
+            self.assertEqual(stats["fail"]["errors"], 1)
+            self.assertEqual(len(seen), 1)
+            self.assertEqual(seen[0][0], "fail")
+            self.assertIn("failed on purpose", seen[0][4])
+
+            text = sim.remote.stats.to_prometheus()
+            self.assertIn('lgsvl_command_calls_total{command="simulator/current_time"} 3', text)
+            self.assertIn('lgsvl_command_latency_seconds_bucket{command="fail",le="+Inf"} 1', text)
+        finally:
+            sim.close()
+            server.stop()
+
+    def test_reconnect(self):  # Check that queries survive a dropped connection and other commands fail
+        server = StandInServer(echo, latency=0.2, concurrent=True)
+        remote = Remote("127.0.0.1", server.port, reconnect_delay=0.01)
+        try:
+            query = remote.submit("agent/state/get", {"uid": "a"})
+            write = remote.submit("agent/state/set", {"uid": "a"})
+            time.sleep(0.05)
+            server.drop()
+
+            self.assertEqual(query.result(5)["arguments"], {"uid": "a"})
+            with self.assertRaises(ConnectionLost):
+                write.result(5)
+            self.assertEqual(remote.command("simulator/current_frame")["command"], "simulator/current_frame")
+            stats = remote.stats.to_json()["connection/reconnect"]
+            self.assertEqual(stats["count"], 1)
+            self.assertEqual(stats["errors"], 0)
+            self.assertGreater(stats["latency"]["sum"], 0)
+        finally:
+            remote.close()
+            server.stop()
+
+    def test_reconnect_metadata(self):  # Check that scene metadata is read again after a reconnect
+        server = StandInServer(echo)
+        sim = lgsvl.Simulator("127.0.0.1", server.port, reconnect_delay=0.01)
+        try:
+            self.assertEqual(sim.current_scene["command"], "simulator/current_scene")
+            sim.current_scene
+            self.assertEqual(sim.stats()["simulator/current_scene"]["count"], 1)
+
+            server.drop()
+            deadline = time.monotonic() + 5
+            while sim.remote.generation == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(sim.remote.generation, 1)
+            self.assertEqual(sim.current_scene["command"], "simulator/current_scene")
+            sim.current_scene
+            self.assertEqual(sim.stats()["simulator/current_scene"]["count"], 2)
+            self.assertEqual([r["command"] for r in server.received], ["simulator/current_scene"] * 2)
+        finally:
+            sim.close()
+            server.stop()
+
+    def test_reconnect_gives_up(self):  # Check that waiters are released when the simulator stays away
+        server = StandInServer(echo, latency=0.2, concurrent=True)
+        remote = Remote("127.0.0.1", server.port, reconnect_attempts=2, reconnect_delay=0.01)
+        try:
+            query = remote.submit("agent/state/get", {"uid": "a"})
+            time.sleep(0.05)
+            server.stop()
+
+            with self.assertRaises(ConnectionLost):
+                query.result(5)
+            with self.assertRaises(ConnectionLost):
+                remote.command("agent/state/get", {"uid": "a"})
+            self.assertEqual(remote.stats.to_json()["connection/reconnect"]["errors"], 1)
+        finally:
+            remote.close()
+
+    def test_timeout(self):  # Check that a late reply raises and does not leak into later commands
+        server = StandInServer(echo, latency=lambda request: 0.3 if request["command"] == "slow" else 0.0)
+        remote = Remote("127.0.0.1", server.port, timeout=0.1)
+        try:
+            with self.assertRaises(CommandTimeout):
+                remote.command("slow")
+            self.assertEqual(remote.command("fast", timeout=1.0)["command"], "fast")
+            self.assertEqual(remote.command("slow", timeout=1.0)["command"], "slow")
+            self.assertEqual(remote.in_flight, 0)
+        finally:
+            remote.close()
+            server.stop()
+
+    def test_cancel(self):  # Check that another thread can abort a waiting command
+        server = StandInServer(echo, latency=lambda request: 0.5 if request["command"] == "simulator/run" else 0.0)
+        sim = lgsvl.Simulator("127.0.0.1", server.port)
+        try:
+            token = CancellationToken()
+            threading.Timer(0.05, token.cancel).start()
+            start = time.monotonic()
+            with sim.cancellable(token):
+                with self.assertRaises(CommandCancelled):
+                    sim.run(1.0)
+                with self.assertRaises(CommandCancelled):
+                    sim.current_frame
+            self.assertLess(time.monotonic() - start, 0.4)
+            self.assertEqual(sim.remote.command("simulator/current_frame")["command"], "simulator/current_frame")
+        finally:
+            sim.close()
+            server.stop()
@@ -0,0 +1,113 @@
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import lgsvl
+from lgsvl.replay import ReplayError, load
+
+from .test_remote import StandInServer
+
+
+def scenario(name, args):
+    if name == "simulator/add_agent":
+        return "npc"
+    if name == "agent/state/get":
+        state = lgsvl.AgentState()
+        state.velocity = lgsvl.Vector(0, 0, 7.5)
+        return state.to_json()
+    if name == "simulator/run":
+        return {"events": [{"type": "collision", "agent": "npc", "other": None, "contact": {"x": 1, "y": 2, "z": 3}}]}
+    if name == "simulator/raycast":
+        raise ValueError("nothing hit")
+    return None
+
+
+def session(sim):
+    collisions = []
+    npc = sim.add_agent("Sedan", lgsvl.AgentType.NPC)
+    npc.on_collision(lambda agent, other, contact: collisions.append((agent.uid, other, contact.z)))
+    speed = npc.state.speed
+    sim.run(2.0)
+    try:
+        sim.raycast(lgsvl.Vector(), lgsvl.Vector(0, -1, 0))
+        error = None
+    except Exception as e:
+        error = str(e)
+    return speed, collisions, error
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_record_and_replay(self):  # Check that a replayed session gives the recorded results
+        for name in ["session.jsonl", "session.jsonl.gz"]:
+            path = os.path.join(self.dir, name)
+            server = StandInServer(scenario)
+            sim = lgsvl.Simulator("127.0.0.1", server.port, record=path)
+            try:
+                recorded = session(sim)
+            finally:
+                sim.close()
+                server.stop()
+
+            entries = load(path)
+            self.assertEqual([e["command"] for e in entries], [r["command"] for r in server.received])
+            self.assertEqual(entries[-1]["error"], "nothing hit")
+            self.assertEqual(entries[-1]["arguments"][0]["max_distance"], float("inf"))
+
+            sim = lgsvl.Simulator(replay=path, strict=True)
+            self.assertEqual(session(sim), recorded)
+            self.assertEqual(recorded, (7.5, [("npc", None, 3)], "nothing hit"))
+            self.assertEqual(sim.stats()["simulator/run"]["count"], 1)
+            with self.assertRaises(ReplayError):
+                sim.current_time
+
+    def test_batch(self):  # Check that batches and fire-and-forget writes work on a replayed session
+        def steps(sim):
+            with sim.batch():
+                npc = sim.add_agent("Sedan", lgsvl.AgentType.NPC)
+                npc.state = lgsvl.AgentState()
+                state = npc.state
+            npc.state = lgsvl.AgentState()
+            sim.flush()
+            return npc.uid, state.result().speed
+
+        path = os.path.join(self.dir, "session.jsonl")
+        server = StandInServer(scenario)
+        sim = lgsvl.Simulator("127.0.0.1", server.port, record=path)
+        try:
+            recorded = steps(sim)
+        finally:
+            sim.close()
+            server.stop()
+
+        sim = lgsvl.Simulator(replay=path, strict=True, fire_and_forget=True)
+        self.assertEqual(steps(sim), recorded)
+        self.assertEqual(recorded, ("npc", 7.5))
+        self.assertEqual(sim.stats()["agent/state/set"]["count"], 2)
+        self.assertIsNone(sim.remote.lost)
+
+    def test_strict(self):  # Check that strict replay rejects different arguments
+        path = os.path.join(self.dir, "session.jsonl")
+        server = StandInServer(scenario)
+        sim = lgsvl.Simulator("127.0.0.1", server.port, record=path)
+        try:
+            sim.load("BorregasAve")
+        finally:
+            sim.close()
+            server.stop()
+
+        with self.assertRaises(ReplayError):
+            lgsvl.Simulator(replay=path, strict=True).load("CubeTown")
+        lgsvl.Simulator(replay=path).load("CubeTown")
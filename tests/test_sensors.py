@@ -7,7 +7,7 @@
 import unittest
 import os
 import lgsvl
-from .common import SimConnection, spawnState, notAlmostEqual
+from .common import SimConnection, spawnState, notAlmostEqual, skipOnMock
 
 # TODO add tests for bridge to check if enabled sensor actually sends data
 
@@ -119,6 +119,7 @@ class TestSensors(unittest.TestCase):
                 with self.subTest(msg):
                     self.valid_sensor(s, msg )
 
+    @skipOnMock("sensor data is not rendered")
     def test_save_sensor(self):  # Check that sensor results can be saved
         with SimConnection(120) as sim:
 
@@ -147,6 +148,7 @@ class TestSensors(unittest.TestCase):
                 self.assertGreater(os.path.getsize(path), 0)
                 os.remove(path)
 
+    @skipOnMock("sensor data is not rendered")
     def test_save_lidar(self):  # Check that LIDAR sensor results can be saved
         with SimConnection(240) as sim:
             path = "lidar.pcd"
@@ -173,6 +175,7 @@ class TestSensors(unittest.TestCase):
                 self.assertGreater(os.path.getsize(path), 0)
                 os.remove(path)
 
+    @skipOnMock("the map is north aligned, so the spawn point heads at orientation 0")
     def test_GPS(self):  # Check that the GPS sensor works
         with SimConnection() as sim:
             state = lgsvl.AgentState()
@@ -8,7 +8,7 @@ import unittest
 
 import lgsvl
 
-from .common import SimConnection, spawnState
+from .common import SimConnection, spawnState, skipOnMock
 
 PROBLEM = "Object reference not set to an instance of an object"
 
@@ -55,6 +55,7 @@ class TestSimulator(unittest.TestCase):
             self.assertAlmostEqual(sim.current_time, 0)
             self.assertEqual(sim.current_frame, 0)
 
+    @skipOnMock("distances depend on the BorregasAve geometry")
     def test_raycast(self):  # Check if raycasting works
         with SimConnection() as sim:
             spawns = sim.get_spawn()
@@ -208,6 +209,7 @@ class TestSimulator(unittest.TestCase):
             post_time = sim.current_time
             self.assertAlmostEqual(initial_time, post_time)
 
+    @skipOnMock("coordinates depend on the BorregasAve georeference")
     def test_get_gps(self):  # Checks that GPS reports the correct values
         with SimConnection() as sim:
             spawn = sim.get_spawn()[0]
@@ -219,6 +221,7 @@ class TestSimulator(unittest.TestCase):
             self.assertAlmostEqual(gps.altitude, -1.03600001335144)
             self.assertAlmostEqual(gps.orientation, -104.823394775391)
 
+    @skipOnMock("coordinates depend on the BorregasAve georeference")
     def test_from_northing(self):  # Check that position vectors are correctly generated given northing and easting
         with SimConnection() as sim:
             spawn = sim.get_spawn()[0]
@@ -226,6 +229,7 @@ class TestSimulator(unittest.TestCase):
             self.assertAlmostEqual(spawn.position.x, location.position.x, places=1)
             self.assertAlmostEqual(spawn.position.z, location.position.z, places=1)
 
+    @skipOnMock("coordinates depend on the BorregasAve georeference")
     def test_from_latlong(self):  # Check that position vectors are correctly generated given latitude and longitude
         with SimConnection() as sim:
             spawn = sim.get_spawn()[0]
@@ -233,6 +237,7 @@ class TestSimulator(unittest.TestCase):
             self.assertAlmostEqual(spawn.position.x, location.position.x, places=1)
             self.assertAlmostEqual(spawn.position.z, location.position.z, places=1)
 
+    @skipOnMock("coordinates depend on the BorregasAve georeference")
     def test_from_alt_orient(self):  # Check that position vectors are correctly generated with altitude and orientation
         with SimConnection() as sim:
             spawn = sim.get_spawn()[0]
@@ -6,6 +6,8 @@
 
 import unittest
 
+import numpy
+
 import lgsvl
 import lgsvl.utils
 
@@ -60,3 +62,56 @@ class TestUtils(unittest.TestCase):  # Check that transform_to_matrix calculates
     def test_vector_dot(self):  # Check that vector_dot calculates the right values
         result = lgsvl.utils.vector_dot(lgsvl.Vector(1, 2, 3), lgsvl.Vector(4, 5, 6))
         self.assertAlmostEqual(result, 32)
+
+    def test_accepts(self):  # Check that @accepts rejects wrong arguments unless checks are off
+        @lgsvl.utils.accepts(str, (int, type(None)))
+        def fn(self, name, count=None):
+            return name, count
+
+        self.assertEqual(fn.__name__, "fn")
+        self.assertEqual(fn(None, "a"), ("a", None))
+        self.assertEqual(fn(None, "a", 2), ("a", 2))
+        self.assertEqual(fn(None, name="a", count=2), ("a", 2))
+        with self.assertRaises(TypeError) as e:
+            fn(None, "a", 2.0)
+        self.assertIn("'count'", str(e.exception))
+
+        lgsvl.utils.set_type_checks(False)
+        try:
+            self.assertEqual(fn(None, 1, 2.0), (1, 2.0))
+        finally:
+            lgsvl.utils.set_type_checks(True)
+        with self.assertRaises(TypeError):
+            fn(None, 1)
+
+    def test_batched_transforms(self):  # Check that the batched functions match the scalar ones
+        rng = numpy.random.RandomState(0)
+        positions = rng.uniform(-100, 100, (20, 3))
+        rotations = rng.uniform(-180, 180, (20, 3))
+        transforms = [lgsvl.Transform(lgsvl.Vector(*p), lgsvl.Vector(*r)) for p, r in zip(positions.tolist(), rotations.tolist())]
+
+        matrices = lgsvl.utils.transforms_to_matrices(positions, rotations)
+        numpy.testing.assert_allclose(matrices, [lgsvl.utils.transform_to_matrix(t) for t in transforms], atol=1e-12)
+        for batched, scalar in (
+            (lgsvl.utils.transforms_to_forward, lgsvl.utils.transform_to_forward),
+            (lgsvl.utils.transforms_to_up, lgsvl.utils.transform_to_up),
+            (lgsvl.utils.transforms_to_right, lgsvl.utils.transform_to_right),
+        ):
+            expected = [[v.x, v.y, v.z] for v in map(scalar, transforms)]
+            numpy.testing.assert_allclose(batched(rotations), expected, atol=1e-12)
+
+        inverse = lgsvl.utils.matrices_inverse(matrices)
+        numpy.testing.assert_allclose(inverse, [lgsvl.utils.matrix_inverse(lgsvl.utils.transform_to_matrix(t)) for t in transforms], atol=1e-9)
+        numpy.testing.assert_allclose(lgsvl.utils.matrices_multiply(matrices, inverse), numpy.broadcast_to(numpy.eye(4), (20, 4, 4)), atol=1e-9)
+
+        points = rng.uniform(-10, 10, (20, 3))
+        expected = [lgsvl.utils.vector_multiply(lgsvl.Vector(*p), lgsvl.utils.transform_to_matrix(t)) for p, t in zip(points.tolist(), transforms)]
+        world = lgsvl.utils.local_to_world(points, positions, rotations)
+        numpy.testing.assert_allclose(world, [[v.x, v.y, v.z] for v in expected], atol=1e-9)
+        numpy.testing.assert_allclose(lgsvl.utils.points_multiply(points, matrices), world, atol=1e-9)
+        numpy.testing.assert_allclose(lgsvl.utils.world_to_local(world, positions, rotations), points, atol=1e-9)
+
+        corners = rng.uniform(-2, 2, (20, 8, 3))
+        world = lgsvl.utils.local_to_world(corners, positions, rotations)
+        numpy.testing.assert_allclose(world[3], lgsvl.utils.local_to_world(corners[3], positions[3], rotations[3]), atol=1e-9)
+        numpy.testing.assert_allclose(lgsvl.utils.world_to_local(world, positions, rotations), corners, atol=1e-9)
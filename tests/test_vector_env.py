@@ -0,0 +1,80 @@
+#
+# Copyright (c) 2021 LG Electronics, Inc.
+#
+# This software contains code licensed as described in LICENSE.
+#
+
+import os
+import unittest
+from unittest import mock
+
+import lgsvl
+from lgsvl.mock import MockSimulator
+from lgsvl.vector_env import parse_endpoints
+
+
+def spawn(sim):
+    state = lgsvl.AgentState()
+    state.velocity = lgsvl.Vector(0, 0, 10)
+    ego = sim.add_agent("Sedan", lgsvl.AgentType.EGO, state)
+    npc = sim.add_agent("Sedan", lgsvl.AgentType.NPC)
+    return [ego, npc]
+
+
+def drive(sim, agents, action):
+    control = lgsvl.VehicleControl()
+    control.braking = action
+    agents[0].apply_control(control, True)
+
+
+class TestVectorEnv(unittest.TestCase):
+    def test_endpoints(self):
+        self.assertEqual(parse_endpoints("a:1, b,c:3", 8181), [("a", 1), ("b", 8181), ("c", 3)])
+
+    def test_step(self):  # Check that every simulator is stepped and observations are stacked
+        servers = [MockSimulator(seed=i).start() for i in range(3)]
+        hosts = ",".join("127.0.0.1:{}".format(server.port) for server in servers)
+        try:
+            with mock.patch.dict(os.environ, {"LGSVL__SIMULATOR_HOSTS": hosts}):
+                envs = lgsvl.VectorEnv(setup=spawn, act=drive, dt=0.5)
+            try:
+                self.assertEqual(len(envs), 3)
+                obs = envs.reset()
+                self.assertEqual(obs.states.shape, (3, 2))
+                self.assertEqual(list(obs.frame), [0, 0, 0])
+
+                obs = envs.step([0.0, 0.5, 1.0])
+                self.assertEqual(obs.time.tolist(), [0.5, 0.5, 0.5])
+                speeds = obs.states["velocity"][:, 0, 2]
+                self.assertAlmostEqual(speeds[0], 9.9)
+                self.assertTrue(speeds[0] > speeds[1] > speeds[2])
+                self.assertEqual(obs.events, [[], [], []])
+            finally:
+                envs.close()
+        finally:
+            for server in servers:
+                server.stop()
+
+    def test_step_events(self):  # Check that events fired during a step are returned and handled
+        servers = [MockSimulator(seed=i).start() for i in range(2)]
+        collisions = []
+
+        def setup(sim):
+            agents = spawn(sim)
+            agents[0].on_collision(lambda agent, other, contact: collisions.append(other.state))
+            return agents
+
+        try:
+            envs = lgsvl.VectorEnv([("127.0.0.1", server.port) for server in servers], setup=setup, act=drive, dt=0.5)
+            try:
+                envs.reset()
+                obs = envs.step([0.0, 1.0])
+                self.assertEqual([[e["type"] for e in events] for events in obs.events], [["collision"], ["collision"]])
+                self.assertEqual(len(collisions), 2)
+                self.assertIsInstance(collisions[0], lgsvl.AgentState)
+                self.assertEqual(obs.time.tolist(), [0.5, 0.5])
+            finally:
+                envs.close()
+        finally:
+            for server in servers:
+                server.stop()